@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""FinnhubProducer.on_message의 JSON 파싱 + Avro 인코딩 처리량(frames/sec, 단일 코어) 비교
+
+    python encode_benchmark.py                      # 합성 Finnhub trade 프레임
+    python encode_benchmark.py --key-by-symbol      # KAFKA_KEY_BY_SYMBOL=1처럼 symbol별로 나눠 인코딩
+
+Kafka 전송은 제외하고 프레임 문자열 -> 레코드 bytes까지만 측정한다.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from typing import List
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.append(SRC_DIR)
+
+from utils.encoder import ENCODER_MODES, JSON_PARSERS, TradeEncoder, load_json_parser  # noqa: E402
+from utils.functions import avro_encode, load_avro_schema, split_by_symbol  # noqa: E402
+
+SCHEMA_PATH = os.path.join(SRC_DIR, 'schemas', 'trades.avsc')
+
+SYMBOLS = [
+    "AAPL", "MSFT", "GOOGL", "AMZN", "META", "NVDA", "TSLA", "AVGO", "CRM", "ORCL",
+    "NFLX", "ADBE", "AMD", "INTC", "PYPL", "CSCO", "QCOM", "TXN", "AMAT", "PLTR"
+]
+
+
+def generate_frames(count: int, trades_per_frame: int = 20, seed: int = 42) -> List[str]:
+    """Finnhub websocket trade 프레임과 같은 형태의 JSON 문자열 생성"""
+    rng = random.Random(seed)
+    timestamp = int(time.time() * 1000)
+    prices = {symbol: rng.uniform(50, 900) for symbol in SYMBOLS}
+    frames = []
+
+    for _ in range(count):
+        trades = []
+        for _ in range(trades_per_frame):
+            symbol = rng.choice(SYMBOLS)
+            prices[symbol] *= 1 + rng.gauss(0, 0.0005)
+            timestamp += rng.randint(0, 5)
+            trades.append({
+                'c': rng.choice([['1', '12'], ['1'], [], None]),
+                'p': round(prices[symbol], 2),
+                's': symbol,
+                't': timestamp,
+                'v': rng.randint(1, 500)
+            })
+        frames.append(json.dumps({'data': trades, 'type': 'trade'}))
+
+    return frames
+
+
+def frame_encoder(parse, encode, key_by_symbol: bool):
+    """on_message와 같은 순서로 프레임 하나를 레코드 value 목록으로 변환"""
+    def encode_frame(frame):
+        message = parse(frame)
+        trades = message.get('data', [])
+        message_type = message.get('type', '')
+        if key_by_symbol and trades:
+            return [encode({'data': symbol_trades, 'type': message_type})
+                    for symbol_trades in split_by_symbol(trades).values()]
+        return [encode({'data': trades, 'type': message_type})]
+    return encode_frame
+
+
+def measure(encode_frame, frames, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for frame in frames:
+            encode_frame(frame)
+    elapsed = time.perf_counter() - started
+    return len(frames) * repeat / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare JSON parser x Avro encoder combinations for FinnhubProducer.on_message",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('--count', type=int, default=2000, help="Synthetic frames")
+    parser.add_argument('--trades-per-frame', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--key-by-symbol', action='store_true', help="Split frames by symbol before encoding")
+    args = parser.parse_args()
+
+    frames = generate_frames(args.count, args.trades_per_frame)
+    print(f"Encoding {len(frames)} frames ({args.trades_per_frame} trades) x {args.repeat}, "
+          f"key_by_symbol={args.key_by_symbol}")
+
+    # 기존 on_message: json.loads + 메시지마다 DatumWriter/BytesIO/BinaryEncoder 생성
+    schema = load_avro_schema(SCHEMA_PATH)
+    legacy = frame_encoder(json.loads, lambda message: avro_encode(message, schema), args.key_by_symbol)
+    expected = [legacy(frame) for frame in frames]
+
+    combinations = {}
+    for parser_name in JSON_PARSERS:
+        try:
+            parse = load_json_parser(parser_name)
+        except ImportError:
+            print(f"{parser_name} is not installed, skipping")
+            continue
+        for mode in ENCODER_MODES:
+            encode_frame = frame_encoder(parse, TradeEncoder(SCHEMA_PATH, mode).encode, args.key_by_symbol)
+            # 모든 조합이 기존 방식과 같은 bytes를 내는지 먼저 확인
+            if [encode_frame(frame) for frame in frames] != expected:
+                raise AssertionError(f"{parser_name}+{mode} returned different bytes")
+            combinations[f"{parser_name}+{mode}"] = encode_frame
+
+    baseline = measure(legacy, frames, args.repeat)
+    print(f"{'legacy':>16}: {baseline:>10,.0f} frames/s  (x1.00)")
+    for name, encode_frame in combinations.items():
+        rate = measure(encode_frame, frames, args.repeat)
+        print(f"{name:>16}: {rate:>10,.0f} frames/s  (x{rate / baseline:.2f})")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,19 @@
 import os
 import ast
 import json
+import random
+import signal
+import threading
 import time
 import websocket
 from dotenv import load_dotenv
-from utils.functions import load_client, load_producer, ticker_validator, avro_encode, load_avro_schema
+from utils.encoder import TradeEncoder, load_json_parser
+from utils.frame_buffer import FrameBuffer
+from utils.functions import load_client, load_producer, ticker_validator, split_by_symbol
+from utils.metrics import (
+    DELIVERED_BYTES, DELIVERED_MESSAGES, DELIVERY_ERRORS, DELIVERY_SECONDS, RECONNECT_GAP_SECONDS, RECONNECTS,
+    WEBSOCKET_CONNECTED, start_metrics_server
+)
 
 
 class FinnhubProducer:
@@ -40,6 +49,36 @@ class FinnhubProducer:
         self.kafka_topic = os.getenv('KAFKA_TOPIC_NAME')
         self.validate_tickers = os.getenv('FINNHUB_VALIDATE_TICKERS') == '1'
 
+        # Producer tuning: linger/batch로 요청 수를 줄이고 배치 단위로 압축
+        self.linger_ms = int(os.getenv('KAFKA_LINGER_MS', 20))
+        self.batch_size = int(os.getenv('KAFKA_BATCH_SIZE', 65536))
+        compression_type = os.getenv('KAFKA_COMPRESSION_TYPE', 'lz4').lower()
+        self.compression_type = None if compression_type in ('', 'none') else compression_type
+        acks = os.getenv('KAFKA_ACKS', '1')
+        self.acks = acks if acks == 'all' else int(acks)
+        self.idempotent = os.getenv('KAFKA_IDEMPOTENT', '0') == '1'
+        # 1이면 frame을 symbol별 레코드로 나눠 symbol을 key로 전송 (같은 symbol은 같은 파티션, 순서 보장)
+        self.key_by_symbol = os.getenv('KAFKA_KEY_BY_SYMBOL', '0') == '1'
+        # Frame decoding/encoding: json 또는 orjson, avro (writer 재사용), fastavro, native (trades.avsc 전용)
+        self.json_parser = os.getenv('FINNHUB_JSON_PARSER', 'json')
+        self.trade_encoder = os.getenv('TRADE_ENCODER', 'avro')
+        # websocket 수신 스레드와 인코딩/전송 워커 사이의 frame 버퍼
+        self.frame_buffer_size = int(os.getenv('FRAME_BUFFER_SIZE', 10000))
+        self.frame_buffer_policy = os.getenv('FRAME_BUFFER_POLICY', 'block')  # block, drop_oldest, spill
+        self.frame_spill_path = os.getenv('FRAME_SPILL_PATH', '/tmp/finnhub-frames.spill')
+        self.frame_spill_max_bytes = int(os.getenv('FRAME_SPILL_MAX_BYTES', 256 * 1024 * 1024))
+        self.frame_batch_size = int(os.getenv('FRAME_BATCH_SIZE', 500))
+        # 워커가 2개 이상이면 frame 간 순서(같은 symbol 포함)가 보장되지 않음
+        self.encoder_workers = int(os.getenv('FRAME_ENCODER_WORKERS', 1))
+        # Websocket keepalive/재연결: ping_timeout 안에 pong이 없거나 idle_timeout 동안 frame이 없으면 끊고 재연결
+        self.ping_interval = int(os.getenv('WS_PING_INTERVAL', 20))
+        self.ping_timeout = int(os.getenv('WS_PING_TIMEOUT', 10))
+        self.idle_timeout = int(os.getenv('WS_IDLE_TIMEOUT', 60))  # 0이면 비활성화
+        self.reconnect_base_delay = float(os.getenv('WS_RECONNECT_BASE_DELAY', 1))
+        self.reconnect_max_delay = float(os.getenv('WS_RECONNECT_MAX_DELAY', 60))
+        self.stats_interval = int(os.getenv('PRODUCER_STATS_INTERVAL', 30))
+        self.metrics_port = int(os.getenv('METRICS_PORT', 8001))
+
         # Convert tickers string to list safely
         try:
             self.tickers = ast.literal_eval(os.getenv('FINNHUB_STOCKS_TICKERS'))
@@ -49,14 +88,65 @@ class FinnhubProducer:
             raise ValueError('Invalid format for FINNHUB_STOCKS_TICKERS. Must be a list.')
 
     def _initialize_services(self):
-        """Initializes Finnhub client, Kafka producer, and Avro schema."""
+        """Initializes Finnhub client, Kafka producer, frame buffer and encoder workers."""
         self.finnhub_client = load_client(self.api_token)
-        self.producer = load_producer(f'{self.kafka_server}:{self.kafka_port}')
-        self.avro_schema = load_avro_schema('src/schemas/trades.avsc')
+        # 재연결마다 다시 조회하지 않도록 시작할 때 한 번만 검증
+        self.subscribed_tickers = self._validated_tickers()
+        self.producer = load_producer(
+            f'{self.kafka_server}:{self.kafka_port}',
+            linger_ms=self.linger_ms,
+            batch_size=self.batch_size,
+            compression_type=self.compression_type,
+            acks=self.acks,
+            idempotent=self.idempotent
+        )
+        self.parse_json = load_json_parser(self.json_parser)
+        self.frame_buffer = FrameBuffer(
+            self.frame_buffer_size,
+            policy=self.frame_buffer_policy,
+            spill_path=self.frame_spill_path,
+            spill_max_bytes=self.frame_spill_max_bytes
+        )
+
+        # Delivery stats (sent는 워커들이 _stats_lock으로, delivered/failed는 producer I/O 스레드에서만 증가)
+        self.sent = 0
+        self.delivered = 0
+        self.failed = 0
+        self.last_stats_time = time.monotonic()
+        self.last_stats_sent = 0
+        self._stats_lock = threading.Lock()
+        start_metrics_server(self.producer, self.metrics_port, self.frame_buffer)
+
+        # 워커마다 TradeEncoder를 따로 둔다 (인코더 버퍼는 스레드 간 공유 불가)
+        self.workers = [
+            threading.Thread(
+                target=self._encode_worker,
+                args=(TradeEncoder('src/schemas/trades.avsc', self.trade_encoder),),
+                name=f'frame-encoder-{i}', daemon=True
+            )
+            for i in range(self.encoder_workers)
+        ]
+        for worker in self.workers:
+            worker.start()
 
+    def _validated_tickers(self):
+        """Returns the tickers to subscribe to, dropping unknown ones when FINNHUB_VALIDATE_TICKERS=1.
+
+        Returns:
+            list: The ticker symbols.
+        """
+        if not self.validate_tickers:
+            return list(self.tickers)
+        tickers = []
+        for ticker in self.tickers:
+            if ticker_validator(self.finnhub_client, ticker):
+                tickers.append(ticker)
+            else:
+                print(f'Subscription for {ticker} failed - ticker not found')
+        return tickers
 
     def _start_websocket(self):
-        """Starts the WebSocket connection to Finnhub."""
+        """Runs the WebSocket connection to Finnhub, reconnecting with jittered exponential backoff until stopped."""
         websocket.enableTrace(True)
         self.ws = websocket.WebSocketApp(
             f'wss://ws.finnhub.io?token={self.api_token}',
@@ -65,28 +155,170 @@ class FinnhubProducer:
             on_close=self.on_close
         )
         self.ws.on_open = self.on_open
-        self.ws.run_forever()
+
+        self.stopping = threading.Event()
+        self.connected = False
+        self.disconnected_at = None  # 끊긴 시각, 재연결 후 첫 frame에서 gap을 기록하고 None으로
+        self.last_message_time = time.monotonic()
+        self.reconnect_attempt = 0
+        # 컨테이너에서 PID 1로 실행되면 핸들러가 없는 SIGTERM은 무시되므로 직접 처리
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        if self.idle_timeout > 0:
+            threading.Thread(target=self._idle_watchdog, name='websocket-watchdog', daemon=True).start()
+
+        while not self.stopping.is_set():
+            self.ws.run_forever(ping_interval=self.ping_interval, ping_timeout=self.ping_timeout)
+            self.connected = False
+            WEBSOCKET_CONNECTED.set(0)
+            if self.disconnected_at is None:
+                self.disconnected_at = time.monotonic()
+            if self.stopping.is_set():
+                break
+
+            delay = self._reconnect_delay(self.reconnect_attempt)
+            self.reconnect_attempt += 1
+            RECONNECTS.inc()
+            print(f'Reconnecting to Finnhub in {delay:.1f}s (attempt {self.reconnect_attempt})')
+            self.stopping.wait(delay)
+
+        # 버퍼에 남은 frame을 워커가 모두 전송한 뒤 linger 중인 배치를 보내고 종료
+        self.frame_buffer.close()
+        for worker in self.workers:
+            worker.join()
+        self.producer.flush()
+
+    def _reconnect_delay(self, attempt):
+        """Full-jitter exponential backoff: uniform(0, min(max_delay, base_delay * 2^attempt)).
+
+        Args:
+            attempt (int): Consecutive failed attempts since the last received frame.
+
+        Returns:
+            float: Seconds to wait before reconnecting.
+        """
+        return random.uniform(0, min(self.reconnect_max_delay, self.reconnect_base_delay * 2 ** attempt))
+
+    def _idle_watchdog(self):
+        """Closes a connection that is open but has delivered no frame (trade or ping) for WS_IDLE_TIMEOUT seconds."""
+        while not self.stopping.wait(1.0):
+            if self.connected and time.monotonic() - self.last_message_time > self.idle_timeout:
+                print(f'No frames from Finnhub for {self.idle_timeout}s, closing the connection')
+                self.connected = False
+                self.ws.close()
+
+    def stop(self, signum=None, frame=None):
+        """Stops reconnecting and closes the connection (signal handler); buffered frames are still sent."""
+        if not self.stopping.is_set():
+            print(f'Finnhub producer stopping (signal {signum})...')
+        self.stopping.set()
+        self.ws.close()
 
     def on_message(self, ws, message):
-        """Processes incoming WebSocket messages and sends them directly to Kafka.
+        """Hands a websocket frame to the encoder workers without decoding it.
 
         Args:
             ws (WebSocketApp): The WebSocket instance.
             message (str): The received message in JSON format.
         """
-        try:
-            message_data = json.loads(message)
-            avro_message = avro_encode(
-                {
-                    'data': message_data.get('data', []),
-                    'type': message_data.get('type', '')
-                },
-                self.avro_schema
-            )
-            self.producer.send(self.kafka_topic, avro_message)
-            print(f"Processed message at {time.strftime('%H:%M:%S')}")
-        except Exception as e:
-            print(f'Error processing message: {e}')
+        self.last_message_time = time.monotonic()
+        if self.disconnected_at is not None:
+            gap = self.last_message_time - self.disconnected_at
+            self.disconnected_at = None
+            self.reconnect_attempt = 0
+            RECONNECT_GAP_SECONDS.observe(gap)
+            print(f'Receiving frames again after a {gap:.1f}s gap')
+        self.frame_buffer.put(message)
+
+    def _encode_worker(self, encoder):
+        """Drains the frame buffer in batches, encoding and sending each frame to Kafka.
+
+        Args:
+            encoder (TradeEncoder): This worker's encoder.
+        """
+        while True:
+            frames = self.frame_buffer.get_batch(self.frame_batch_size, timeout=1.0)
+            if frames is None:
+                return
+            sent = 0
+            for frame in frames:
+                try:
+                    sent += self._produce_frame(frame, encoder.encode)
+                except Exception as e:
+                    print(f'Error processing message: {e}')
+            with self._stats_lock:
+                self.sent += sent
+                self._maybe_report()
+
+    def _produce_frame(self, frame, encode):
+        """Decodes one frame and sends it as one record, or one keyed record per symbol.
+
+        Args:
+            frame (str or bytes): The raw websocket frame.
+            encode (callable): The TradeEncoder.encode of the calling worker.
+
+        Returns:
+            int: The number of records sent.
+        """
+        message_data = self.parse_json(frame)
+        trades = message_data.get('data', [])
+        message_type = message_data.get('type', '')
+        if self.key_by_symbol and trades:
+            by_symbol = split_by_symbol(trades)
+            for symbol, symbol_trades in by_symbol.items():
+                self._send(encode({'data': symbol_trades, 'type': message_type}), symbol.encode())
+            return len(by_symbol)
+        self._send(encode({'data': trades, 'type': message_type}))
+        return 1
+
+    def _send(self, value, key=None):
+        """Sends one record and attaches delivery callbacks.
+
+        Args:
+            value (bytes): The Avro-encoded message.
+            key (bytes): The partitioning key (symbol), or None for round-robin.
+        """
+        future = self.producer.send(self.kafka_topic, value, key=key)
+        future.add_callback(self._on_delivered, time.perf_counter())
+        future.add_errback(self._on_delivery_error, time.perf_counter())
+
+    def _on_delivered(self, started, record_metadata):
+        """Records a broker acknowledgement (runs on the producer I/O thread).
+
+        Args:
+            started (float): perf_counter() at send time.
+            record_metadata (RecordMetadata): The acknowledged record's metadata.
+        """
+        DELIVERY_SECONDS.observe(time.perf_counter() - started)
+        DELIVERED_MESSAGES.inc()
+        DELIVERED_BYTES.inc(record_metadata.serialized_value_size)
+        self.delivered += 1
+
+    def _on_delivery_error(self, started, error):
+        """Records a record that failed after retries (runs on the producer I/O thread).
+
+        Args:
+            started (float): perf_counter() at send time.
+            error (Exception): The delivery error.
+        """
+        DELIVERY_SECONDS.observe(time.perf_counter() - started)
+        DELIVERY_ERRORS.labels(type(error).__name__).inc()
+        self.failed += 1
+        print(f'Error delivering message to Kafka: {error}')
+
+    def _maybe_report(self):
+        """Prints send/delivery counts every PRODUCER_STATS_INTERVAL seconds (called with _stats_lock held)."""
+        now = time.monotonic()
+        if now - self.last_stats_time < self.stats_interval:
+            return
+        rate = (self.sent - self.last_stats_sent) / (now - self.last_stats_time)
+        self.last_stats_time = now
+        self.last_stats_sent = self.sent
+        buffer_stats = self.frame_buffer.stats()
+        print(f"Produced {rate:.1f} messages/s (total sent={self.sent}, "
+              f"delivered={self.delivered}, failed={self.failed}), "
+              f"frame buffer depth={buffer_stats['depth']} spilled={buffer_stats['spill_pending']} "
+              f"dropped={buffer_stats['dropped']}")
 
     def on_error(self, ws, error):
         """Handles WebSocket errors.
@@ -97,32 +329,32 @@ class FinnhubProducer:
         """
         print(f'WebSocket error: {error}')
 
-    def on_close(self, ws):
-        """Handles WebSocket closure.
+    def on_close(self, ws, close_status_code=None, close_msg=None):
+        """Handles WebSocket closure; _start_websocket reconnects unless the producer is stopping.
 
         Args:
             ws (WebSocketApp): The WebSocket instance.
+            close_status_code (int): The close frame status code, if any.
+            close_msg (str): The close frame reason, if any.
         """
-        print('### WebSocket closed ###')
+        self.connected = False
+        WEBSOCKET_CONNECTED.set(0)
+        if self.disconnected_at is None:
+            self.disconnected_at = time.monotonic()
+        print(f'### WebSocket closed ({close_status_code} {close_msg}) ###')
 
     def on_open(self, ws):
-        """Subscribes to stock tickers when WebSocket connection opens.
+        """Subscribes to all stock tickers in one burst when the WebSocket connection opens.
 
         Args:
             ws (WebSocketApp): The WebSocket instance.
         """
-        for ticker in self.tickers:
-            if self.validate_tickers:
-                if ticker_validator(self.finnhub_client, ticker):
-                    self.ws.send(json.dumps({'type': 'subscribe', 'symbol': ticker}))
-                    print(f'Subscription for {ticker} succeeded')
-                    time.sleep(0.5)
-                else:
-                    print(f'Subscription for {ticker} failed - ticker not found')
-            else:
-                self.ws.send(json.dumps({'type': 'subscribe', 'symbol': ticker}))
-                time.sleep(0.5)
-
+        for ticker in self.subscribed_tickers:
+            ws.send(json.dumps({'type': 'subscribe', 'symbol': ticker}))
+        self.last_message_time = time.monotonic()
+        self.connected = True
+        WEBSOCKET_CONNECTED.set(1)
+        print(f'Subscribed to {len(self.subscribed_tickers)} tickers')
 
 if __name__ == '__main__':
     FinnhubProducer()
\ No newline at end of file
@@ -0,0 +1,142 @@
+import io
+import json
+import struct
+
+import avro.io
+import avro.schema
+
+ENCODER_MODES = ('avro', 'fastavro', 'native')
+JSON_PARSERS = ('json', 'orjson')
+
+_pack_double = struct.Struct('<d').pack
+
+
+class TradeEncoder:
+    """Encodes Finnhub frames into trades.avsc messages, reusing per-schema state.
+
+    Modes:
+        avro     - avro library with one cached DatumWriter and a reused BytesIO buffer.
+        fastavro - fastavro.schemaless_writer (C extension) into a reused buffer.
+        native   - hand-rolled encoder for trades.avsc, byte-identical to the avro library.
+
+    An encoder owns its buffer, so use one instance per thread.
+    """
+
+    def __init__(self, schema_path, mode='avro'):
+        """Loads the schema and prepares the writer for the selected mode.
+
+        Args:
+            schema_path (str): The file path to trades.avsc.
+            mode (str): One of ENCODER_MODES.
+
+        Raises:
+            ValueError: If mode is not one of ENCODER_MODES.
+        """
+        if mode not in ENCODER_MODES:
+            raise ValueError(f'Invalid encoder mode: {mode}. Must be one of {ENCODER_MODES}')
+
+        with open(schema_path) as schema_file:
+            schema_json = schema_file.read()
+
+        self.mode = mode
+        self.schema = avro.schema.parse(schema_json)
+        self._buffer = io.BytesIO()
+
+        if mode == 'avro':
+            self._writer = avro.io.DatumWriter(self.schema)
+            self._encoder = avro.io.BinaryEncoder(self._buffer)
+            self.encode = self._encode_avro
+        elif mode == 'fastavro':
+            import fastavro
+            self._fastavro_writer = fastavro.schemaless_writer
+            self._parsed_schema = fastavro.parse_schema(json.loads(schema_json))
+            self.encode = self._encode_fastavro
+        else:
+            self.encode = encode_trades_message
+
+    def _encode_avro(self, message):
+        buffer = self._buffer
+        buffer.seek(0)
+        buffer.truncate()
+        self._writer.write(message, self._encoder)
+        return buffer.getvalue()
+
+    def _encode_fastavro(self, message):
+        buffer = self._buffer
+        buffer.seek(0)
+        buffer.truncate()
+        self._fastavro_writer(buffer, self._parsed_schema, message)
+        return buffer.getvalue()
+
+
+def load_json_parser(name='json'):
+    """Return the JSON parsing function for websocket frames.
+
+    Args:
+        name (str): 'json' (standard library) or 'orjson'.
+
+    Returns:
+        callable: A function that parses a str/bytes frame into Python objects.
+
+    Raises:
+        ValueError: If name is not one of JSON_PARSERS.
+    """
+    if name not in JSON_PARSERS:
+        raise ValueError(f'Invalid JSON parser: {name}. Must be one of {JSON_PARSERS}')
+    if name == 'orjson':
+        import orjson
+        return orjson.loads
+    return json.loads
+
+
+def _write_long(out, n):
+    """Append a zig-zag varint long."""
+    n = (n << 1) ^ (n >> 63)
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _write_string(out, value):
+    data = value.encode('utf-8')
+    _write_long(out, len(data))
+    out += data
+
+
+def encode_trades_message(message):
+    """Encode {'data': [...], 'type': str} as trades.avsc bytes without the avro library.
+
+    Args:
+        message (dict): The frame with 'data' (trade dicts with p, s, t, v and optional c) and 'type'.
+
+    Returns:
+        bytes: The encoded message, identical to avro.io.DatumWriter output.
+    """
+    out = bytearray()
+    trades = message['data']
+    if trades:
+        _write_long(out, len(trades))
+        for trade in trades:
+            # c: union [array<union[null, string]>, null] (키가 없으면 DatumWriter처럼 null)
+            conditions = trade.get('c')
+            if conditions is None:
+                out.append(2)  # branch 1 (null)
+            else:
+                out.append(0)  # branch 0 (array)
+                if conditions:
+                    _write_long(out, len(conditions))
+                    for condition in conditions:
+                        if condition is None:
+                            out.append(0)
+                        else:
+                            out.append(2)
+                            _write_string(out, condition)
+                out.append(0)
+            out += _pack_double(trade['p'])
+            _write_string(out, trade['s'])
+            _write_long(out, trade['t'])
+            out += _pack_double(trade['v'])
+    out.append(0)
+    _write_string(out, message['type'])
+    return bytes(out)
@@ -0,0 +1,165 @@
+import struct
+import threading
+from collections import deque
+
+FRAME_BUFFER_POLICIES = ('block', 'drop_oldest', 'spill')
+
+_length = struct.Struct('>I')
+
+
+class FrameBuffer:
+    """Bounded ring buffer of raw websocket frames between the receive thread and encoder workers.
+
+    When the buffer is full, ``policy`` decides what happens to a new frame:
+        block       - the websocket thread waits for space (no loss, Finnhub buffers upstream).
+        drop_oldest - the oldest buffered frame is discarded to make room.
+        spill       - the frame is appended to a spill file on disk and read back in order
+                      once the workers catch up; beyond spill_max_bytes new frames are dropped.
+
+    Frames keep their arrival order across memory and the spill file.
+    """
+
+    def __init__(self, capacity, policy='block', spill_path=None, spill_max_bytes=256 * 1024 * 1024):
+        """Creates an empty buffer.
+
+        Args:
+            capacity (int): Maximum frames held in memory.
+            policy (str): One of FRAME_BUFFER_POLICIES.
+            spill_path (str): Spill file path, required for the 'spill' policy.
+            spill_max_bytes (int): Maximum size of the spill file.
+
+        Raises:
+            ValueError: If policy is unknown or 'spill' is used without spill_path.
+        """
+        if policy not in FRAME_BUFFER_POLICIES:
+            raise ValueError(f'Invalid frame buffer policy: {policy}. Must be one of {FRAME_BUFFER_POLICIES}')
+        if policy == 'spill' and not spill_path:
+            raise ValueError('FRAME_SPILL_PATH is required for the spill policy')
+
+        self.capacity = capacity
+        self.policy = policy
+        self.spill_path = spill_path
+        self.spill_max_bytes = spill_max_bytes
+
+        self._frames = deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._closed = False
+
+        self._spill_file = None
+        self._spill_read_pos = 0
+        self._spill_size = 0
+        self._spill_pending = 0
+
+        self.enqueued = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.blocked = 0
+
+    def put(self, frame):
+        """Adds a frame (called from the websocket receive thread).
+
+        Args:
+            frame (str or bytes): The raw websocket frame.
+        """
+        with self._lock:
+            if self._closed:
+                self.dropped += 1
+                return
+
+            # 이미 디스크에 넘친 frame이 있으면 순서를 지키기 위해 새 frame도 디스크 뒤에 붙인다
+            if self._spill_pending or len(self._frames) >= self.capacity:
+                if self.policy == 'spill':
+                    self._spill(frame)
+                    self._not_empty.notify()
+                    return
+                if self.policy == 'drop_oldest':
+                    self._frames.popleft()
+                    self.dropped += 1
+                else:
+                    self.blocked += 1
+                    while len(self._frames) >= self.capacity and not self._closed:
+                        self._not_full.wait()
+
+            self._frames.append(frame)
+            self.enqueued += 1
+            self._not_empty.notify()
+
+    def get_batch(self, max_items, timeout=None):
+        """Takes up to max_items frames in arrival order (called from encoder workers).
+
+        Args:
+            max_items (int): Maximum frames to return.
+            timeout (float): Seconds to wait for the first frame.
+
+        Returns:
+            list: The frames, empty on timeout, or None once the buffer is closed and drained.
+        """
+        with self._lock:
+            if not self._frames and not self._spill_pending:
+                if self._closed:
+                    return None
+                self._not_empty.wait(timeout)
+                if not self._frames and not self._spill_pending:
+                    return None if self._closed else []
+
+            if self._frames:
+                count = min(max_items, len(self._frames))
+                frames = [self._frames.popleft() for _ in range(count)]
+                self._not_full.notify(count)
+                return frames
+            return self._read_spill(max_items)
+
+    def close(self):
+        """Stops accepting frames and wakes waiting threads; workers drain what is left."""
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'depth': len(self._frames),
+                'spill_pending': self._spill_pending,
+                'spill_bytes': self._spill_size - self._spill_read_pos,
+                'enqueued': self.enqueued,
+                'dropped': self.dropped,
+                'spilled': self.spilled,
+                'blocked': self.blocked,
+            }
+
+    def _spill(self, frame):
+        data = frame.encode('utf-8') if isinstance(frame, str) else frame
+        if self._spill_size + _length.size + len(data) > self.spill_max_bytes:
+            self.dropped += 1
+            return
+        if self._spill_file is None:
+            self._spill_file = open(self.spill_path, 'w+b')
+        self._spill_file.seek(self._spill_size)
+        self._spill_file.write(_length.pack(len(data)))
+        self._spill_file.write(data)
+        self._spill_size += _length.size + len(data)
+        self._spill_pending += 1
+        self.spilled += 1
+        self.enqueued += 1
+
+    def _read_spill(self, max_items):
+        spill_file = self._spill_file
+        spill_file.flush()
+        spill_file.seek(self._spill_read_pos)
+        frames = []
+        while self._spill_pending and len(frames) < max_items:
+            length, = _length.unpack(spill_file.read(_length.size))
+            frames.append(spill_file.read(length))
+            self._spill_pending -= 1
+        self._spill_read_pos = spill_file.tell()
+
+        # 모두 읽었으면 파일을 비워 디스크 사용량을 되돌린다
+        if not self._spill_pending:
+            spill_file.truncate(0)
+            self._spill_read_pos = 0
+            self._spill_size = 0
+        return frames
+
@@ -47,16 +47,34 @@ def ticker_validator(finnhub_client, ticker):
     return False
 
 
-def load_producer(kafka_server):
+def load_producer(kafka_server, linger_ms=0, batch_size=16384, compression_type=None, acks=1,
+                  idempotent=False):
     """Set up and return a Kafka producer connected to the specified server.
 
+    kafka-python 2.0.2 has no idempotent producer, so ``idempotent`` approximates it with
+    acks='all', unlimited retries and a single in-flight request per connection:
+    retries can still duplicate a record but never reorder records within a partition.
+
     Args:
         kafka_server (str): The Kafka server address.
+        linger_ms (int): How long to wait for more records before sending a batch.
+        batch_size (int): Maximum bytes per partition batch.
+        compression_type (str): 'gzip', 'snappy', 'lz4', 'zstd' or None.
+        acks (int or str): 0, 1 or 'all'.
+        idempotent (bool): Whether to enable ordered, lossless retries.
 
     Returns:
         KafkaProducer: The initialized Kafka producer.
     """
-    return KafkaProducer(bootstrap_servers=kafka_server)
+    settings = {
+        'linger_ms': linger_ms,
+        'batch_size': batch_size,
+        'compression_type': compression_type,
+        'acks': acks,
+    }
+    if idempotent:
+        settings.update(acks='all', retries=2147483647, max_in_flight_requests_per_connection=1)
+    return KafkaProducer(bootstrap_servers=kafka_server, **settings)
 
 
 def load_avro_schema(schema_path):
@@ -72,6 +90,21 @@ def load_avro_schema(schema_path):
         return avro.schema.parse(schema_file.read())
 
 
+def split_by_symbol(trades):
+    """Group a frame's trades by symbol, keeping their order within each symbol.
+
+    Args:
+        trades (list): Trade dicts from a Finnhub 'trade' frame.
+
+    Returns:
+        dict: Symbol to the list of its trades, in first-seen symbol order.
+    """
+    by_symbol = {}
+    for trade in trades:
+        by_symbol.setdefault(trade['s'], []).append(trade)
+    return by_symbol
+
+
 def avro_encode(data, schema):
     """Encode data into Avro format.
 
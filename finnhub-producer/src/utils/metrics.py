@@ -0,0 +1,84 @@
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram, start_http_server
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+DELIVERY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+DELIVERED_MESSAGES = Counter('finnhub_delivered_messages_total', 'Kafka records acknowledged by the broker')
+DELIVERED_BYTES = Counter('finnhub_delivered_bytes_total', 'Serialized value bytes acknowledged by the broker')
+DELIVERY_ERRORS = Counter('finnhub_delivery_errors_total', 'Kafka records that failed after retries', ['error'])
+DELIVERY_SECONDS = Histogram(
+    'finnhub_delivery_seconds', 'Time from producer.send() to broker acknowledgement (includes linger)',
+    buckets=DELIVERY_BUCKETS
+)
+WEBSOCKET_CONNECTED = Gauge('finnhub_websocket_connected', '1 while the Finnhub websocket is open')
+RECONNECTS = Counter('finnhub_websocket_reconnects_total', 'Finnhub websocket reconnect attempts')
+RECONNECT_GAP_SECONDS = Histogram(
+    'finnhub_websocket_gap_seconds', 'Time from a websocket disconnect to the first frame after reconnecting',
+    buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+)
+
+# kafka-python이 내부적으로 집계하는 producer-metrics 중 배치/압축 효과를 보여주는 값
+PRODUCER_METRICS = (
+    ('request-rate', 'Produce requests sent to brokers per second'),
+    ('outgoing-byte-rate', 'Bytes sent to brokers per second'),
+    ('record-send-rate', 'Records sent per second'),
+    ('records-per-request-avg', 'Average number of records per produce request'),
+    ('batch-size-avg', 'Average record batch size in bytes'),
+    ('compression-rate-avg', 'Average compressed/uncompressed size ratio of record batches'),
+    ('record-queue-time-avg', 'Average time in ms record batches spent in the accumulator'),
+    ('request-latency-avg', 'Average produce request latency in ms'),
+    ('record-error-rate', 'Records per second that failed to send'),
+)
+
+
+class ProducerMetricsCollector:
+    """Exports kafka-python's internal producer metrics and the frame buffer state at scrape time."""
+
+    def __init__(self, producer, frame_buffer=None):
+        self.producer = producer
+        self.frame_buffer = frame_buffer
+
+    def collect(self):
+        values = self.producer.metrics().get('producer-metrics', {})
+        for name, documentation in PRODUCER_METRICS:
+            if name not in values:
+                continue
+            gauge = GaugeMetricFamily(f"finnhub_kafka_{name.replace('-', '_')}", documentation)
+            gauge.add_metric([], values[name])
+            yield gauge
+
+        if self.frame_buffer is None:
+            return
+        stats = self.frame_buffer.stats()
+        for name, key, documentation in (
+            ('finnhub_frame_buffer_depth', 'depth', 'Websocket frames waiting in memory for encoder workers'),
+            ('finnhub_frame_buffer_spill_pending', 'spill_pending', 'Frames waiting in the spill file'),
+            ('finnhub_frame_buffer_spill_bytes', 'spill_bytes', 'Unread bytes in the spill file'),
+        ):
+            gauge = GaugeMetricFamily(name, documentation)
+            gauge.add_metric([], stats[key])
+            yield gauge
+        for name, key, documentation in (
+            ('finnhub_frame_buffer_enqueued', 'enqueued', 'Websocket frames accepted by the frame buffer'),
+            ('finnhub_frame_buffer_dropped', 'dropped', 'Websocket frames dropped because the buffer was full'),
+            ('finnhub_frame_buffer_spilled', 'spilled', 'Websocket frames written to the spill file'),
+            ('finnhub_frame_buffer_blocked', 'blocked', 'Frames for which the websocket thread waited for space'),
+        ):
+            counter = CounterMetricFamily(name, documentation)
+            counter.add_metric([], stats[key])
+            yield counter
+
+
+def start_metrics_server(producer, port, frame_buffer=None):
+    """Starts the Prometheus /metrics endpoint.
+
+    Args:
+        producer (KafkaProducer): The producer whose internal metrics are exported.
+        port (int): The HTTP port, 0 disables the endpoint.
+        frame_buffer (FrameBuffer): The websocket frame buffer to export, if any.
+    """
+    if not port:
+        return
+    REGISTRY.register(ProducerMetricsCollector(producer, frame_buffer))
+    start_http_server(port)
+    print(f'Prometheus metrics listening on :{port}')
@@ -0,0 +1,38 @@
+import io
+import os
+import sys
+
+import avro.io
+import avro.schema
+import pytest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.append(SRC_DIR)
+
+from utils.encoder import encode_trades_message  # noqa: E402
+
+SCHEMA_PATH = os.path.join(SRC_DIR, 'schemas', 'trades.avsc')
+
+
+def datum_writer_encode(message):
+    with open(SCHEMA_PATH) as schema_file:
+        schema = avro.schema.parse(schema_file.read())
+    buffer = io.BytesIO()
+    avro.io.DatumWriter(schema).write(message, avro.io.BinaryEncoder(buffer))
+    return buffer.getvalue()
+
+
+def trade(**conditions):
+    return {'p': 187.25, 's': 'AAPL', 't': 1700000000123, 'v': 100.0, **conditions}
+
+
+@pytest.mark.parametrize('message', [
+    {'data': [trade()], 'type': 'trade'},                        # c 없음
+    {'data': [trade(c=None)], 'type': 'trade'},                  # c null
+    {'data': [trade(c=[])], 'type': 'trade'},                    # c 빈 배열
+    {'data': [trade(c=['1', None, '12'])], 'type': 'trade'},     # c 안의 null
+    {'data': [], 'type': 'ping'},                                # data 없음
+    {'data': [trade(c=['1']), trade(), trade(c=None)], 'type': 'trade'},
+], ids=['c-missing', 'c-null', 'c-empty', 'c-null-entries', 'empty-data', 'mixed'])
+def test_native_encoder_matches_datum_writer(message):
+    assert encode_trades_message(message) == datum_writer_encode(message)
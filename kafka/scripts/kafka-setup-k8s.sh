@@ -1,6 +1,14 @@
 # blocks until kafka is reachable
 kafka-topics --bootstrap-server localhost:29092 --list
 echo -e 'Creating kafka topics'
-kafka-topics --bootstrap-server localhost:29092 --create --if-not-exists --topic market --replication-factor 1 --partitions 1
+# market 파티션 수: finnhub-producer가 symbol을 key로 보내면 symbol별 순서를 유지한 채 파티션 수만큼 소비를 나눌 수 있다
+MARKET_PARTITIONS=${KAFKA_MARKET_PARTITIONS:-1}
+kafka-topics --bootstrap-server localhost:29092 --create --if-not-exists --topic market --replication-factor 1 --partitions $MARKET_PARTITIONS
+# 이미 있는 topic은 늘리기만 가능 (늘리면 기존 key의 파티션 매핑이 바뀌므로 배포 시점에만 변경)
+CURRENT_PARTITIONS=$(kafka-topics --bootstrap-server localhost:29092 --describe --topic market | grep -c 'Partition: ')
+if [ "$CURRENT_PARTITIONS" -lt "$MARKET_PARTITIONS" ]; then
+  echo -e "Increasing market partitions from $CURRENT_PARTITIONS to $MARKET_PARTITIONS"
+  kafka-topics --bootstrap-server localhost:29092 --alter --topic market --partitions $MARKET_PARTITIONS
+fi
 echo -e 'Successfully created the following topics:'
-kafka-topics --bootstrap-server localhost:29092 --list8
\ No newline at end of file
+kafka-topics --bootstrap-server localhost:29092 --list
\ No newline at end of file
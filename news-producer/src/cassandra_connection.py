@@ -0,0 +1,44 @@
+import os
+
+from cassandra.auth import PlainTextAuthProvider
+from cassandra.cluster import EXEC_PROFILE_DEFAULT, Cluster, ExecutionProfile
+from cassandra.policies import ConstantSpeculativeExecutionPolicy, DCAwareRoundRobinPolicy, TokenAwarePolicy
+
+
+def create_cluster(hosts: str, username: str, password: str) -> Cluster:
+    """Creates a Cassandra cluster with token-aware routing and pinned protocol settings.
+
+    Mirrors stream-processor-light/src/cassandra_connection.py and reads the same
+    environment variables (CASSANDRA_LOCAL_DC, CASSANDRA_PROTOCOL_VERSION, CASSANDRA_COMPRESSION,
+    CASSANDRA_REQUEST_TIMEOUT, CASSANDRA_SPECULATIVE_DELAY_MS, CASSANDRA_SPECULATIVE_MAX_ATTEMPTS).
+
+    Args:
+        hosts (str): Comma-separated contact points.
+        username (str): Cassandra username.
+        password (str): Cassandra password.
+
+    Returns:
+        Cluster: The configured (not yet connected) cluster.
+    """
+    speculative_delay_ms = int(os.getenv('CASSANDRA_SPECULATIVE_DELAY_MS', 0))
+    speculative_policy = None
+    if speculative_delay_ms > 0:
+        speculative_policy = ConstantSpeculativeExecutionPolicy(
+            speculative_delay_ms / 1000, int(os.getenv('CASSANDRA_SPECULATIVE_MAX_ATTEMPTS', 2))
+        )
+    profile = ExecutionProfile(
+        load_balancing_policy=TokenAwarePolicy(
+            DCAwareRoundRobinPolicy(local_dc=os.getenv('CASSANDRA_LOCAL_DC', ''))
+        ),
+        speculative_execution_policy=speculative_policy,
+        request_timeout=float(os.getenv('CASSANDRA_REQUEST_TIMEOUT', 10))
+    )
+
+    compression = os.getenv('CASSANDRA_COMPRESSION', 'lz4').lower()
+    return Cluster(
+        [host.strip() for host in hosts.split(',') if host.strip()],
+        auth_provider=PlainTextAuthProvider(username=username, password=password),
+        execution_profiles={EXEC_PROFILE_DEFAULT: profile},
+        protocol_version=int(os.getenv('CASSANDRA_PROTOCOL_VERSION', 4)),
+        compression=False if compression in ('', 'none') else compression
+    )
@@ -6,8 +6,8 @@ import uuid
 import websocket
 from datetime import datetime
 from dotenv import load_dotenv
-from cassandra.cluster import Cluster
-from cassandra.auth import PlainTextAuthProvider
+
+from cassandra_connection import create_cluster
 
 
 class NewsProducer:
@@ -53,14 +53,11 @@ class NewsProducer:
 
     def _initialize_services(self):
         """Initializes Cassandra connection and prepares statements."""
-        # Initialize Cassandra connection
-        auth_provider = PlainTextAuthProvider(
-            username=self.cassandra_username,
-            password=self.cassandra_password
-        )
-        self.cluster = Cluster(
-            [self.cassandra_host],
-            auth_provider=auth_provider
+        # Initialize Cassandra connection (token-aware routing, see cassandra_connection.py)
+        self.cluster = create_cluster(
+            self.cassandra_host,
+            self.cassandra_username,
+            self.cassandra_password
         )
         self.session = self.cluster.connect('market')
         
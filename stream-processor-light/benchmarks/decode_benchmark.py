@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""TradeDecoder 모드별 디코딩 처리량(messages/sec) 비교
+
+    python decode_benchmark.py                          # 합성 페이로드
+    python decode_benchmark.py --payloads market.payloads  # 녹화된 페이로드
+"""
+
+import argparse
+import io
+import time
+
+from avro.io import DatumReader, BinaryDecoder
+
+from payloads import SCHEMA_PATH, generate_payloads, load_payloads
+from decoder import DECODER_MODES, TradeDecoder
+
+
+def decode_legacy(schema, payload):
+    """기존 StreamProcessor.run 방식: 메시지마다 DatumReader와 BytesIO 생성"""
+    reader = DatumReader(schema)
+    return reader.read(BinaryDecoder(io.BytesIO(payload)))
+
+
+def measure(decode, payloads, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for payload in payloads:
+            decode(payload)
+    elapsed = time.perf_counter() - started
+    return len(payloads) * repeat / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare TradeDecoder modes on trades.avsc payloads",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('--payloads', help="Recorded payload file (see payloads.py)")
+    parser.add_argument('--count', type=int, default=2000, help="Synthetic messages when --payloads is omitted")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    payloads = load_payloads(args.payloads) if args.payloads else generate_payloads(args.count)
+    print(f"Decoding {len(payloads)} messages x {args.repeat}")
+
+    decoders = {mode: TradeDecoder(SCHEMA_PATH, mode) for mode in DECODER_MODES}
+
+    # 모든 모드가 같은 결과를 내는지 먼저 확인
+    expected = [decoders['avro'].decode(payload) for payload in payloads]
+    for mode, decoder in decoders.items():
+        if [decoder.decode(payload) for payload in payloads] != expected:
+            raise AssertionError(f"Decoder mode {mode} returned different results")
+
+    schema = decoders['avro'].schema
+    baseline = measure(lambda payload: decode_legacy(schema, payload), payloads, args.repeat)
+    print(f"{'legacy':>10}: {baseline:>12,.0f} msg/s  (x1.00)")
+
+    for mode, decoder in decoders.items():
+        rate = measure(decoder.decode, payloads, args.repeat)
+        print(f"{mode:>10}: {rate:>12,.0f} msg/s  (x{rate / baseline:.2f})")
+
+
+if __name__ == '__main__':
+    main()
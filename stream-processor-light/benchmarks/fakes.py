@@ -0,0 +1,508 @@
+"""벤치마크용 in-process fake (Kafka consumer, Cassandra session, Redis client)
+
+StreamProcessor가 실제로 호출하는 메서드만 구현한다. (ENGINE=asyncio용 aiokafka/redis.asyncio 대역 포함) Cassandra fake는 실제
+PreparedStatement/BoundStatement를 만들어 값 직렬화 비용까지 포함되도록 한다.
+"""
+
+import re
+import threading
+import time
+from collections import defaultdict, deque, namedtuple
+from itertools import zip_longest
+from typing import Dict, List
+
+from cassandra import cqltypes
+from cassandra.query import PreparedStatement
+from kafka import TopicPartition
+
+# payloads.py가 src를 sys.path에 추가한 뒤 import됨
+from aggregates import APPLY_DAILY_AGGREGATES
+
+
+class ReplayFinished(Exception):
+    """FakeConsumer가 준비된 메시지를 모두 전달한 뒤 다음 요청에서 발생"""
+
+
+# cassandra-setup.cql 기준 컬럼 타입 (fake prepare용)
+COLUMN_TYPES = {
+    'uuid': cqltypes.UUIDType,
+    'symbol': cqltypes.UTF8Type,
+    'trade_conditions': cqltypes.UTF8Type,
+    'price': cqltypes.DoubleType,
+    'volume': cqltypes.DoubleType,
+    'trade_timestamp': cqltypes.DateType,
+    'ingest_timestamp': cqltypes.DateType,
+    'price_volume_multiply': cqltypes.DoubleType,
+    'trade_date': cqltypes.SimpleDateType,
+    'total_volume': cqltypes.DoubleType,
+    'total_amount': cqltypes.DoubleType,
+    'trade_count': cqltypes.LongType,
+    'first_trade_time': cqltypes.DateType,
+    'last_trade_time': cqltypes.DateType,
+    'created_at': cqltypes.DateType,
+    'updated_at': cqltypes.DateType,
+    'resolution': cqltypes.UTF8Type,
+    'bar_date': cqltypes.SimpleDateType,
+    'bar_start': cqltypes.DateType,
+    'open': cqltypes.DoubleType,
+    'high': cqltypes.DoubleType,
+    'low': cqltypes.DoubleType,
+    'close': cqltypes.DoubleType,
+    'vwap': cqltypes.DoubleType,
+}
+
+ColumnSpec = namedtuple('ColumnSpec', ['keyspace_name', 'table_name', 'name', 'type'])
+INSERT_PATTERN = re.compile(r'INSERT\s+INTO\s+(\w+)\s*\(([^)]*)\)', re.IGNORECASE)
+
+
+class FakeResponseFuture:
+    __slots__ = ('session',)
+
+    # execute_concurrent_with_args가 결과를 ResultSet으로 감쌀 때 읽는 속성
+    _col_names = None
+    _col_types = None
+    has_more_pages = False
+
+    def __init__(self, session):
+        self.session = session
+
+    def add_callbacks(self, callback, errback, callback_args=(), errback_args=()):
+        self.session.complete(callback, callback_args)
+
+    def clear_callbacks(self):
+        pass
+
+
+class FakeSession:
+    """execute_async를 즉시(latency=0) 또는 latency초 뒤 별도 스레드에서 완료시키는 세션"""
+
+    def __init__(self, keyspace: str = 'market', latency: float = 0.0):
+        self.keyspace = keyspace
+        self.latency = latency
+        self.requests = 0
+        self.rows = 0
+        self._pending = deque()
+        self._ready = threading.Condition()
+        if latency > 0:
+            threading.Thread(target=self._complete_loop, daemon=True).start()
+
+    def prepare(self, query: str) -> PreparedStatement:
+        match = INSERT_PATTERN.search(query)
+        if not match:
+            raise ValueError(f"FakeSession can only prepare INSERT statements: {query}")
+        table = match.group(1)
+        columns = [
+            ColumnSpec(self.keyspace, table, name.strip(), COLUMN_TYPES[name.strip()])
+            for name in match.group(2).split(',')
+        ]
+        return PreparedStatement(columns, table.encode(), None, query, self.keyspace, 4, None, None)
+
+    def execute_async(self, request, *args, **kwargs):
+        # execute_concurrent_with_args는 parameters/timeout/execution_profile 등을 함께 넘김
+        self.requests += 1
+        statements = getattr(request, '_statements_and_parameters', None)
+        self.rows += len(statements) if statements is not None else 1
+        return FakeResponseFuture(self)
+
+    def execute(self, request, *args, **kwargs):
+        self.requests += 1
+        self.rows += 1
+        return []
+
+    def complete(self, callback, callback_args):
+        if self.latency <= 0:
+            callback(None, *callback_args)
+            return
+        with self._ready:
+            self._pending.append((time.perf_counter() + self.latency, callback, callback_args))
+            self._ready.notify()
+
+    def _complete_loop(self):
+        # 지연시간이 일정하므로 도착 순서 = 완료 순서
+        while True:
+            with self._ready:
+                while not self._pending:
+                    self._ready.wait()
+                deadline, callback, callback_args = self._pending.popleft()
+            delay = deadline - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            callback(None, *callback_args)
+
+
+class FakeCluster:
+    def __init__(self, session: FakeSession):
+        self.session = session
+
+    def connect(self, keyspace=None) -> FakeSession:
+        return self.session
+
+    def shutdown(self):
+        pass
+
+
+class FakePipeline:
+    """명령을 모아 두었다가 execute()에서 FakeRedis에 순서대로 적용"""
+
+    def __init__(self, client, transaction: bool = True):
+        self.client = client
+        self.transaction = transaction
+        self.commands = []
+
+    def __getattr__(self, name):
+        method = getattr(self.client, name)
+
+        def queue(*args, **kwargs):
+            self.commands.append((method, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        commands, self.commands = self.commands, []
+        with self.client.lock:
+            self.client.round_trips += 1
+            return [method(*args, **kwargs) for method, args, kwargs in commands]
+
+
+class FakeScript:
+    """register_script() 대역: Lua 대신 quotes.py 스크립트의 해시 갱신/PUBLISH만 흉내 냄"""
+
+    def __init__(self, client, script: str = ''):
+        self.client = client
+        self.script = script
+
+    def __call__(self, keys=(), args=(), client=None):
+        target = client if client is not None else self.client
+        price, volume, timestamp = args[:3]
+        target.hset(keys[0], mapping={'price': price, 'volume': volume, 'ts': timestamp})
+        return target.publish(args[5], price)
+
+
+class FakeAggregateScript(FakeScript):
+    """APPLY_DAILY_AGGREGATES 대역: 같은 규칙(키별 파티션 offset 이하 델타는 건너뜀)을 Python으로 적용"""
+
+    def __call__(self, keys=(), args=(), client=None):
+        redis_client = self.client
+        with redis_client.lock:
+            redis_client.commands += 1
+            redis_client.round_trips += 1
+            applied = skipped = 0
+            touched = {}
+            partition_offsets = {}
+            for i in range(1, len(args), 8):
+                key = keys[args[i] - 1]
+                partition, offset, volume, amount, count, first, last = args[i + 1:i + 8]
+                values = redis_client.hashes[key]
+                field = f"offset:{partition}"
+                if 0 <= offset <= int(values.get(field, -1)):
+                    skipped += count
+                    continue
+                values['total_volume'] = repr(float(values.get('total_volume', 0)) + float(volume))
+                values['total_amount'] = repr(float(values.get('total_amount', 0)) + float(amount))
+                values['trade_count'] = str(int(values.get('trade_count', 0)) + count)
+                applied += count
+                first_time, last_time = touched.get(key, (first, last))
+                touched[key] = (min(first, first_time), max(last, last_time))
+                if offset >= 0:
+                    values[field] = str(offset)
+                    partition_offsets[partition] = max(offset, partition_offsets.get(partition, -1))
+
+            for key, (first, last) in touched.items():
+                redis_client.hashes[key].setdefault('first_trade_time', first)
+                redis_client.hashes[key]['last_trade_time'] = last
+                redis_client.sets[keys[0]].add(key)
+            watermarks = redis_client.hashes[keys[1]]
+            for partition, offset in partition_offsets.items():
+                if offset > int(watermarks.get(str(partition), -1)):
+                    watermarks[str(partition)] = str(offset)
+            return [applied, skipped, len(touched)]
+
+
+class FakeRedis:
+    """StreamProcessor가 사용하는 hash/set/string/stream 명령만 구현한 in-memory Redis"""
+
+    def __init__(self):
+        self.hashes: Dict[str, Dict[str, str]] = defaultdict(dict)
+        self.sets: Dict[str, set] = defaultdict(set)
+        self.strings: Dict[str, str] = {}
+        self.streams: Dict[str, deque] = defaultdict(deque)
+        self.lock = threading.RLock()
+        self.commands = 0
+        self.round_trips = 0
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self, transaction)
+
+    def hincrbyfloat(self, key, field, amount):
+        self.commands += 1
+        value = float(self.hashes[key].get(field, 0)) + float(amount)
+        self.hashes[key][field] = repr(value)
+        return value
+
+    def hincrby(self, key, field, amount):
+        self.commands += 1
+        value = int(self.hashes[key].get(field, 0)) + int(amount)
+        self.hashes[key][field] = str(value)
+        return value
+
+    def hsetnx(self, key, field, value):
+        self.commands += 1
+        if field in self.hashes[key]:
+            return 0
+        self.hashes[key][field] = str(value)
+        return 1
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        self.commands += 1
+        items = dict(mapping or {})
+        if field is not None:
+            items[field] = value
+        added = len(set(items) - set(self.hashes[key]))
+        self.hashes[key].update({str(k): str(v) for k, v in items.items()})
+        return added
+
+    def hgetall(self, key):
+        self.commands += 1
+        return dict(self.hashes.get(key, {}))
+
+    def hmget(self, key, fields: List):
+        self.commands += 1
+        values = self.hashes.get(key, {})
+        return [values.get(str(field)) for field in fields]
+
+    def expire(self, key, seconds):
+        self.commands += 1
+        return 1
+
+    def sadd(self, key, *members):
+        self.commands += 1
+        before = len(self.sets[key])
+        self.sets[key].update(members)
+        return len(self.sets[key]) - before
+
+    def sunionstore(self, destination, keys):
+        self.commands += 1
+        members = set().union(*(self.sets.get(key, set()) for key in keys))
+        self.sets.pop(destination, None)
+        if members:
+            self.sets[destination] = members
+        return len(members)
+
+    def sscan_iter(self, key, count=None):
+        self.commands += 1
+        return iter(list(self.sets.get(key, ())))
+
+    def get(self, key):
+        self.commands += 1
+        return self.strings.get(key)
+
+    def set(self, key, value, ex=None):
+        self.commands += 1
+        self.strings[key] = value
+        return True
+
+    def xadd(self, key, fields, id='*', maxlen=None, approximate=True, minid=None):
+        self.commands += 1
+        entries = self.streams[key]
+        entry_id = f"{int(time.time() * 1000)}-{len(entries)}"
+        entries.append((entry_id, dict(fields)))
+        if maxlen is not None:
+            while len(entries) > maxlen:
+                entries.popleft()
+        return entry_id
+
+    def xtrim(self, key, maxlen=None, approximate=True, minid=None, limit=None):
+        self.commands += 1
+        entries = self.streams[key]
+        removed = 0
+        while minid is not None and entries and int(entries[0][0].split('-')[0]) < minid:
+            entries.popleft()
+            removed += 1
+        return removed
+
+    def register_script(self, script) -> FakeScript:
+        if script == APPLY_DAILY_AGGREGATES:
+            return FakeAggregateScript(self, script)
+        return FakeScript(self, script)
+
+    def publish(self, channel, message):
+        self.commands += 1
+        return 0
+
+    def delete(self, *keys):
+        self.commands += 1
+        removed = 0
+        for key in keys:
+            for store in (self.hashes, self.sets, self.strings, self.streams):
+                if key in store:
+                    del store[key]
+                    removed += 1
+        return removed
+
+    def close(self):
+        pass
+
+
+class FakeAsyncPipeline(FakePipeline):
+    async def execute(self):
+        return super().execute()
+
+
+class FakeAsyncScript:
+    def __init__(self, script: FakeScript):
+        self.sync_script = script
+        self.script = script.script
+
+    async def __call__(self, keys=(), args=(), client=None):
+        return self.sync_script(keys, args, client)
+
+
+class FakeAsyncRedis:
+    """redis.asyncio.Redis 대역: 같은 FakeRedis 저장소에 명령을 적용 (명령/왕복 횟수도 그쪽에 집계)"""
+
+    def __init__(self, client: FakeRedis):
+        self.client = client
+
+    def pipeline(self, transaction: bool = True) -> FakeAsyncPipeline:
+        return FakeAsyncPipeline(self.client, transaction)
+
+    def register_script(self, script) -> FakeAsyncScript:
+        return FakeAsyncScript(self.client.register_script(script))
+
+    async def aclose(self):
+        pass
+
+
+Message = namedtuple('Message', ['topic', 'partition', 'offset', 'value'])
+
+
+class FakeConsumer:
+    """녹화/생성된 페이로드를 파티션에 라운드로빈으로 나눠 전달하는 KafkaConsumer 대역
+
+    메시지를 넘겨준 시각부터 소비 루프가 다음 메시지(또는 다음 poll)를 요청할 때까지를
+    그 메시지의 처리 지연시간으로 기록한다. seek()은 파티션의 재생 위치를 되돌려 rewind 후 재처리를 재현한다.
+    """
+
+    def __init__(self, payloads: List[bytes], topic: str = 'market', partitions: int = 1):
+        self.topic = topic
+        self.partitions = [TopicPartition(topic, partition) for partition in range(partitions)]
+        self.messages = deque()
+        self.logs: Dict[TopicPartition, List[Message]] = {tp: [] for tp in self.partitions}
+        next_offsets = [0] * partitions
+        for index, payload in enumerate(payloads):
+            partition = index % partitions
+            message = Message(topic, partition, next_offsets[partition], payload)
+            self.messages.append(message)
+            self.logs[self.partitions[partition]].append(message)
+            next_offsets[partition] += 1
+        self.highwaters = {tp: next_offsets[tp.partition] for tp in self.partitions}
+        self.positions = {tp: 0 for tp in self.partitions}
+        self.committed_offsets: Dict[TopicPartition, int] = {}
+
+        self.latencies: List[float] = []
+        self.started = None
+        self.finished = None
+        self._handed_at = None
+        self._handed_count = 0
+        self._drained = False
+
+    def _record_latency(self):
+        now = time.perf_counter()
+        if self._handed_count:
+            latency = now - self._handed_at
+            self.latencies.extend([latency] * self._handed_count)
+            self._handed_count = 0
+        return now
+
+    def _exhausted(self):
+        # 첫 번째는 루프가 남은 쓰기를 flush하도록 빈 결과를 주고, 그 다음 요청에서 종료
+        if self._drained:
+            raise ReplayFinished()
+        self._drained = True
+        self.finished = time.perf_counter()
+
+    def subscribe(self, topics, listener=None):
+        self.listener = listener
+
+    def assignment(self):
+        return set(self.partitions)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> Message:
+        now = self._record_latency()
+        if not self.messages:
+            self._exhausted()
+            raise StopIteration
+        if self.started is None:
+            self.started = now
+        message = self.messages.popleft()
+        self.positions[TopicPartition(self.topic, message.partition)] = message.offset + 1
+        self._handed_at = time.perf_counter()
+        self._handed_count = 1
+        return message
+
+    def poll(self, timeout_ms: int = 0, max_records: int = 500):
+        now = self._record_latency()
+        if not self.messages:
+            self._exhausted()
+            return {}
+        if self.started is None:
+            self.started = now
+        records = defaultdict(list)
+        for _ in range(min(max_records, len(self.messages))):
+            message = self.messages.popleft()
+            topic_partition = TopicPartition(self.topic, message.partition)
+            records[topic_partition].append(message)
+            self.positions[topic_partition] = message.offset + 1
+        self._handed_at = time.perf_counter()
+        self._handed_count = sum(len(messages) for messages in records.values())
+        return dict(records)
+
+    def highwater(self, topic_partition):
+        return self.highwaters[topic_partition]
+
+    def position(self, topic_partition):
+        return self.positions[topic_partition]
+
+    def committed(self, topic_partition):
+        return self.committed_offsets.get(topic_partition)
+
+    def commit(self, offsets=None):
+        for topic_partition, metadata in (offsets or {}).items():
+            self.committed_offsets[topic_partition] = metadata.offset
+
+    def seek(self, topic_partition, offset):
+        """파티션의 재생 위치를 offset으로 옮기고, 남은 메시지를 파티션별 위치부터 라운드로빈으로 다시 배치"""
+        self.positions[topic_partition] = offset
+        pending = [self.logs[tp][self.positions[tp]:] for tp in self.partitions]
+        self.messages = deque(
+            message for round_messages in zip_longest(*pending) for message in round_messages if message is not None
+        )
+        self._drained = False
+
+    def close(self, autocommit=True):
+        pass
+
+
+class FakeAsyncConsumer(FakeConsumer):
+    """AIOKafkaConsumer 대역 (getmany()는 FakeConsumer.poll()과 같은 방식으로 전달)"""
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def getmany(self, timeout_ms: int = 0, max_records: int = None):
+        return self.poll(timeout_ms, max_records or 500)
+
+    async def position(self, topic_partition):
+        return super().position(topic_partition)
+
+    async def committed(self, topic_partition):
+        return super().committed(topic_partition)
+
+    async def commit(self, offsets=None):
+        super().commit(offsets)
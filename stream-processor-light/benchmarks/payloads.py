@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""벤치마크용 trades.avsc 페이로드 생성/저장/녹화 유틸리티
+
+녹화 파일 형식: Kafka 메시지 value를 base64로 인코딩해 한 줄에 하나씩 저장
+
+    python payloads.py record --output market.payloads --count 10000
+    python payloads.py generate --output synthetic.payloads --count 10000
+"""
+
+import argparse
+import base64
+import io
+import os
+import random
+import sys
+import time
+from typing import List
+
+import avro.io
+import avro.schema
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.append(SRC_DIR)
+
+SCHEMA_PATH = os.path.join(SRC_DIR, 'schemas', 'trades.avsc')
+
+SYMBOLS = [
+    "AAPL", "MSFT", "GOOGL", "AMZN", "META", "NVDA", "TSLA", "AVGO", "CRM", "ORCL",
+    "NFLX", "ADBE", "AMD", "INTC", "PYPL", "CSCO", "QCOM", "TXN", "AMAT", "PLTR"
+]
+
+
+def generate_payloads(count: int, trades_per_message: int = 20, seed: int = 42) -> List[bytes]:
+    """Finnhub trade 프레임과 비슷한 분포의 Avro 페이로드를 생성"""
+    rng = random.Random(seed)
+    with open(SCHEMA_PATH) as f:
+        schema = avro.schema.parse(f.read())
+    writer = avro.io.DatumWriter(schema)
+
+    timestamp = int(time.time() * 1000)
+    prices = {symbol: rng.uniform(50, 900) for symbol in SYMBOLS}
+    payloads = []
+
+    for _ in range(count):
+        trades = []
+        for _ in range(trades_per_message):
+            symbol = rng.choice(SYMBOLS)
+            prices[symbol] *= 1 + rng.gauss(0, 0.0005)
+            timestamp += rng.randint(0, 5)
+            trades.append({
+                'c': rng.choice([['1', '12'], ['1'], [], None]),
+                'p': round(prices[symbol], 2),
+                's': symbol,
+                't': timestamp,
+                'v': float(rng.randint(1, 500))
+            })
+
+        buffer = io.BytesIO()
+        writer.write({'data': trades, 'type': 'trade'}, avro.io.BinaryEncoder(buffer))
+        payloads.append(buffer.getvalue())
+
+    return payloads
+
+
+def save_payloads(path: str, payloads: List[bytes]):
+    with open(path, 'w') as f:
+        for payload in payloads:
+            f.write(base64.b64encode(payload).decode('ascii'))
+            f.write('\n')
+
+
+def load_payloads(path: str) -> List[bytes]:
+    with open(path) as f:
+        return [base64.b64decode(line) for line in f if line.strip()]
+
+
+def record_payloads(count: int, timeout_ms: int = 60000) -> List[bytes]:
+    """market 토픽에서 실제 메시지를 녹화 (별도 consumer group, offset commit 없음)"""
+    from kafka import KafkaConsumer
+    from config import Config
+
+    consumer = KafkaConsumer(
+        Config.KAFKA_TOPIC,
+        bootstrap_servers=Config.get_kafka_bootstrap_servers(),
+        group_id=None,
+        auto_offset_reset='earliest',
+        enable_auto_commit=False,
+        consumer_timeout_ms=timeout_ms
+    )
+    payloads = []
+    try:
+        for message in consumer:
+            payloads.append(message.value)
+            if len(payloads) >= count:
+                break
+    finally:
+        consumer.close()
+    return payloads
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate or record trades.avsc payloads for benchmarks",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('command', choices=['generate', 'record'])
+    parser.add_argument('--output', required=True, help="Payload file to write")
+    parser.add_argument('--count', type=int, default=10000, help="Number of messages")
+    parser.add_argument('--trades-per-message', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == 'generate':
+        payloads = generate_payloads(args.count, args.trades_per_message)
+    else:
+        payloads = record_payloads(args.count)
+
+    save_payloads(args.output, payloads)
+    print(f"Wrote {len(payloads)} payloads to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
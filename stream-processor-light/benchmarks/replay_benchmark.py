@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""StreamProcessor 처리량 벤치마크 (Kafka/Cassandra/Redis 없이 in-process fake로 재생)
+
+StreamProcessor.run()을 그대로 실행하되 consumer, Cassandra 세션, Redis 클라이언트만
+fakes.py의 대역으로 바꾼다. 결과는 results/replay.jsonl에 한 줄씩 누적되며
+같은 설정의 직전 결과와 비교해 출력한다.
+
+    python replay_benchmark.py                                  # 합성 페이로드, record/batch 모드
+    python replay_benchmark.py --payloads market.payloads       # 녹화된 페이로드 (payloads.py record)
+    python replay_benchmark.py --mode batch --cassandra-latency-ms 2 --partitions 4
+    python replay_benchmark.py --engine all                     # threaded/asyncio 엔진 비교 (aiokafka 필요)
+    python replay_benchmark.py --redis-url redis://localhost:6379/15   # 로컬 Redis 사용
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime
+
+# import 전에 설정해야 하는 값 (/metrics 서버 비활성화)
+os.environ['METRICS_PORT'] = '0'
+
+from payloads import SCHEMA_PATH, generate_payloads, load_payloads
+from fakes import (
+    FakeAsyncConsumer, FakeAsyncRedis, FakeCluster, FakeConsumer, FakeRedis, FakeSession, ReplayFinished
+)
+from config import Config
+from decoder import TradeDecoder
+from metrics import _percentile
+import stream_processor
+from prometheus_client import REGISTRY
+
+RESULTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results', 'replay.jsonl')
+
+
+class ReplayConnections:
+    """외부 연결 생성 메서드를 fake로 바꾸는 mixin (두 엔진 공용)"""
+
+    def __init__(self, consumer, session, redis_client, redis_url=None):
+        self._fake_consumer = consumer
+        self._fake_session = session
+        self._fake_redis = redis_client
+        self._redis_url = redis_url
+        super().__init__(worker_index=0)
+
+    def create_consumer(self):
+        return self._fake_consumer
+
+    def connect_cassandra(self):
+        return FakeCluster(self._fake_session), self._fake_session
+
+    def create_redis_client(self):
+        return self._fake_redis
+
+
+class ReplayStreamProcessor(ReplayConnections, stream_processor.StreamProcessor):
+    """외부 연결만 fake로 바꾼 StreamProcessor"""
+
+
+def replay_processor_class(engine: str):
+    if engine == 'threaded':
+        return ReplayStreamProcessor
+
+    # aiokafka가 설치된 경우에만 필요하므로 선택 시 import
+    from async_engine import AsyncStreamProcessor
+
+    class ReplayAsyncStreamProcessor(ReplayConnections, AsyncStreamProcessor):
+        """외부 연결만 fake로 바꾼 AsyncStreamProcessor"""
+
+        def create_async_redis_client(self):
+            if self._redis_url:
+                import redis.asyncio
+                return redis.asyncio.Redis.from_url(self._redis_url, decode_responses=True)
+            return FakeAsyncRedis(self._fake_redis)
+
+    return ReplayAsyncStreamProcessor
+
+
+def persist_error_count() -> float:
+    return REGISTRY.get_sample_value('stream_daily_persist_errors_total') or 0
+
+
+def replay(payloads, args, mode: str, engine: str = 'threaded'):
+    """페이로드를 한 번 재생하고 (consumer, session, redis_client, elapsed) 반환"""
+    Config.PROCESSING_MODE = mode
+    Config.ENGINE = engine
+    Config.COMMIT_MODE = args.commit_mode
+    Config.SCHEMA_PATH = SCHEMA_PATH
+    Config.TRADE_DECODER = args.decoder
+
+    consumer_class = FakeConsumer if engine == 'threaded' else FakeAsyncConsumer
+    consumer = consumer_class(payloads, topic=Config.KAFKA_TOPIC, partitions=args.partitions)
+    session = FakeSession(Config.CASSANDRA_KEYSPACE, latency=args.cassandra_latency_ms / 1000)
+    if args.redis_url:
+        import redis
+        redis_client = redis.Redis.from_url(args.redis_url, decode_responses=True)
+    else:
+        redis_client = FakeRedis()
+
+    persist_errors = persist_error_count()
+    with contextlib.ExitStack() as stack:
+        if not args.verbose:
+            stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, 'w'))))
+        processor = replay_processor_class(engine)(consumer, session, redis_client, args.redis_url)
+        try:
+            processor.run()
+        except ReplayFinished:
+            pass
+    # run()의 finally에서 Cassandra 요청과 남은 Redis 집계까지 마무리된 시점
+    elapsed = time.perf_counter() - consumer.started
+    # 출력이 숨겨져 있으므로 일별 집계 저장 실패는 결과를 남기지 않고 바로 실패시킴
+    failed = persist_error_count() - persist_errors
+    if failed:
+        raise RuntimeError(f"{engine} {mode}: {failed:.0f} daily aggregate persist errors (rerun with --verbose)")
+    return consumer, session, redis_client, elapsed
+
+
+def measure_allocations(payloads, args, mode: str, engine: str):
+    """tracemalloc으로 재생 중 최대/잔여 할당량(bytes per trade) 측정 (처리량 측정과 별도 실행)"""
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        consumer, _, _, _ = replay(payloads, args, mode, engine)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak - baseline, current - baseline
+
+
+def run_mode(payloads, trade_count: int, args, mode: str, engine: str):
+    consumer, session, redis_client, elapsed = replay(payloads, args, mode, engine)
+    latencies = sorted(consumer.latencies)
+
+    sample = payloads[:args.alloc_messages]
+    sample_trades = count_trades(sample)
+    peak, retained = measure_allocations(sample, args, mode, engine)
+
+    result = {
+        'mode': mode,
+        'messages': len(payloads),
+        'trades': trade_count,
+        'seconds': round(elapsed, 4),
+        'trades_per_sec': round(trade_count / elapsed, 1),
+        'messages_per_sec': round(len(payloads) / elapsed, 1),
+        'p50_ms': round(_percentile(latencies, 0.50) * 1000, 4),
+        'p99_ms': round(_percentile(latencies, 0.99) * 1000, 4),
+        'cassandra_requests': session.requests,
+        'cassandra_rows': session.rows,
+        'peak_bytes_per_trade': round(peak / sample_trades, 1),
+        'retained_bytes_per_trade': round(retained / sample_trades, 1),
+    }
+    if isinstance(redis_client, FakeRedis):
+        result['redis_commands'] = redis_client.commands
+        result['redis_round_trips'] = redis_client.round_trips
+    return result
+
+
+def count_trades(payloads) -> int:
+    decoder = TradeDecoder(SCHEMA_PATH, 'native')
+    return sum(len(decoder.decode(payload)['data']) for payload in payloads)
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).decode().strip()
+    except Exception:
+        return 'unknown'
+
+
+def settings_of(entry):
+    """같은 조건의 결과끼리만 비교하기 위한 키"""
+    settings = {key: entry[key] for key in ('payloads', 'messages', 'partitions', 'commit_mode',
+                                            'decoder', 'cassandra_latency_ms', 'redis')}
+    # engine 항목이 없는 이전 결과는 threaded 엔진
+    settings['engine'] = entry.get('engine', 'threaded')
+    return settings
+
+
+def load_previous(settings):
+    if not os.path.exists(RESULTS_PATH):
+        return None
+    previous = None
+    with open(RESULTS_PATH) as f:
+        for line in f:
+            entry = json.loads(line)
+            if settings_of(entry) == settings:
+                previous = entry
+    return previous
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay trades.avsc payloads through StreamProcessor against in-process fakes",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('--payloads', help="Recorded payload file (see payloads.py)")
+    parser.add_argument('--count', type=int, default=5000, help="Synthetic messages when --payloads is omitted")
+    parser.add_argument('--mode', choices=['record', 'batch', 'all'], default='all')
+    parser.add_argument('--engine', choices=['threaded', 'asyncio', 'all'], default='threaded')
+    parser.add_argument('--commit-mode', choices=['auto', 'at_least_once'], default='auto')
+    parser.add_argument('--decoder', default=Config.TRADE_DECODER, help="TRADE_DECODER mode")
+    parser.add_argument('--partitions', type=int, default=1)
+    parser.add_argument('--cassandra-latency-ms', type=float, default=0.0,
+                        help="Simulated Cassandra request latency (0 = complete inline)")
+    parser.add_argument('--redis-url', help="Use a local Redis instead of the in-process fake")
+    parser.add_argument('--alloc-messages', type=int, default=1000,
+                        help="Messages replayed under tracemalloc for allocation figures")
+    parser.add_argument('--label', default='', help="Free-form note stored with the result")
+    parser.add_argument('--no-save', action='store_true', help="Do not append to results/replay.jsonl")
+    parser.add_argument('--verbose', action='store_true', help="Show StreamProcessor output")
+    args = parser.parse_args()
+
+    payloads = load_payloads(args.payloads) if args.payloads else generate_payloads(args.count)
+    trade_count = count_trades(payloads)
+    modes = ['record', 'batch'] if args.mode == 'all' else [args.mode]
+    engines = ['threaded', 'asyncio'] if args.engine == 'all' else [args.engine]
+    print(f"Replaying {len(payloads)} messages ({trade_count} trades) x {modes} x {engines}")
+
+    entries = []
+    for engine in engines:
+        entry = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'label': args.label,
+            'python': platform.python_version(),
+            'engine': engine,
+            'payloads': os.path.basename(args.payloads) if args.payloads else 'synthetic',
+            'messages': len(payloads),
+            'partitions': args.partitions,
+            'commit_mode': args.commit_mode,
+            'decoder': args.decoder,
+            'cassandra_latency_ms': args.cassandra_latency_ms,
+            'redis': 'local' if args.redis_url else 'fake',
+            'results': {},
+        }
+        previous = load_previous(settings_of(entry))
+        # --engine all이면 asyncio 결과는 같은 실행의 threaded 결과와도 비교
+        baseline = entries[0] if entries else None
+
+        for mode in modes:
+            result = run_mode(payloads, trade_count, args, mode, engine)
+            entry['results'][mode] = result
+
+            line = (f"{engine:>8} {mode:>6}: {result['trades_per_sec']:>11,.0f} trades/s  "
+                    f"p50={result['p50_ms']:.3f}ms p99={result['p99_ms']:.3f}ms  "
+                    f"peak={result['peak_bytes_per_trade']:.0f}B/trade "
+                    f"retained={result['retained_bytes_per_trade']:.0f}B/trade")
+            before = previous and previous['results'].get(mode)
+            if before:
+                change = result['trades_per_sec'] / before['trades_per_sec'] - 1
+                line += f"  ({change:+.1%} vs {previous['revision']})"
+            if baseline:
+                change = result['trades_per_sec'] / baseline['results'][mode]['trades_per_sec'] - 1
+                line += f"  ({change:+.1%} vs {baseline['engine']})"
+            print(line)
+        entries.append(entry)
+
+    if not args.no_save:
+        os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+        with open(RESULTS_PATH, 'a') as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + '\n')
+        print(f"Saved to {RESULTS_PATH}")
+
+if __name__ == '__main__':
+    main()
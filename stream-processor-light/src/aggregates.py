@@ -0,0 +1,170 @@
+from datetime import date, datetime, timezone
+from typing import Dict, Iterable, List, Tuple
+
+DAILY_AGG_PREFIX = 'daily_agg'
+DAILY_AGG_TTL = 30 * 24 * 3600  # 30일
+
+# 마지막 persist 이후 변경된 daily_agg 키 집합과, persist 진행 중인 스냅샷
+DAILY_AGG_DIRTY_KEY = f"{DAILY_AGG_PREFIX}_dirty"
+DAILY_AGG_PERSISTING_KEY = f"{DAILY_AGG_PREFIX}_dirty:persisting"
+
+# 배치의 daily_agg 델타를 EVALSHA 한 번으로 원자적으로 반영 (배치당 왕복 1회)
+# 키마다 파티션별 마지막 반영 offset을 offset:{partition} 필드로 함께 기록하고, 그 이하 offset의 델타는
+# 이미 반영된 재전달(at-least-once 재처리, 리밸런스 중 두 워커의 중복 소유)로 보고 건너뛴다.
+# offset < 0인 델타(offset 없이 호출된 process_trade)는 항상 반영한다.
+# KEYS[1] = dirty 집합, KEYS[2] = 파티션별 반영 offset 해시, KEYS[3..] = daily_agg 키
+# ARGV[1] = TTL, 이후 델타마다 8개: 키 번호, partition, offset, volume, amount, count, first, last
+# 반환: {반영된 trade 수, 건너뛴 trade 수, 반영된 키 수}
+APPLY_DAILY_AGGREGATES = """
+local watermarks = {}
+local touched = {}
+local touched_keys = {}
+local partition_offsets = {}
+local applied = 0
+local skipped = 0
+
+for i = 2, #ARGV, 8 do
+    local key = KEYS[tonumber(ARGV[i])]
+    local field = 'offset:' .. ARGV[i + 1]
+    local offset = tonumber(ARGV[i + 2])
+    local marks = watermarks[key]
+    if not marks then
+        marks = {}
+        watermarks[key] = marks
+    end
+    if marks[field] == nil then
+        marks[field] = tonumber(redis.call('HGET', key, field) or '-1')
+    end
+
+    if offset >= 0 and offset <= marks[field] then
+        skipped = skipped + tonumber(ARGV[i + 5])
+    else
+        redis.call('HINCRBYFLOAT', key, 'total_volume', ARGV[i + 3])
+        redis.call('HINCRBYFLOAT', key, 'total_amount', ARGV[i + 4])
+        redis.call('HINCRBY', key, 'trade_count', ARGV[i + 5])
+        applied = applied + tonumber(ARGV[i + 5])
+
+        local state = touched[key]
+        if not state then
+            state = {first = ARGV[i + 6], last = ARGV[i + 7], offsets = {}}
+            touched[key] = state
+            table.insert(touched_keys, key)
+        else
+            if ARGV[i + 6] < state.first then state.first = ARGV[i + 6] end
+            if ARGV[i + 7] > state.last then state.last = ARGV[i + 7] end
+        end
+        if offset >= 0 then
+            marks[field] = offset
+            state.offsets[field] = ARGV[i + 2]
+            local partition = ARGV[i + 1]
+            if offset > (partition_offsets[partition] or -1) then
+                partition_offsets[partition] = offset
+            end
+        end
+    end
+end
+
+for _, key in ipairs(touched_keys) do
+    local state = touched[key]
+    -- 첫 거래 시간은 없을 때만, 마지막 거래 시간은 항상 (배치 내 최솟값/최댓값)
+    redis.call('HSETNX', key, 'first_trade_time', state.first)
+    redis.call('HSET', key, 'last_trade_time', state.last)
+    for field, offset in pairs(state.offsets) do
+        redis.call('HSET', key, field, offset)
+    end
+    redis.call('EXPIRE', key, ARGV[1])
+    redis.call('SADD', KEYS[1], key)
+end
+
+for partition, offset in pairs(partition_offsets) do
+    local stored = redis.call('HGET', KEYS[2], partition)
+    if not stored or offset > tonumber(stored) then
+        redis.call('HSET', KEYS[2], partition, offset)
+    end
+end
+
+return {applied, skipped, #touched_keys}
+"""
+
+
+def daily_aggregate_key(symbol: str, trade_date: date) -> str:
+    """Redis 키 패턴: daily_agg:{symbol}:{date}"""
+    return f"{DAILY_AGG_PREFIX}:{symbol}:{trade_date.isoformat()}"
+
+
+def epoch_ms_isoformat(timestamp_ms: int) -> str:
+    """epoch ms -> UTC ISO 문자열 (Redis first/last_trade_time 필드 형식, 오프셋 표기 없음)"""
+    return datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc).replace(tzinfo=None).isoformat()
+
+
+class DailyAggregate:
+    """batch_queue 항목: (symbol, 거래일) 하나에 대한 집계 델타
+
+    trade 한 건마다 만들어지므로 dict 대신 __slots__ 레코드로 두고,
+    첫/마지막 거래 시각은 epoch ms 정수로 보관해 Redis에 쓸 때만 문자열로 바꾼다.
+    """
+
+    __slots__ = ('symbol', 'trade_date', 'total_volume', 'total_amount', 'trade_count',
+                 'first_trade_time', 'last_trade_time', 'partition', 'offset')
+
+    def __init__(self, symbol: str, trade_date: date, total_volume: float, total_amount: float,
+                 trade_count: int, first_trade_time: int, last_trade_time: int,
+                 partition: int = 0, offset: int = -1):
+        self.symbol = symbol
+        self.trade_date = trade_date
+        self.total_volume = total_volume
+        self.total_amount = total_amount
+        self.trade_count = trade_count
+        self.first_trade_time = first_trade_time  # epoch ms
+        self.last_trade_time = last_trade_time    # epoch ms
+        self.partition = partition
+        self.offset = offset
+
+    def copy(self) -> 'DailyAggregate':
+        return DailyAggregate(self.symbol, self.trade_date, self.total_volume, self.total_amount,
+                              self.trade_count, self.first_trade_time, self.last_trade_time,
+                              self.partition, self.offset)
+
+    def merge(self, other: 'DailyAggregate'):
+        self.total_volume += other.total_volume
+        self.total_amount += other.total_amount
+        self.trade_count += other.trade_count
+        if other.first_trade_time < self.first_trade_time:
+            self.first_trade_time = other.first_trade_time
+        if other.last_trade_time > self.last_trade_time:
+            self.last_trade_time = other.last_trade_time
+
+
+def fold_daily_aggregates(items: Iterable[DailyAggregate]) -> Dict[Tuple[str, int, int], DailyAggregate]:
+    """큐 항목들을 (daily_agg 키, partition, offset)별 델타 하나로 합침
+
+    거래량/거래대금/건수는 더하고, 첫 거래 시각은 최솟값, 마지막 거래 시각은 최댓값을 취한다.
+    offset별로 나눠 두어야 재처리 배치가 이전 배치와 일부만 겹쳐도 Lua 스크립트가 메시지 단위로 중복을 가려낸다.
+    (큐 순서를 유지하므로 같은 키/파티션 안에서는 offset 오름차순)
+    """
+    folded = {}
+    for item in items:
+        group = (daily_aggregate_key(item.symbol, item.trade_date), item.partition, item.offset)
+        delta = folded.get(group)
+        if delta is None:
+            folded[group] = item.copy()
+        else:
+            delta.merge(item)
+
+    return folded
+
+
+def apply_daily_aggregates_args(items: Iterable[DailyAggregate], applied_offsets_key: str,
+                                ttl: int = DAILY_AGG_TTL) -> Tuple[List[str], List]:
+    """APPLY_DAILY_AGGREGATES 스크립트의 (keys, args)"""
+    keys = [DAILY_AGG_DIRTY_KEY, applied_offsets_key]
+    key_index: Dict[str, int] = {}
+    args = [ttl]
+    for (key, partition, offset), delta in fold_daily_aggregates(items).items():
+        index = key_index.get(key)
+        if index is None:
+            keys.append(key)
+            index = key_index[key] = len(keys)  # Lua KEYS는 1부터
+        args += (index, partition, offset, repr(delta.total_volume), repr(delta.total_amount), delta.trade_count,
+                 epoch_ms_isoformat(delta.first_trade_time), epoch_ms_isoformat(delta.last_trade_time))
+    return keys, args
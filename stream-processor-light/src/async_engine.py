@@ -0,0 +1,481 @@
+import asyncio
+import signal
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Tuple
+
+from aiokafka import AIOKafkaConsumer
+from aiokafka.abc import ConsumerRebalanceListener
+import redis.asyncio
+
+from config import Config
+from cassandra_writer import CassandraWriter
+from flush_scheduler import FlushScheduler
+from offsets import RedisBarrier
+from aggregates import APPLY_DAILY_AGGREGATES, DailyAggregate, apply_daily_aggregates_args
+from candles import candle_key
+from metrics import REDIS_PIPELINE_SECONDS
+from stream_processor import StreamProcessor
+
+# 드라이버 스레드가 완료시키는 barrier(threading.Event)를 루프를 막지 않고 확인하는 간격 (리밸런스/종료 시에만 사용)
+BARRIER_POLL_INTERVAL = 0.005
+
+
+async def wait_barriers(barriers: List, timeout: float) -> bool:
+    """barrier가 모두 완료될 때까지 대기 (timeout 안에 끝나지 않으면 False)"""
+    deadline = time.time() + timeout
+    while not all(barrier.is_done() for barrier in barriers):
+        if time.time() >= deadline:
+            return False
+        await asyncio.sleep(BARRIER_POLL_INTERVAL)
+    return True
+
+
+class AsyncFlushScheduler(FlushScheduler):
+    """FlushScheduler의 이벤트 루프 버전 (ENGINE=asyncio)
+
+    항목 추가와 flush가 모두 같은 루프에서 일어나므로 put_many()는 블록하지 않는다.
+    policy='block'에서 capacity를 넘기면 일단 받아 두고, 소비 루프가 다음 poll 전에
+    wait_for_space()를 await해 backpressure를 건다. flush 함수는 코루틴이다.
+    """
+
+    def __init__(self, flush, **kwargs):
+        super().__init__(flush, **kwargs)
+        self._wakeup = asyncio.Event()
+        self._space = asyncio.Event()
+
+    @classmethod
+    def from_scheduler(cls, scheduler: FlushScheduler, flush) -> 'AsyncFlushScheduler':
+        """스레드용 스케줄러와 같은 설정으로 생성 (flush만 코루틴으로 교체)"""
+        return cls(
+            flush,
+            batch_size=scheduler.batch_size,
+            interval=scheduler.interval,
+            capacity=scheduler.capacity,
+            policy=scheduler.policy,
+            stats_interval=scheduler.stats_interval,
+            name=scheduler.name
+        )
+
+    def put_many(self, items) -> int:
+        added = 0
+        if self.policy == 'block' and self._size >= self.capacity:
+            self.blocked += 1
+        for item in items:
+            if self.policy == 'drop' and self._size >= self.capacity:
+                self.dropped += 1
+                continue
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            self._items.append(item)
+            self._size += 1
+            added += 1
+
+        self.enqueued += added
+        if self._size >= self.batch_size:
+            self._wakeup.set()
+        return added
+
+    def barrier(self) -> RedisBarrier:
+        barrier = RedisBarrier()
+        self._items.append(barrier)
+        self._barriers += 1
+        self._wakeup.set()
+        return barrier
+
+    def reset_failures(self):
+        self._failed = False
+
+    def stop(self):
+        self._stopping = True
+        self._wakeup.set()
+        self._space.set()
+
+    async def wait_for_space(self):
+        """policy='block': 큐가 capacity 아래로 내려갈 때까지 대기"""
+        while self._size >= self.capacity and not self._stopping:
+            self._space.clear()
+            self._wakeup.set()
+            await self._space.wait()
+
+    async def run(self):
+        """flush 루프 (asyncio task 진입점)"""
+        while True:
+            while not self._due():
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self._timeout())
+                except asyncio.TimeoutError:
+                    pass
+            items = self._items
+            self._items = deque()
+            self._size = 0
+            self._barriers = 0
+            self._oldest = None
+            stopping = self._stopping
+            self._space.set()
+
+            await self._drain(items)
+            self._maybe_report()
+            if stopping:
+                return
+
+    async def _drain(self, items):
+        batch = []
+        for item in items:
+            if isinstance(item, RedisBarrier):
+                if batch:
+                    await self._flush(batch)
+                    batch = []
+                item.done(failed=self._failed)
+            else:
+                batch.append(item)
+        if batch:
+            await self._flush(batch)
+
+    async def _flush(self, batch: List) -> bool:
+        try:
+            ok = await self.flush(batch) is not False
+        except Exception as e:
+            print(f"Error flushing {len(batch)} items ({self.name}): {e}")
+            ok = False
+        self.flushes += 1
+        self.flushed_items += len(batch)
+        if not ok:
+            self.failed_flushes += 1
+            self._failed = True
+        return ok
+
+
+class AsyncCassandraWriter(CassandraWriter):
+    """execute_async 콜백을 이벤트 루프에 연결한 CassandraWriter (ENGINE=asyncio)
+
+    in-flight 상한(max_in_flight 세마포어)에 도달해도 _send()가 루프를 막지 않도록
+    남은 요청은 backlog에 넣고, 요청이 끝난 드라이버 스레드가 반납할 슬롯으로 바로 다음 요청을 보낸다.
+    소비 루프는 다음 poll 전에 wait_for_capacity()로 backlog가 빌 때까지 기다린다.
+    """
+
+    def __init__(self, session, **kwargs):
+        super().__init__(session, **kwargs)
+        self._loop = asyncio.get_event_loop()
+        self._backlog = deque()
+        self._capacity = asyncio.Event()
+        self._waiting = False
+
+    def _send(self, rows: List[Tuple]):
+        request = self._build_request(rows)
+        with self._idle:
+            self._sequence += 1
+            sequence = self._sequence
+            self._outstanding.add(sequence)
+            if self._backlog or not self._slots.acquire(blocking=False):
+                self._backlog.append((request, len(rows), sequence))
+                return
+        self._dispatch(request, len(rows), sequence)
+
+    def _dispatch(self, request, row_count: int, sequence: int):
+        try:
+            self._execute(request, row_count, sequence, time.perf_counter(), 0)
+        except Exception as e:
+            print(f"Error sending {row_count} rows to Cassandra ({self.name}): {e}")
+            self._complete(sequence, failed=True)
+
+    def _release_slot(self):
+        # 드라이버 스레드(또는 _dispatch 실패 시 루프)에서 호출: 슬롯을 backlog의 다음 요청에 넘김
+        with self._idle:
+            queued = self._backlog.popleft() if self._backlog else None
+            if queued is None:
+                self._slots.release()
+            notify = self._waiting and not self._backlog
+            if notify:
+                self._waiting = False
+        if notify:
+            self._loop.call_soon_threadsafe(self._capacity.set)
+        if queued is not None:
+            self._dispatch(*queued)
+
+    async def wait_for_capacity(self):
+        """backlog에 쌓인 요청이 모두 전송될 때까지 대기"""
+        while True:
+            with self._idle:
+                if not self._backlog:
+                    self._waiting = False
+                    return
+                self._waiting = True
+                self._capacity.clear()
+            await self._capacity.wait()
+
+
+class AsyncPartitionStateListener(ConsumerRebalanceListener):
+    """aiokafka용 리밸런스 리스너 (getmany() 도중 루프에서 코루틴으로 호출됨)"""
+
+    def __init__(self, processor):
+        self.processor = processor
+
+    async def on_partitions_revoked(self, revoked):
+        await self.processor.on_partitions_revoked(revoked)
+
+    async def on_partitions_assigned(self, assigned):
+        self.processor.on_partitions_assigned(assigned)
+
+
+class AsyncStreamProcessor(StreamProcessor):
+    """aiokafka + redis.asyncio 이벤트 루프 하나로 동작하는 StreamProcessor (ENGINE=asyncio)
+
+    decode/집계/봉/offset 관리 등 처리 로직은 StreamProcessor를 그대로 쓰고,
+    I/O를 하는 메서드만 같은 이름의 코루틴으로 재정의한다.
+    - Kafka: getmany()로 받아 process_message()/process_records()에 전달, 커밋/lag 조회는 await
+    - Redis: 집계/tick/시세 flush를 AsyncFlushScheduler task로 실행 (큐당 파이프라인 1개씩)
+    - Cassandra: AsyncCassandraWriter가 max_in_flight 세마포어로 동시 요청 수를 제한
+    일별 집계 저장(execute_concurrent)과 리밸런스 시 symbol 상태 저장/조회는 기존 동기 Redis 클라이언트를 사용한다.
+    """
+
+    writer_class = AsyncCassandraWriter
+
+    def __init__(self, worker_index: int = 0):
+        # aiokafka 객체와 asyncio.Event는 생성 시점의 루프에 묶이므로 먼저 루프를 만든다
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.candle_tasks = set()
+        self.flush_tasks = []
+        super().__init__(worker_index)
+
+        self.async_redis = self.create_async_redis_client()
+        self.async_apply_daily_aggregates = self.async_redis.register_script(APPLY_DAILY_AGGREGATES)
+        self.batch_queue = AsyncFlushScheduler.from_scheduler(self.batch_queue, self.write_redis_aggregates)
+        if self.tick_queue is not None:
+            self.tick_queue = AsyncFlushScheduler.from_scheduler(self.tick_queue, self.write_ticks)
+        if self.quote_queue is not None:
+            self.async_update_quote = self.async_redis.register_script(self.quote_publisher.update_quote.script)
+            self.quote_queue = AsyncFlushScheduler.from_scheduler(self.quote_queue, self.write_quotes)
+
+    def create_consumer(self) -> AIOKafkaConsumer:
+        async def create():
+            return AIOKafkaConsumer(
+                bootstrap_servers=Config.get_kafka_bootstrap_servers(),
+                group_id=Config.KAFKA_GROUP_ID,
+                client_id=f"stream-processor-{self.worker_index}",
+                auto_offset_reset='latest',
+                enable_auto_commit=not self.at_least_once
+            )
+        return self.loop.run_until_complete(create())
+
+    def create_rebalance_listener(self):
+        return AsyncPartitionStateListener(self)
+
+    def create_async_redis_client(self) -> redis.asyncio.Redis:
+        return redis.asyncio.Redis(
+            host=Config.REDIS_HOST,
+            port=Config.REDIS_PORT,
+            decode_responses=True
+        )
+
+    def start_background(self):
+        # flush 스케줄러는 run()에서 task로 시작하고, 일별 집계 저장만 스레드로 실행
+        self.start_daily_persist()
+
+    async def write_redis_aggregates(self, trades_batch: List[DailyAggregate]) -> bool:
+        keys, args = apply_daily_aggregates_args(trades_batch, self.applied_offsets_key)
+        try:
+            with REDIS_PIPELINE_SECONDS.time():
+                result = await self.async_apply_daily_aggregates(keys=keys, args=args)
+            self.record_aggregate_result(result)
+            return True
+
+        except Exception as e:
+            print(f"Error updating Redis aggregates: {e}")
+            return False
+
+    async def write_ticks(self, ticks: List[Tuple[str, int, float, float]]) -> bool:
+        try:
+            pipe = self.async_redis.pipeline(transaction=False)
+            self.tick_writer.queue(pipe, ticks)
+            await pipe.execute()
+            return True
+
+        except Exception as e:
+            print(f"Error writing {len(ticks)} ticks to Redis streams: {e}")
+            return False
+
+    async def write_quotes(self, quotes: List[Tuple[str, int, float, float]]) -> bool:
+        calls = self.quote_publisher.calls(quotes)
+        try:
+            pipe = self.async_redis.pipeline(transaction=False)
+            for keys, args in calls:
+                await self.async_update_quote(keys=keys, args=args, client=pipe)
+            await pipe.execute()
+            return True
+
+        except Exception as e:
+            print(f"Error updating last prices for {len(calls)} symbols: {e}")
+            return False
+
+    def write_current_candles(self, dirty):
+        task = self.loop.create_task(self._write_current_candles(dirty))
+        self.candle_tasks.add(task)
+        task.add_done_callback(self.candle_tasks.discard)
+
+    async def _write_current_candles(self, dirty):
+        try:
+            pipe = self.async_redis.pipeline(transaction=False)
+            for candle in dirty:
+                key = candle_key(candle.symbol, candle.resolution)
+                pipe.hset(key, mapping=candle.to_redis())
+                pipe.expire(key, self.candle_redis_ttl)
+            await pipe.execute()
+        except Exception as e:
+            print(f"Error updating current candles in Redis: {e}")
+
+    async def on_partitions_revoked(self, revoked):
+        if self.at_least_once:
+            await self.commit_pending_offsets(timeout=self.rebalance_timeout)
+            self.offsets.forget(revoked)
+        else:
+            self.flush_writes()
+            if not await wait_barriers(self.write_barriers(), self.rebalance_timeout):
+                print(f"Warning: Cassandra writes still in flight after {self.rebalance_timeout}s during rebalance")
+        self.save_revoked_state(revoked)
+
+        print(f"Worker {self.worker_index} revoked partitions: {sorted(tp.partition for tp in revoked)}")
+
+    async def commit_offsets(self):
+        if not self.at_least_once:
+            return
+
+        positions, failed = self.completed_offsets()
+        if failed:
+            await self.rewind_offsets()
+        elif positions:
+            await self._commit(positions)
+
+    async def commit_pending_offsets(self, timeout: float):
+        checkpoint = self.pending_checkpoint()
+        await wait_barriers(checkpoint.barriers, timeout)
+
+        positions = self.durable_positions(checkpoint, timeout)
+        if positions:
+            await self._commit(positions)
+
+    async def _commit(self, positions: Dict):
+        try:
+            await self.consumer.commit(self.commit_request(positions))
+            self.offsets.mark_committed(positions)
+        except Exception as e:
+            print(f"Error committing offsets: {e}")
+
+    async def rewind_offsets(self):
+        print("Warning: write failed, rewinding to last committed offsets")
+        await wait_barriers([self.batch_queue.barrier()] + self.write_barriers(), self.rebalance_timeout)
+
+        positions = self.reset_to_committed()
+        assignment = self.consumer.assignment()
+        self.load_applied_offsets(assignment)
+        for topic_partition in assignment:
+            offset = positions.get(topic_partition)
+            if offset is None:
+                offset = await self.consumer.committed(topic_partition)
+            if offset is not None:
+                self.consumer.seek(topic_partition, offset)
+
+    async def report_consumer_lag(self):
+        if not self.lag_report_due():
+            return
+
+        lag = {}
+        for topic_partition in self.consumer.assignment():
+            highwater = self.consumer.highwater(topic_partition)
+            if highwater is None:
+                continue
+            lag[topic_partition.partition] = max(0, highwater - await self.consumer.position(topic_partition))
+        self.record_consumer_lag(lag)
+
+    async def wait_for_capacity(self):
+        """다음 poll 전 backpressure: Cassandra backlog와 block 정책 Redis 큐가 빌 때까지 대기"""
+        for writer in self.writers:
+            await writer.wait_for_capacity()
+        if self.batch_queue.policy == 'block':
+            await self.batch_queue.wait_for_space()
+
+    async def consume(self):
+        """getmany() 단위로 받아 PROCESSING_MODE에 맞게 처리"""
+        while not self.stopping.is_set():
+            records = await self.consumer.getmany(
+                timeout_ms=self.poll_timeout_ms,
+                max_records=self.poll_max_records
+            )
+            if self.processing_mode == 'batch':
+                self.process_records(records)
+            else:
+                for partition_records in records.values():
+                    for message in partition_records:
+                        self.process_message(message)
+
+            self.flush_writes()
+            await self.commit_offsets()
+            await self.report_consumer_lag()
+            await self.wait_for_capacity()
+            # 메시지가 계속 버퍼에 있으면 getmany()가 양보하지 않으므로 flush task가 돌 수 있게 한 번 양보
+            await asyncio.sleep(0)
+
+    def run(self):
+        print(f"Starting asyncio stream processor with Redis daily aggregation ({self.processing_mode} mode)...")
+        try:
+            self.loop.run_until_complete(self.main())
+        except KeyboardInterrupt:
+            print("Shutting down...")
+        finally:
+            self.loop.close()
+
+    async def main(self):
+        # 컨테이너에서 PID 1로 실행되면 핸들러가 없는 SIGTERM은 무시되므로 직접 처리
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                self.loop.add_signal_handler(signum, self.stop, signum, None)
+        for queue in (self.batch_queue, self.tick_queue, self.quote_queue):
+            if queue is not None:
+                self.flush_tasks.append(self.loop.create_task(queue.run()))
+        try:
+            await self.consumer.start()
+            await self.consume()
+        finally:
+            await self.shutdown()
+
+    async def shutdown(self):
+        """StreamProcessor.shutdown()과 같은 순서의 종료 절차 (대기는 모두 루프를 막지 않음)"""
+        self.stopping.set()
+        started = time.time()
+        deadline = started + self.shutdown_timeout
+
+        def remaining() -> float:
+            return max(0.0, deadline - time.time())
+
+        if self.candles is not None:
+            self.flush_candles(close_all=True)
+        if self.at_least_once:
+            await self.commit_pending_offsets(timeout=remaining())
+        else:
+            self.flush_writes()
+            await wait_barriers(self.write_barriers(), remaining())
+
+        # 남은 Redis 집계/tick/시세/봉을 flush하고 task 종료
+        for queue in (self.batch_queue, self.tick_queue, self.quote_queue):
+            if queue is not None:
+                queue.stop()
+        pending = self.flush_tasks + list(self.candle_tasks)
+        if pending:
+            await asyncio.wait(pending, timeout=remaining())
+
+        if self.daily_persist_thread is not None:
+            await asyncio.to_thread(self.daily_persist_thread.join, remaining())
+            if self.daily_persist_thread.is_alive():
+                print("Warning: daily persist still running at shutdown, skipping final persist")
+            elif remaining() > 0:
+                await asyncio.to_thread(self.persist_daily_aggregates_to_cassandra)
+
+        # enable_auto_commit이면 stop()에서 현재 위치를 커밋 (at-least-once는 위에서 이미 커밋)
+        await self.consumer.stop()
+        self.cluster.shutdown()
+        self.redis_client.close()
+        await self.async_redis.aclose()
+        print(f"Worker {self.worker_index} shut down in {time.time() - started:.1f}s")
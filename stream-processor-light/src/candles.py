@@ -0,0 +1,172 @@
+from datetime import date, datetime, timezone
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from trade_batch import utc_date
+
+CANDLE_PREFIX = 'candle'
+_UNIT_MS = {'s': 1000, 'm': 60_000, 'h': 3_600_000}
+
+
+def parse_resolutions(value: str) -> List[Tuple[str, int]]:
+    """'1s,1m,5m' -> [('1s', 1000), ('1m', 60000), ('5m', 300000)]"""
+    resolutions = []
+    for name in filter(None, (item.strip() for item in value.split(','))):
+        if name[-1] not in _UNIT_MS or not name[:-1].isdigit():
+            raise ValueError(f"Invalid candle resolution: {name}. Use <n>s, <n>m or <n>h")
+        resolutions.append((name, int(name[:-1]) * _UNIT_MS[name[-1]]))
+    return resolutions
+
+
+def candle_key(symbol: str, resolution: str) -> str:
+    """진행 중인 봉을 보관하는 Redis 해시 키"""
+    return f"{CANDLE_PREFIX}:{symbol}:{resolution}"
+
+
+class Candle:
+    """symbol/해상도별 OHLCV 봉 하나 (start는 봉 시작 epoch ms)"""
+
+    __slots__ = ('symbol', 'resolution', 'start', 'open', 'high', 'low', 'close',
+                 'volume', 'amount', 'trade_count')
+
+    def __init__(self, symbol: str, resolution: str, start: int, open_: float, high: float, low: float,
+                 close: float, volume: float, amount: float, trade_count: int):
+        self.symbol = symbol
+        self.resolution = resolution
+        self.start = start
+        self.open = open_
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.amount = amount
+        self.trade_count = trade_count
+
+    def merge(self, high: float, low: float, close: float, volume: float, amount: float, trade_count: int):
+        """같은 봉에 이후 도착한 trade(또는 trade 묶음)를 반영"""
+        if high > self.high:
+            self.high = high
+        if low < self.low:
+            self.low = low
+        self.close = close
+        self.volume += volume
+        self.amount += amount
+        self.trade_count += trade_count
+
+    @property
+    def vwap(self) -> float:
+        return self.amount / self.volume if self.volume else self.close
+
+    @property
+    def bar_date(self) -> date:
+        # 봉 시작 시각의 UTC 날짜 (Cassandra 파티션 키)
+        return utc_date(self.start)
+
+    def to_redis(self) -> Dict:
+        return {
+            'start': datetime.fromtimestamp(self.start / 1000, tz=timezone.utc).replace(tzinfo=None).isoformat(),
+            'open': self.open,
+            'high': self.high,
+            'low': self.low,
+            'close': self.close,
+            'volume': self.volume,
+            'vwap': self.vwap,
+            'trade_count': self.trade_count
+        }
+
+
+class CandleAggregator:
+    """symbol별 OHLCV 봉을 여러 해상도로 증분 집계
+
+    trade가 도착한 순서대로 현재 봉에 반영하고, 다음 구간의 trade가 오거나
+    close_expired()에서 구간 끝 + grace_ms가 지나면 봉을 닫는다. 이미 닫힌 봉에
+    속하는 늦은 trade는 반영하지 않고 late_trades로만 센다.
+    """
+
+    def __init__(self, resolutions: List[Tuple[str, int]], grace_ms: int = 2000):
+        self.resolutions = resolutions
+        self.grace_ms = grace_ms
+        self._sizes = dict(resolutions)
+        self._open: Dict[Tuple[str, str], Candle] = {}
+        self._last_closed: Dict[Tuple[str, str], int] = {}  # 마지막으로 닫힌 봉의 start
+        self._closed: List[Candle] = []
+        self._dirty = set()
+        self.late_trades = 0
+
+    def add(self, symbol: str, timestamp: int, price: float, volume: float):
+        """trade 한 건 반영 (timestamp: epoch ms)"""
+        amount = price * volume
+        for resolution, size in self.resolutions:
+            key = (symbol, resolution)
+            start = timestamp - timestamp % size
+            candle = self._open.get(key)
+            if candle is not None and candle.start == start:
+                candle.merge(price, price, price, volume, amount, 1)
+                self._dirty.add(key)
+            else:
+                self._start_or_drop(key, start, price, price, price, price, volume, amount, 1)
+
+    def add_batch(self, symbol: str, timestamps: np.ndarray, prices: np.ndarray, volumes: np.ndarray):
+        """한 symbol의 trade 배열(도착 순서) 반영
+
+        연속해서 같은 구간에 속하는 trade를 reduceat으로 한 묶음씩 합친 뒤 반영하므로
+        add()를 trade마다 호출한 것과 결과가 같다.
+        """
+        if not len(timestamps):
+            return
+        amounts = prices * volumes
+        for resolution, size in self.resolutions:
+            buckets = timestamps - timestamps % size
+            starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+            ends = np.append(starts[1:], len(buckets))
+            for start, open_, high, low, close, volume, amount, count in zip(
+                    buckets[starts].tolist(), prices[starts].tolist(),
+                    np.maximum.reduceat(prices, starts).tolist(), np.minimum.reduceat(prices, starts).tolist(),
+                    prices[ends - 1].tolist(), np.add.reduceat(volumes, starts).tolist(),
+                    np.add.reduceat(amounts, starts).tolist(), (ends - starts).tolist()):
+                key = (symbol, resolution)
+                candle = self._open.get(key)
+                if candle is not None and candle.start == start:
+                    candle.merge(high, low, close, volume, amount, count)
+                    self._dirty.add(key)
+                else:
+                    self._start_or_drop(key, start, open_, high, low, close, volume, amount, count)
+
+    def _start_or_drop(self, key, start, open_, high, low, close, volume, amount, count):
+        candle = self._open.get(key)
+        last_start = candle.start if candle is not None else self._last_closed.get(key, -1)
+        if start <= last_start:
+            self.late_trades += count
+            return
+        if candle is not None:
+            self._close(key, candle)
+        self._open[key] = Candle(key[0], key[1], start, open_, high, low, close, volume, amount, count)
+        self._dirty.add(key)
+
+    def _close(self, key, candle: Candle):
+        self._closed.append(candle)
+        self._last_closed[key] = candle.start
+        self._dirty.discard(key)
+
+    def close_expired(self, now_ms: int):
+        """구간이 끝나고 grace_ms가 지난 봉을 닫음 (새 trade가 없는 symbol 대비)"""
+        for key, candle in list(self._open.items()):
+            if candle.start + self._sizes[key[1]] + self.grace_ms <= now_ms:
+                del self._open[key]
+                self._close(key, candle)
+
+    def close_all(self):
+        for key, candle in list(self._open.items()):
+            del self._open[key]
+            self._close(key, candle)
+
+    def pop_closed(self) -> List[Candle]:
+        closed, self._closed = self._closed, []
+        return closed
+
+    def pop_dirty(self) -> List[Candle]:
+        """마지막 호출 이후 바뀐 진행 중 봉"""
+        dirty = [self._open[key] for key in self._dirty if key in self._open]
+        self._dirty = set()
+        return dirty
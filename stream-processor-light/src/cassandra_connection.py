@@ -0,0 +1,85 @@
+import time
+from typing import List, Tuple
+
+from cassandra.auth import PlainTextAuthProvider
+from cassandra.cluster import EXEC_PROFILE_DEFAULT, Cluster, ExecutionProfile
+from cassandra.policies import ConstantSpeculativeExecutionPolicy, DCAwareRoundRobinPolicy, TokenAwarePolicy
+
+from config import Config
+from metrics import CASSANDRA_REQUEST_ERRORS, CASSANDRA_REQUEST_SECONDS
+
+
+def contact_points(hosts: str) -> List[str]:
+    """CASSANDRA_HOST (쉼표로 여러 노드 지정 가능) -> contact point 목록"""
+    return [host.strip() for host in hosts.split(',') if host.strip()]
+
+
+def create_execution_profile() -> ExecutionProfile:
+    """token-aware 라우팅 + (설정 시) idempotent 요청의 speculative execution
+
+    prepared statement와 그 UNLOGGED 배치는 routing key가 있으므로 파티션의 replica로 바로 전송된다.
+    speculative execution은 is_idempotent=True인 요청에만 적용된다.
+    """
+    speculative_policy = None
+    if Config.CASSANDRA_SPECULATIVE_DELAY_MS > 0:
+        speculative_policy = ConstantSpeculativeExecutionPolicy(
+            Config.CASSANDRA_SPECULATIVE_DELAY_MS / 1000, Config.CASSANDRA_SPECULATIVE_MAX_ATTEMPTS
+        )
+    return ExecutionProfile(
+        load_balancing_policy=TokenAwarePolicy(DCAwareRoundRobinPolicy(local_dc=Config.CASSANDRA_LOCAL_DC)),
+        speculative_execution_policy=speculative_policy,
+        request_timeout=Config.CASSANDRA_REQUEST_TIMEOUT
+    )
+
+
+def create_cluster() -> Cluster:
+    """Config의 접속 정보와 튜닝 값으로 Cluster 생성
+
+    protocol v3 이상은 호스트당 연결 하나에 요청을 다중화하므로 연결 수 대신
+    각 쓰기 스테이지의 in-flight 상한(CASSANDRA_MAX_IN_FLIGHT 등)으로 동시 요청 수를 제한한다.
+    """
+    compression = Config.CASSANDRA_COMPRESSION.lower()
+    return Cluster(
+        contact_points(Config.CASSANDRA_HOST),
+        auth_provider=PlainTextAuthProvider(
+            username=Config.CASSANDRA_USERNAME,
+            password=Config.CASSANDRA_PASSWORD
+        ),
+        execution_profiles={EXEC_PROFILE_DEFAULT: create_execution_profile()},
+        protocol_version=Config.CASSANDRA_PROTOCOL_VERSION,
+        compression=False if compression in ('', 'none') else compression
+    )
+
+
+class RequestMetrics:
+    """드라이버가 보내는 모든 요청(쓰기 스테이지, daily persist, 마이그레이션)의 지연시간/오류를 관측
+
+    Session.add_request_init_listener로 등록되어 ResponseFuture마다 콜백을 붙인다.
+    재시도/speculative execution을 포함해 최종 결과까지의 시간이다.
+    """
+
+    def __call__(self, response_future):
+        # 페이징 조회는 다음 페이지마다 콜백이 다시 호출되므로 첫 결과만 관측
+        started = [time.perf_counter()]
+        response_future.add_callbacks(
+            self._on_success, self._on_error, callback_args=(started,), errback_args=(started,)
+        )
+
+    @staticmethod
+    def _on_success(_result, started: List[float]):
+        if started:
+            CASSANDRA_REQUEST_SECONDS.observe(time.perf_counter() - started.pop())
+
+    @staticmethod
+    def _on_error(error, started: List[float]):
+        if started:
+            CASSANDRA_REQUEST_SECONDS.observe(time.perf_counter() - started.pop())
+        CASSANDRA_REQUEST_ERRORS.labels(type(error).__name__).inc()
+
+
+def connect_cassandra(keyspace: str = None) -> Tuple[Cluster, object]:
+    """(cluster, session) 반환 — 요청 지연시간 메트릭 listener를 등록한 session"""
+    cluster = create_cluster()
+    session = cluster.connect(keyspace or Config.CASSANDRA_KEYSPACE)
+    session.add_request_init_listener(RequestMetrics())
+    return cluster, session
@@ -0,0 +1,192 @@
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Hashable, List, Tuple
+
+from cassandra.query import BatchStatement, BatchType
+
+from metrics import CASSANDRA_WRITE_ERRORS, CASSANDRA_WRITE_ROWS, CASSANDRA_WRITE_SECONDS, LatencyTracker
+
+
+class WriteBarrier:
+    """barrier() 호출 전에 전송된 요청이 모두 끝나면 set되는 표식"""
+
+    __slots__ = ('target', 'event', 'failed')
+
+    def __init__(self, target: int):
+        self.target = target
+        self.event = threading.Event()
+        self.failed = False
+
+    def is_done(self) -> bool:
+        return self.event.is_set()
+
+    def wait(self, timeout: float = None) -> bool:
+        return self.event.wait(timeout)
+
+
+class CassandraWriter:
+    """파티션 키별로 행을 모아 UNLOGGED 배치로 비동기 전송하는 쓰기 스테이지
+
+    동시에 진행 중인 요청 수는 max_in_flight로 제한되며, 상한에 도달하면
+    add()/flush()를 호출한 스레드(Kafka 소비 루프)가 블록되어 자연스럽게 backpressure가 걸린다.
+    실패한 요청은 max_retries번까지 다시 보내고, 그래도 실패하면 그 요청을 포함하는 barrier를 failed로 표시한다.
+    """
+
+    def __init__(self, session, max_batch_rows: int = 50, max_in_flight: int = 64,
+                 stats_interval: int = 30, max_retries: int = 3, name: str = 'cassandra'):
+        self.session = session
+        self.max_batch_rows = max_batch_rows
+        self.max_in_flight = max_in_flight
+        self.stats_interval = stats_interval
+        self.max_retries = max_retries
+        self.name = name
+
+        self.pending: Dict[Hashable, List[Tuple]] = defaultdict(list)
+        self.pending_rows = 0
+        self.latency = LatencyTracker()
+        self._write_seconds = CASSANDRA_WRITE_SECONDS.labels(name)
+        self._write_rows = CASSANDRA_WRITE_ROWS.labels(name)
+        self._write_errors = CASSANDRA_WRITE_ERRORS.labels(name)
+
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._idle = threading.Condition()
+        self._sequence = 0
+        self._outstanding = set()  # 진행 중인 요청의 sequence 번호
+        self._barriers: List[WriteBarrier] = []
+        self._failed = False  # reset_failures() 전까지 이후 barrier도 모두 실패로 표시
+        self._last_stats_time = time.monotonic()
+
+    def add(self, partition_key: Hashable, statement, params: Tuple):
+        """행을 파티션 그룹에 추가하고, 그룹이 가득 차면 즉시 전송"""
+        rows = self.pending[partition_key]
+        rows.append((statement, params))
+        self.pending_rows += 1
+
+        if len(rows) >= self.max_batch_rows:
+            del self.pending[partition_key]
+            self.pending_rows -= len(rows)
+            self._send(rows)
+
+    def flush(self):
+        """대기 중인 모든 파티션 그룹을 전송"""
+        pending = self.pending
+        self.pending = defaultdict(list)
+        self.pending_rows = 0
+
+        for rows in pending.values():
+            self._send(rows)
+
+        self._maybe_report()
+
+    def barrier(self) -> WriteBarrier:
+        """지금까지 전송된 요청이 모두 끝나면 완료되는 barrier (flush() 이후 호출)"""
+        with self._idle:
+            barrier = WriteBarrier(self._sequence)
+            barrier.failed = self._failed
+            if not self._outstanding or min(self._outstanding) > barrier.target:
+                barrier.event.set()
+            else:
+                self._barriers.append(barrier)
+            return barrier
+
+    def reset_failures(self):
+        """실패한 쓰기를 재처리하기로 한 뒤(offset rewind) 실패 상태를 초기화"""
+        with self._idle:
+            self._failed = False
+
+    def wait_idle(self, timeout: float = None) -> bool:
+        """진행 중인 요청이 모두 끝날 때까지 대기"""
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._outstanding, timeout)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._outstanding)
+
+    @staticmethod
+    def _build_request(rows: List[Tuple]):
+        if len(rows) == 1:
+            statement, params = rows[0]
+            return statement.bind(params)
+        request = BatchStatement(batch_type=BatchType.UNLOGGED)
+        for statement, params in rows:
+            request.add(statement, params)
+        return request
+
+    def _send(self, rows: List[Tuple]):
+        request = self._build_request(rows)
+
+        # in-flight 상한에 도달하면 여기서 블록 (backpressure)
+        self._slots.acquire()
+        with self._idle:
+            self._sequence += 1
+            sequence = self._sequence
+            self._outstanding.add(sequence)
+
+        try:
+            self._execute(request, len(rows), sequence, time.perf_counter(), 0)
+        except Exception:
+            self._complete(sequence, failed=True)
+            raise
+
+    def _execute(self, request, row_count: int, sequence: int, started: float, attempt: int):
+        future = self.session.execute_async(request)
+        future.add_callbacks(
+            self._on_success, self._on_error,
+            callback_args=(row_count, sequence, started),
+            errback_args=(request, row_count, sequence, started, attempt)
+        )
+
+    def _on_success(self, _result, row_count: int, sequence: int, started: float):
+        elapsed = time.perf_counter() - started
+        self.latency.record(elapsed, row_count)
+        self._write_seconds.observe(elapsed)
+        self._write_rows.inc(row_count)
+        self._complete(sequence)
+
+    def _on_error(self, error, request, row_count: int, sequence: int, started: float, attempt: int):
+        if attempt < self.max_retries:
+            try:
+                self._execute(request, row_count, sequence, started, attempt + 1)
+                return
+            except Exception as e:
+                error = e
+
+        self.latency.record_error()
+        self._write_errors.inc()
+        self._complete(sequence, failed=True)
+        print(f"Error writing {row_count} rows to Cassandra ({self.name}) after {attempt + 1} attempts: {error}")
+
+    def _complete(self, sequence: int, failed: bool = False):
+        with self._idle:
+            self._outstanding.discard(sequence)
+            if failed:
+                self._failed = True
+                for barrier in self._barriers:
+                    if barrier.target >= sequence:
+                        barrier.failed = True
+
+            lowest = min(self._outstanding) if self._outstanding else None
+            while self._barriers and (lowest is None or self._barriers[0].target < lowest):
+                self._barriers.pop(0).event.set()
+
+            if not self._outstanding:
+                self._idle.notify_all()
+        self._release_slot()
+
+    def _release_slot(self):
+        self._slots.release()
+
+    def _maybe_report(self):
+        now = time.monotonic()
+        if now - self._last_stats_time < self.stats_interval:
+            return
+        self._last_stats_time = now
+
+        stats = self.latency.snapshot()
+        print(
+            f"Cassandra writes ({self.name}): {stats['throughput']:.1f} rows/s, "
+            f"p50={stats['p50_ms']:.1f}ms p95={stats['p95_ms']:.1f}ms p99={stats['p99_ms']:.1f}ms, "
+            f"in-flight={self.in_flight}, errors={stats['errors']}"
+        )
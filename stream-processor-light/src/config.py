@@ -0,0 +1,100 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+class Config:
+    # Kafka configuration
+    KAFKA_SERVER = os.getenv('KAFKA_SERVER')
+    KAFKA_PORT = os.getenv('KAFKA_PORT')
+    KAFKA_TOPIC = os.getenv('KAFKA_TOPIC_MARKET', 'market')
+    KAFKA_GROUP_ID = os.getenv('KAFKA_GROUP_ID', 'stream-processor-group')
+
+    # Offset commit: auto (enable_auto_commit) 또는 at_least_once (쓰기 완료 후 수동 커밋)
+    COMMIT_MODE = os.getenv('COMMIT_MODE', 'auto')
+    COMMIT_INTERVAL_MS = int(os.getenv('COMMIT_INTERVAL_MS', 1000))
+
+    # Worker pool: 같은 group에 참여하는 워커 프로세스 수
+    STREAM_WORKERS = int(os.getenv('STREAM_WORKERS', 1))
+    LAG_REPORT_INTERVAL = int(os.getenv('LAG_REPORT_INTERVAL', 30))  # 파티션별 lag 리포트 간격 (초)
+    REBALANCE_FLUSH_TIMEOUT = float(os.getenv('REBALANCE_FLUSH_TIMEOUT', 10))  # 리밸런스 시 쓰기 마무리 대기 (초)
+    SHUTDOWN_TIMEOUT = float(os.getenv('SHUTDOWN_TIMEOUT', 25))  # SIGTERM 후 flush/persist/커밋 제한 시간 (초)
+
+    # Cassandra configuration
+    CASSANDRA_HOST = os.getenv('CASSANDRA_HOST', 'cassandra')  # contact point (쉼표로 여러 노드 지정 가능)
+    CASSANDRA_KEYSPACE = os.getenv('CASSANDRA_KEYSPACE', 'market')
+    CASSANDRA_USERNAME = os.getenv('CASSANDRA_USERNAME', 'cassandra')
+    CASSANDRA_PASSWORD = os.getenv('CASSANDRA_PASSWORD', 'cassandra')
+
+    # Cassandra driver (cassandra_connection.py)
+    CASSANDRA_LOCAL_DC = os.getenv('CASSANDRA_LOCAL_DC', '')  # token-aware 라우팅 대상 DC (빈 값이면 contact point의 DC)
+    CASSANDRA_PROTOCOL_VERSION = int(os.getenv('CASSANDRA_PROTOCOL_VERSION', 4))  # 협상 없이 고정 (Cassandra 3.11은 v4까지)
+    CASSANDRA_COMPRESSION = os.getenv('CASSANDRA_COMPRESSION', 'lz4')  # lz4, snappy, none
+    CASSANDRA_REQUEST_TIMEOUT = float(os.getenv('CASSANDRA_REQUEST_TIMEOUT', 10))  # 요청 타임아웃 (초)
+    CASSANDRA_SPECULATIVE_DELAY_MS = int(os.getenv('CASSANDRA_SPECULATIVE_DELAY_MS', 0))  # idempotent 요청 추가 전송 지연 (0이면 비활성화)
+    CASSANDRA_SPECULATIVE_MAX_ATTEMPTS = int(os.getenv('CASSANDRA_SPECULATIVE_MAX_ATTEMPTS', 2))  # 추가 전송 최대 횟수
+
+    # trades 테이블 레이아웃: legacy (symbol 파티션), bucketed (symbol+일 파티션), dual (둘 다 기록)
+    TRADES_TABLE_LAYOUT = os.getenv('TRADES_TABLE_LAYOUT', 'legacy')
+
+    # Cassandra write stage
+    CASSANDRA_MAX_BATCH_ROWS = int(os.getenv('CASSANDRA_MAX_BATCH_ROWS', 50))  # 파티션당 UNLOGGED 배치 최대 행 수
+    CASSANDRA_MAX_IN_FLIGHT = int(os.getenv('CASSANDRA_MAX_IN_FLIGHT', 64))  # 동시 비동기 요청 상한
+    CASSANDRA_FLUSH_INTERVAL_MS = int(os.getenv('CASSANDRA_FLUSH_INTERVAL_MS', 50))  # 미완성 배치 최대 대기 시간
+    CASSANDRA_STATS_INTERVAL = int(os.getenv('CASSANDRA_STATS_INTERVAL', 30))  # 처리량/지연시간 리포트 간격 (초)
+    CASSANDRA_WRITE_RETRIES = int(os.getenv('CASSANDRA_WRITE_RETRIES', 3))  # 실패한 배치 재전송 횟수
+
+    # Redis configuration
+    REDIS_HOST = os.getenv('REDIS_HOST', 'redis')
+    REDIS_PORT = int(os.getenv('REDIS_PORT', '6379'))
+
+    # Processing mode: record (메시지 단위) 또는 batch (poll 단위 컬럼 처리)
+    PROCESSING_MODE = os.getenv('PROCESSING_MODE', 'record')
+    ENGINE = os.getenv('ENGINE', 'threaded')  # threaded (kafka-python + 스레드) 또는 asyncio (aiokafka + redis.asyncio)
+    POLL_MAX_RECORDS = int(os.getenv('POLL_MAX_RECORDS', 500))
+    POLL_TIMEOUT_MS = int(os.getenv('POLL_TIMEOUT_MS', 100))
+    INGEST_TIMESTAMP_MODE = os.getenv('INGEST_TIMESTAMP_MODE', 'batch')  # batch (메시지/poll당 한 번) 또는 trade (trade마다)
+
+    # Running averages window (초)
+    RUNNING_AVERAGE_SPAN = float(os.getenv('RUNNING_AVERAGE_SPAN', 15))
+
+    # OHLCV candles (빈 값이면 비활성화)
+    CANDLE_RESOLUTIONS = os.getenv('CANDLE_RESOLUTIONS', '1s,1m,5m')
+    CANDLE_CLOSE_GRACE_MS = int(os.getenv('CANDLE_CLOSE_GRACE_MS', 2000))  # 구간 종료 후 늦은 trade 대기 시간
+    CANDLE_FLUSH_INTERVAL_MS = int(os.getenv('CANDLE_FLUSH_INTERVAL_MS', 500))  # 닫힌 봉 저장/현재 봉 Redis 반영 간격
+    CANDLE_REDIS_TTL = int(os.getenv('CANDLE_REDIS_TTL', 600))  # 현재 봉 Redis 키 TTL (초)
+
+    # 최근 tick Redis Stream (ticks:{symbol}, TICK_STREAM_MAXLEN=0이면 비활성화)
+    TICK_STREAM_MAXLEN = int(os.getenv('TICK_STREAM_MAXLEN', 0))  # symbol별 최대 tick 수 (MAXLEN ~, 근사치)
+    TICK_STREAM_RETENTION_SECONDS = int(os.getenv('TICK_STREAM_RETENTION_SECONDS', 300))  # 이보다 오래된 tick 제거 (0이면 MAXLEN만)
+    TICK_STREAM_BATCH_SIZE = int(os.getenv('TICK_STREAM_BATCH_SIZE', 1000))  # 파이프라인 하나로 보낼 최대 tick 수
+    TICK_STREAM_FLUSH_MS = int(os.getenv('TICK_STREAM_FLUSH_MS', 200))  # tick 최대 대기 시간
+    TICK_STREAM_QUEUE_SIZE = int(os.getenv('TICK_STREAM_QUEUE_SIZE', 50000))  # 가득 차면 tick을 버림
+
+    # 최신 시세 캐시 last_price:{symbol} + pub/sub 채널 {QUOTE_CHANNEL_PREFIX}:{symbol}
+    QUOTES_ENABLED = os.getenv('QUOTES_ENABLED', 'true').lower() == 'true'
+    QUOTE_CHANNEL_PREFIX = os.getenv('QUOTE_CHANNEL_PREFIX', 'quotes')
+    QUOTE_REDIS_TTL = int(os.getenv('QUOTE_REDIS_TTL', 0))  # last_price 키 TTL (초, 0이면 만료 없음)
+    QUOTE_BATCH_SIZE = int(os.getenv('QUOTE_BATCH_SIZE', 500))  # 파이프라인 하나로 보낼 최대 시세 수
+    QUOTE_FLUSH_MS = int(os.getenv('QUOTE_FLUSH_MS', 100))  # 시세 최대 대기 시간
+    QUOTE_QUEUE_SIZE = int(os.getenv('QUOTE_QUEUE_SIZE', 10000))  # 가득 차면 시세 갱신을 버림
+
+    # Batch processing configuration
+    BATCH_SIZE = int(os.getenv('BATCH_SIZE', 100))  # 배치 크기
+    BATCH_INTERVAL = int(os.getenv('BATCH_INTERVAL', 10))  # 10초마다 배치 처리
+    BATCH_QUEUE_SIZE = int(os.getenv('BATCH_QUEUE_SIZE', 10000))
+    BATCH_QUEUE_POLICY = os.getenv('BATCH_QUEUE_POLICY', 'block')  # 큐가 가득 찼을 때: block (backpressure) 또는 drop
+    DAILY_PERSIST_INTERVAL = int(os.getenv('DAILY_PERSIST_INTERVAL', 300))  # 5분마다 Cassandra에 저장
+    DAILY_PERSIST_CHUNK_SIZE = int(os.getenv('DAILY_PERSIST_CHUNK_SIZE', 500))  # SSCAN/HGETALL 청크 크기
+    DAILY_PERSIST_CONCURRENCY = int(os.getenv('DAILY_PERSIST_CONCURRENCY', 32))  # 동시 Cassandra upsert 수
+
+    # Schema / decoding
+    SCHEMA_PATH = os.getenv('TRADES_SCHEMA_PATH', 'schemas/trades.avsc')
+    TRADE_DECODER = os.getenv('TRADE_DECODER', 'avro')  # avro, fastavro, native
+
+    # Prometheus metrics (워커 i는 METRICS_PORT + i, 0이면 비활성화)
+    METRICS_PORT = int(os.getenv('METRICS_PORT', 8001))
+
+    @classmethod
+    def get_kafka_bootstrap_servers(cls):
+        return f"{cls.KAFKA_SERVER}:{cls.KAFKA_PORT}"
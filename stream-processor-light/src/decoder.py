@@ -0,0 +1,116 @@
+import io
+import json
+import struct
+from typing import Dict
+
+import avro.schema
+import fastavro
+from avro.io import DatumReader, BinaryDecoder
+
+DECODER_MODES = ('avro', 'fastavro', 'native')
+
+_unpack_double = struct.Struct('<d').unpack_from
+
+
+class TradeDecoder:
+    """trades.avsc 메시지 디코더 (스키마당 reader 1개를 재사용)
+
+    mode:
+        avro     - avro 라이브러리, DatumReader를 메시지마다 만들지 않고 재사용
+        fastavro - fastavro.schemaless_reader (C 확장)
+        native   - trades.avsc 전용 수기 디코더, 메시지 memoryview에서 바로 읽음
+    """
+
+    def __init__(self, schema_path: str, mode: str = 'avro'):
+        if mode not in DECODER_MODES:
+            raise ValueError(f"Invalid decoder mode: {mode}. Must be one of {DECODER_MODES}")
+
+        with open(schema_path, 'r') as f:
+            schema_json = f.read()
+
+        self.mode = mode
+        self.schema = avro.schema.parse(schema_json)
+
+        if mode == 'avro':
+            self._reader = DatumReader(self.schema)
+            self.decode = self._decode_avro
+        elif mode == 'fastavro':
+            self._parsed_schema = fastavro.parse_schema(json.loads(schema_json))
+            self.decode = self._decode_fastavro
+        else:
+            self.decode = decode_trades_message
+
+    def _decode_avro(self, payload: bytes) -> Dict:
+        return self._reader.read(BinaryDecoder(io.BytesIO(payload)))
+
+    def _decode_fastavro(self, payload: bytes) -> Dict:
+        return fastavro.schemaless_reader(io.BytesIO(payload), self._parsed_schema)
+
+
+def _read_long(buf, pos: int):
+    """zig-zag varint long 디코딩, (값, 다음 위치) 반환"""
+    b = buf[pos]
+    pos += 1
+    n = b & 0x7F
+    shift = 7
+    while b & 0x80:
+        b = buf[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        shift += 7
+    return (n >> 1) ^ -(n & 1), pos
+
+
+def _read_string(buf, pos: int):
+    length, pos = _read_long(buf, pos)
+    end = pos + length
+    return str(buf[pos:end], 'utf-8'), end
+
+
+def decode_trades_message(payload) -> Dict:
+    """trades.avsc 전용 디코더. avro 라이브러리와 동일한 dict 구조를 반환"""
+    buf = memoryview(payload)
+    pos = 0
+    trades = []
+
+    while True:
+        count, pos = _read_long(buf, pos)
+        if count == 0:
+            break
+        if count < 0:
+            # 음수 블록: 항목 수 뒤에 블록 바이트 크기가 따라옴
+            count = -count
+            _, pos = _read_long(buf, pos)
+
+        for _ in range(count):
+            # c: union [array<union[null, string]>, null]
+            branch, pos = _read_long(buf, pos)
+            if branch == 0:
+                conditions = []
+                while True:
+                    item_count, pos = _read_long(buf, pos)
+                    if item_count == 0:
+                        break
+                    if item_count < 0:
+                        item_count = -item_count
+                        _, pos = _read_long(buf, pos)
+                    for _ in range(item_count):
+                        item_branch, pos = _read_long(buf, pos)
+                        if item_branch == 1:
+                            condition, pos = _read_string(buf, pos)
+                            conditions.append(condition)
+                        else:
+                            conditions.append(None)
+            else:
+                conditions = None
+
+            price, = _unpack_double(buf, pos)
+            symbol, pos = _read_string(buf, pos + 8)
+            timestamp, pos = _read_long(buf, pos)
+            volume, = _unpack_double(buf, pos)
+            pos += 8
+
+            trades.append({'c': conditions, 'p': price, 's': symbol, 't': timestamp, 'v': volume})
+
+    message_type, pos = _read_string(buf, pos)
+    return {'data': trades, 'type': message_type}
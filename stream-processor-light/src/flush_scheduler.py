@@ -0,0 +1,182 @@
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, List
+
+from offsets import RedisBarrier
+
+
+class FlushScheduler:
+    """크기 또는 마감 시간 중 먼저 도달하는 조건에서 배치를 flush하는 큐
+
+    소비 스레드가 put()으로 항목을 넣고, 백그라운드 스레드(run)는 Condition으로 잠들어 있다가
+    batch_size개가 쌓이거나 가장 오래된 항목이 interval초를 넘기면 깨어나 큐 전체를 한 번에 꺼낸다.
+    큐가 capacity에 도달하면 policy='block'은 자리가 날 때까지 put()을 블록하고(backpressure),
+    policy='drop'은 항목을 버리고 dropped 카운터를 올린다.
+    policy='block'에서 put_many()의 항목은 한 번에 추가되므로 같은 호출의 항목이 서로 다른 flush로 나뉘지 않는다.
+    (그만큼 capacity를 잠시 넘을 수 있음)
+    flush가 한 번이라도 실패하면 reset_failures() 전까지 이후 barrier도 모두 실패로 표시한다 (CassandraWriter와 동일).
+    """
+
+    def __init__(self, flush: Callable[[List], bool], batch_size: int = 100, interval: float = 10,
+                 capacity: int = 10000, policy: str = 'block', stats_interval: int = 30, name: str = 'redis'):
+        if policy not in ('block', 'drop'):
+            raise ValueError(f"Invalid flush policy: {policy}. Must be 'block' or 'drop'")
+        self.flush = flush
+        self.batch_size = batch_size
+        self.interval = interval
+        self.capacity = capacity
+        self.policy = policy
+        self.stats_interval = stats_interval
+        self.name = name
+
+        self._items = deque()
+        self._size = 0  # barrier를 제외한 항목 수
+        self._barriers = 0
+        self._oldest = None  # 가장 오래된 대기 항목의 도착 시각 (monotonic)
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._stopping = False
+        self._failed = False  # reset_failures() 전까지 이후 barrier도 모두 실패로 표시
+
+        self.enqueued = 0
+        self.dropped = 0
+        self.blocked = 0  # backpressure로 put()이 대기한 횟수
+        self.flushes = 0
+        self.flushed_items = 0
+        self.failed_flushes = 0
+        self._last_stats_time = time.monotonic()
+
+    def put(self, item) -> bool:
+        return self.put_many((item,)) == 1
+
+    def put_many(self, items: Iterable) -> int:
+        """항목들을 큐에 추가하고 실제로 추가된 개수를 반환 (policy='drop'에서 가득 차면 나머지는 버림)"""
+        added = 0
+        with self._lock:
+            if self.policy == 'block' and self._size >= self.capacity:
+                self.blocked += 1
+                self._ready.notify()
+                self._not_full.wait_for(lambda: self._size < self.capacity or self._stopping)
+            for item in items:
+                if self.policy == 'drop' and self._size >= self.capacity:
+                    self.dropped += 1
+                    continue
+                if self._oldest is None:
+                    self._oldest = time.monotonic()
+                self._items.append(item)
+                self._size += 1
+                added += 1
+
+            self.enqueued += added
+            if self._size >= self.batch_size:
+                self._ready.notify()
+        return added
+
+    def barrier(self) -> RedisBarrier:
+        """앞서 넣은 항목이 모두 flush되면 완료되는 barrier를 큐에 넣음 (용량 제한 없이 즉시 flush 요청)"""
+        barrier = RedisBarrier()
+        with self._lock:
+            self._items.append(barrier)
+            self._barriers += 1
+            self._ready.notify()
+        return barrier
+
+    def reset_failures(self):
+        """실패한 flush를 재처리하기로 한 뒤(offset rewind) 실패 상태를 초기화"""
+        with self._lock:
+            self._failed = False
+
+    def stop(self):
+        """남은 항목을 flush한 뒤 run()을 종료"""
+        with self._lock:
+            self._stopping = True
+            self._ready.notify_all()
+            self._not_full.notify_all()
+
+    @property
+    def depth(self) -> int:
+        return self._size
+
+    def _due(self) -> bool:
+        return (
+            self._stopping or self._barriers > 0 or self._size >= self.batch_size or
+            (self._oldest is not None and time.monotonic() - self._oldest >= self.interval)
+        )
+
+    def _timeout(self):
+        # 대기 항목이 없으면 put()/barrier()/stop()이 깨울 때까지 무기한 대기
+        if self._oldest is None:
+            return None
+        return max(0.0, self.interval - (time.monotonic() - self._oldest))
+
+    def run(self):
+        """백그라운드 flush 루프 (스레드 진입점)"""
+        while True:
+            with self._lock:
+                while not self._due():
+                    self._ready.wait(self._timeout())
+                items = self._items
+                self._items = deque()
+                self._size = 0
+                self._barriers = 0
+                self._oldest = None
+                stopping = self._stopping
+                self._not_full.notify_all()
+
+            self._drain(items)
+            self._maybe_report()
+            if stopping:
+                return
+
+    def _drain(self, items):
+        batch = []
+        for item in items:
+            if isinstance(item, RedisBarrier):
+                # 커밋 체크포인트: 앞선 항목을 즉시 반영하고, 그 전의 크기/마감 flush 실패까지 포함해 결과를 알림
+                if batch:
+                    self._flush(batch)
+                    batch = []
+                item.done(failed=self._failed)
+            else:
+                batch.append(item)
+        if batch:
+            self._flush(batch)
+
+    def _flush(self, batch: List) -> bool:
+        try:
+            ok = self.flush(batch) is not False
+        except Exception as e:
+            print(f"Error flushing {len(batch)} items ({self.name}): {e}")
+            ok = False
+        self.flushes += 1
+        self.flushed_items += len(batch)
+        if not ok:
+            self.failed_flushes += 1
+            self._failed = True
+        return ok
+
+    def stats(self) -> Dict:
+        return {
+            'depth': self._size,
+            'enqueued': self.enqueued,
+            'dropped': self.dropped,
+            'blocked': self.blocked,
+            'flushes': self.flushes,
+            'flushed_items': self.flushed_items,
+            'failed_flushes': self.failed_flushes,
+        }
+
+    def _maybe_report(self):
+        now = time.monotonic()
+        if now - self._last_stats_time < self.stats_interval:
+            return
+        self._last_stats_time = now
+
+        stats = self.stats()
+        print(
+            f"Flush scheduler ({self.name}): depth={stats['depth']}, flushes={stats['flushes']}, "
+            f"flushed={stats['flushed_items']}, failed={stats['failed_flushes']}, "
+            f"dropped={stats['dropped']}, blocked={stats['blocked']}"
+        )
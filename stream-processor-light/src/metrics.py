@@ -0,0 +1,187 @@
+import threading
+import time
+from collections import deque
+from typing import Dict
+
+from prometheus_client import REGISTRY, Counter, Histogram, start_http_server
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+
+class LatencyTracker:
+    """최근 요청들의 지연시간과 처리량을 집계하는 thread-safe 트래커"""
+
+    def __init__(self, window: int = 10000):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._units = 0
+        self._errors = 0
+        self._last_snapshot_time = time.monotonic()
+
+    def record(self, seconds: float, units: int = 1):
+        with self._lock:
+            self._samples.append(seconds)
+            self._units += units
+
+    def record_error(self):
+        with self._lock:
+            self._errors += 1
+
+    def snapshot(self) -> Dict:
+        """마지막 snapshot 이후의 처리량과 최근 지연시간 백분위수(ms)를 반환"""
+        with self._lock:
+            samples = sorted(self._samples)
+            units, errors = self._units, self._errors
+            self._samples.clear()
+            self._units = 0
+            self._errors = 0
+            now = time.monotonic()
+            elapsed = now - self._last_snapshot_time
+            self._last_snapshot_time = now
+
+        return {
+            'units': units,
+            'errors': errors,
+            'throughput': units / elapsed if elapsed > 0 else 0.0,
+            'p50_ms': _percentile(samples, 0.50) * 1000,
+            'p95_ms': _percentile(samples, 0.95) * 1000,
+            'p99_ms': _percentile(samples, 0.99) * 1000,
+        }
+
+
+def _percentile(sorted_samples, q: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, int(q * len(sorted_samples)))
+    return sorted_samples[index]
+
+
+# Prometheus 메트릭 (프로세스당 하나의 /metrics 엔드포인트, 워커는 METRICS_PORT + worker_index)
+# trade 단위 경로에서는 관측하지 않고, 메시지/배치/요청 단위로만 관측한다.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+PERSIST_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+DECODE_SECONDS = Histogram(
+    'stream_decode_seconds', 'Avro decode time per consumed batch (poll or flush interval)',
+    buckets=LATENCY_BUCKETS
+)
+DECODED_MESSAGES = Counter('stream_decoded_messages_total', 'Kafka messages decoded')
+DECODE_ERRORS = Counter('stream_decode_errors_total', 'Kafka messages that failed to decode')
+CASSANDRA_WRITE_SECONDS = Histogram(
+    'stream_cassandra_write_seconds', 'Cassandra write request latency (one UNLOGGED batch or single row)',
+    ['writer'], buckets=LATENCY_BUCKETS
+)
+CASSANDRA_WRITE_ROWS = Counter('stream_cassandra_write_rows_total', 'Rows written to Cassandra', ['writer'])
+CASSANDRA_WRITE_ERRORS = Counter(
+    'stream_cassandra_write_errors_total', 'Cassandra write requests failed after retries', ['writer']
+)
+CASSANDRA_REQUEST_SECONDS = Histogram(
+    'stream_cassandra_request_seconds',
+    'Cassandra driver request latency for every request sent by the session (including retries)',
+    buckets=LATENCY_BUCKETS
+)
+CASSANDRA_REQUEST_ERRORS = Counter(
+    'stream_cassandra_request_errors_total', 'Cassandra driver requests that failed', ['error']
+)
+REDIS_PIPELINE_SECONDS = Histogram(
+    'stream_redis_pipeline_seconds', 'Redis daily aggregate pipeline latency', buckets=LATENCY_BUCKETS
+)
+DROPPED_TRADES = Counter('stream_dropped_trades_total', 'Trades dropped because the Redis aggregate queue was full')
+DUPLICATE_AGGREGATE_TRADES = Counter(
+    'stream_duplicate_aggregate_trades_total',
+    'Trades skipped by the Redis aggregate script because their offset was already applied'
+)
+PERSIST_SECONDS = Histogram(
+    'stream_daily_persist_seconds', 'Daily aggregate persist cycle duration', buckets=PERSIST_BUCKETS
+)
+PERSISTED_AGGREGATES = Counter('stream_daily_persisted_total', 'Daily aggregates persisted to Cassandra')
+PERSIST_ERRORS = Counter(
+    'stream_daily_persist_errors_total',
+    'Daily aggregates that failed to persist to Cassandra (retried next cycle), plus failed persist cycles'
+)
+
+
+class StreamProcessorCollector:
+    """scrape 시점에 StreamProcessor 상태(큐 깊이, 스케줄러 카운터, in-flight, lag)를 읽어 내보내는 collector
+
+    값을 갱신하는 쪽(소비 루프, flush 스레드)은 아무것도 하지 않으므로 처리 경로 비용이 없다.
+    """
+
+    def __init__(self, processor):
+        self.processor = processor
+
+    def collect(self):
+        processor = self.processor
+        stats = processor.batch_queue.stats()
+
+        depth = GaugeMetricFamily('stream_batch_queue_depth', 'Items waiting in the Redis aggregate queue')
+        depth.add_metric([], stats['depth'])
+        yield depth
+
+        for name, key, documentation in (
+            ('stream_batch_queue_enqueued', 'enqueued', 'Items added to the Redis aggregate queue'),
+            ('stream_batch_queue_dropped', 'dropped', 'Items dropped because the Redis aggregate queue was full'),
+            ('stream_batch_queue_blocked', 'blocked', 'Puts that waited for space in the Redis aggregate queue'),
+            ('stream_batch_flushes', 'flushes', 'Redis aggregate batch flushes'),
+            ('stream_batch_flushed_items', 'flushed_items', 'Items flushed to Redis'),
+            ('stream_batch_failed_flushes', 'failed_flushes', 'Redis aggregate batch flushes that failed'),
+        ):
+            counter = CounterMetricFamily(name, documentation)
+            counter.add_metric([], stats[key])
+            yield counter
+
+        # best-effort 큐 (drop 정책): 최근 tick Stream, 최신 시세
+        for queue_name, queue in (('ticks', processor.tick_queue), ('quotes', processor.quote_queue)):
+            if queue is None:
+                continue
+            queue_stats = queue.stats()
+            queue_depth = GaugeMetricFamily(
+                f'stream_{queue_name}_queue_depth', f'Items waiting in the Redis {queue_name} queue'
+            )
+            queue_depth.add_metric([], queue_stats['depth'])
+            yield queue_depth
+            queue_dropped = CounterMetricFamily(
+                f'stream_{queue_name}_queue_dropped', f'Items dropped because the Redis {queue_name} queue was full'
+            )
+            queue_dropped.add_metric([], queue_stats['dropped'])
+            yield queue_dropped
+
+        in_flight = GaugeMetricFamily(
+            'stream_cassandra_in_flight', 'Cassandra write requests in flight', labels=['writer']
+        )
+        for writer in processor.writers:
+            in_flight.add_metric([writer.name], writer.in_flight)
+        yield in_flight
+
+        # 드라이버 연결 풀 상태 (token-aware 라우팅이 replica별로 요청을 고르게 분산하는지 확인)
+        get_pool_state = getattr(processor.session, 'get_pool_state', None)
+        if get_pool_state is not None:
+            host_in_flight = GaugeMetricFamily(
+                'stream_cassandra_host_in_flight', 'Cassandra driver requests in flight per host', labels=['host']
+            )
+            host_connections = GaugeMetricFamily(
+                'stream_cassandra_host_open_connections', 'Cassandra driver open connections per host',
+                labels=['host']
+            )
+            for host, state in get_pool_state().items():
+                host_in_flight.add_metric([str(host.endpoint)], sum(state['in_flights']))
+                host_connections.add_metric([str(host.endpoint)], state['open_count'])
+            yield host_in_flight
+            yield host_connections
+
+        # lag은 소비 루프가 LAG_REPORT_INTERVAL마다 계산한 값을 그대로 사용 (consumer는 thread-safe하지 않음)
+        lag = GaugeMetricFamily(
+            'stream_consumer_lag', 'Consumer lag per assigned partition (highwater - position)',
+            labels=['topic', 'partition']
+        )
+        for partition, value in processor.partition_lag.items():
+            lag.add_metric([processor.topic, str(partition)], value)
+        yield lag
+
+
+def start_metrics_server(processor, port: int):
+    """/metrics HTTP 엔드포인트 시작 (port가 0이면 비활성화)"""
+    if not port:
+        return
+    REGISTRY.register(StreamProcessorCollector(processor))
+    start_http_server(port)
+    print(f"Prometheus metrics listening on :{port}")
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""trades -> trades_by_day 마이그레이션 (token range 청크 병렬 복사)
+
+전체 Murmur3 token 공간을 --splits개의 구간으로 나누고, --concurrency개의 스레드가
+구간마다 trades를 페이지 단위로 읽어 trades_by_day에 비동기 배치로 쓴다.
+uuid를 그대로 옮기므로 다시 실행해도 같은 행이 된다. 완료된 구간은 --progress 파일에
+기록되어 중단 후 재실행하면 남은 구간만 복사한다.
+
+    python migrate_trades.py --splits 256 --concurrency 8
+    python migrate_trades.py --dry-run          # 구간별 행 수만 집계
+
+마이그레이션 중에는 TRADES_TABLE_LAYOUT=dual로 새 trade를 양쪽에 기록하고,
+완료 후 bucketed로 전환한다.
+"""
+
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Set, Tuple
+
+from cassandra_connection import connect_cassandra
+from cassandra_writer import CassandraWriter
+from config import Config
+
+MIN_TOKEN = -2 ** 63
+MAX_TOKEN = 2 ** 63 - 1
+
+
+def split_token_ranges(splits: int) -> List[Tuple[int, int]]:
+    """(MIN_TOKEN, MAX_TOKEN]을 splits개의 (start, end] 구간으로 균등 분할"""
+    step = (MAX_TOKEN - MIN_TOKEN) // splits
+    bounds = [MIN_TOKEN + step * i for i in range(splits)] + [MAX_TOKEN]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+class TradesMigration:
+    def __init__(self, session, concurrency: int, fetch_size: int, progress_path: str, dry_run: bool = False):
+        self.session = session
+        self.concurrency = concurrency
+        self.fetch_size = fetch_size
+        self.progress_path = progress_path
+        self.dry_run = dry_run
+        self._progress_lock = threading.Lock()
+
+        self.select_range = session.prepare("""
+            SELECT uuid, symbol, trade_conditions, price, volume, trade_timestamp, ingest_timestamp
+            FROM trades WHERE token(symbol) > ? AND token(symbol) <= ?
+        """)
+        self.select_range.fetch_size = fetch_size
+        self.select_range.is_idempotent = True  # CASSANDRA_SPECULATIVE_DELAY_MS 설정 시 느린 replica 대신 다른 replica에도 조회
+        # StreamProcessor.insert_trade_by_day와 같은 컬럼 순서
+        self.insert_trade_by_day = session.prepare("""
+            INSERT INTO trades_by_day (uuid, symbol, trade_conditions, price, volume,
+                                       trade_timestamp, ingest_timestamp, trade_date)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """)
+
+    def load_progress(self) -> Set[Tuple[int, int]]:
+        if not self.progress_path or not os.path.exists(self.progress_path):
+            return set()
+        with open(self.progress_path) as f:
+            return {tuple(int(token) for token in line.split(',')) for line in f if line.strip()}
+
+    def mark_done(self, token_range: Tuple[int, int]):
+        if not self.progress_path or self.dry_run:
+            return
+        with self._progress_lock, open(self.progress_path, 'a') as f:
+            f.write(f"{token_range[0]},{token_range[1]}\n")
+
+    def copy_range(self, token_range: Tuple[int, int]) -> int:
+        """한 token 구간을 복사하고 복사한 행 수를 반환 (쓰기 실패 시 예외)"""
+        # CassandraWriter는 스레드 하나에서만 add/flush해야 하므로 구간마다 따로 생성
+        writer = CassandraWriter(
+            self.session,
+            max_batch_rows=Config.CASSANDRA_MAX_BATCH_ROWS,
+            max_in_flight=max(1, Config.CASSANDRA_MAX_IN_FLIGHT // self.concurrency),
+            stats_interval=Config.CASSANDRA_STATS_INTERVAL,
+            max_retries=Config.CASSANDRA_WRITE_RETRIES,
+            name='migration'
+        )
+        rows = 0
+        for row in self.session.execute(self.select_range, token_range):
+            rows += 1
+            if self.dry_run:
+                continue
+            trade_date = row.trade_timestamp.date()
+            writer.add((row.symbol, trade_date), self.insert_trade_by_day, (
+                row.uuid,
+                row.symbol,
+                row.trade_conditions,
+                row.price,
+                row.volume,
+                row.trade_timestamp,
+                row.ingest_timestamp,
+                trade_date
+            ))
+
+        writer.flush()
+        barrier = writer.barrier()
+        barrier.wait()
+        if barrier.failed:
+            raise RuntimeError(f"writes failed for token range {token_range}")
+        return rows
+
+    def run(self, ranges: List[Tuple[int, int]]):
+        done = self.load_progress()
+        pending = [token_range for token_range in ranges if token_range not in done]
+        print(f"Migrating {len(pending)} of {len(ranges)} token ranges "
+              f"(concurrency={self.concurrency}, dry_run={self.dry_run})")
+
+        started = time.time()
+        total_rows = 0
+        failed = 0
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = {executor.submit(self.copy_range, token_range): token_range for token_range in pending}
+            for completed, future in enumerate(as_completed(futures), 1):
+                token_range = futures[future]
+                try:
+                    rows = future.result()
+                except Exception as e:
+                    failed += 1
+                    print(f"Error migrating token range {token_range}: {e}")
+                    continue
+                total_rows += rows
+                self.mark_done(token_range)
+                elapsed = time.time() - started
+                print(f"[{completed}/{len(pending)}] {rows} rows from ({token_range[0]}, {token_range[1]}] "
+                      f"- total {total_rows} rows, {total_rows / elapsed:.0f} rows/s")
+
+        print(f"Migrated {total_rows} rows in {time.time() - started:.1f}s ({failed} ranges failed)")
+        return failed == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Copy trades into the (symbol, trade_date) bucketed trades_by_day table",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('--splits', type=int, default=256, help="Number of token ranges")
+    parser.add_argument('--concurrency', type=int, default=8, help="Token ranges copied in parallel")
+    parser.add_argument('--fetch-size', type=int, default=5000, help="Rows per page when reading trades")
+    parser.add_argument('--progress', default='migrate_trades.progress',
+                        help="File recording completed token ranges (resume support)")
+    parser.add_argument('--dry-run', action='store_true', help="Only count rows per token range")
+    args = parser.parse_args()
+
+    cluster, session = connect_cassandra(Config.CASSANDRA_KEYSPACE)
+    try:
+        migration = TradesMigration(session, args.concurrency, args.fetch_size, args.progress, args.dry_run)
+        ok = migration.run(split_token_ranges(args.splits))
+    finally:
+        cluster.shutdown()
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from kafka import TopicPartition
+
+APPLIED_OFFSETS_PREFIX = 'stream_offsets'
+
+
+def applied_offsets_key(group_id: str, topic: str) -> str:
+    """파티션별로 Redis 집계에 마지막으로 반영된 offset을 보관하는 해시 키"""
+    return f"{APPLIED_OFFSETS_PREFIX}:{group_id}:{topic}"
+
+
+class RedisBarrier:
+    """batch_queue에 넣는 표식 — batch_processor가 앞선 항목을 모두 Redis에 반영하면 완료"""
+
+    __slots__ = ('event', 'failed')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.failed = False
+
+    def done(self, failed: bool = False):
+        self.failed = failed
+        self.event.set()
+
+    def is_done(self) -> bool:
+        return self.event.is_set()
+
+    def wait(self, timeout: float = None) -> bool:
+        return self.event.wait(timeout)
+
+
+class Checkpoint:
+    """커밋 후보 offset과, 그 offset까지의 쓰기를 덮는 barrier 목록"""
+
+    __slots__ = ('positions', 'barriers')
+
+    def __init__(self, positions: Dict[TopicPartition, int], barriers: List):
+        self.positions = positions
+        self.barriers = barriers
+
+    def is_done(self) -> bool:
+        return all(barrier.is_done() for barrier in self.barriers)
+
+    def is_failed(self) -> bool:
+        return any(barrier.failed for barrier in self.barriers)
+
+
+class OffsetTracker:
+    """at-least-once 모드의 offset 관리
+
+    처리한 메시지의 다음 offset을 기록해 두었다가 checkpoint()로 쓰기 barrier와 묶고,
+    barrier가 모두 완료된 체크포인트만 순서대로 커밋 대상으로 내보낸다.
+    """
+
+    def __init__(self):
+        self.positions: Dict[TopicPartition, int] = {}
+        self.committed: Dict[TopicPartition, int] = {}
+        self.checkpoints = deque()
+        self._checkpointed: Dict[TopicPartition, int] = {}
+
+    def track(self, topic_partition: TopicPartition, offset: int):
+        self.positions[topic_partition] = offset + 1
+
+    def has_progress(self) -> bool:
+        """마지막 체크포인트 이후 새로 처리한 메시지가 있는지"""
+        return self.positions != self._checkpointed
+
+    def checkpoint(self, barriers: List) -> Checkpoint:
+        checkpoint = Checkpoint(dict(self.positions), barriers)
+        self._checkpointed = checkpoint.positions
+        self.checkpoints.append(checkpoint)
+        return checkpoint
+
+    def pop_completed(self) -> Tuple[Optional[Dict[TopicPartition, int]], bool]:
+        """완료된 체크포인트를 순서대로 꺼내 (커밋할 offset, 실패 여부)를 반환
+
+        실패한 체크포인트를 만나면 그 이후 것은 커밋하면 안 되므로 (None, True)를 반환한다.
+        """
+        ready = None
+        while self.checkpoints and self.checkpoints[0].is_done():
+            checkpoint = self.checkpoints.popleft()
+            if checkpoint.is_failed():
+                return None, True
+            ready = checkpoint
+
+        if ready is None:
+            return None, False
+
+        positions = {
+            topic_partition: offset for topic_partition, offset in ready.positions.items()
+            if self.committed.get(topic_partition) != offset
+        }
+        return positions, False
+
+    def mark_committed(self, positions: Dict[TopicPartition, int]):
+        self.committed.update(positions)
+
+    def rewind(self) -> Dict[TopicPartition, int]:
+        """대기 중인 체크포인트를 버리고 마지막 커밋 위치를 반환 (그 위치부터 재처리)"""
+        self.checkpoints.clear()
+        self.positions = dict(self.committed)
+        self._checkpointed = dict(self.positions)
+        return dict(self.committed)
+
+    def forget(self, partitions):
+        """리밸런스로 회수된 파티션의 상태 제거"""
+        for topic_partition in partitions:
+            self.positions.pop(topic_partition, None)
+            self.committed.pop(topic_partition, None)
+            self._checkpointed.pop(topic_partition, None)
+        for checkpoint in self.checkpoints:
+            for topic_partition in partitions:
+                checkpoint.positions.pop(topic_partition, None)
@@ -0,0 +1,97 @@
+from typing import Dict, List, Tuple
+
+from trade_batch import utc_date
+
+LAST_PRICE_PREFIX = 'last_price'
+
+# last_price:{symbol} 해시를 갱신하고 변경 내용을 채널에 PUBLISH
+# 더 최근 거래 시각(ts)일 때만 반영하므로 여러 워커/재처리로 순서가 뒤바뀌어도 최신 값이 유지된다.
+# day change는 전일 마지막 가격(prev_close) 대비, 처음 보는 symbol이면 당일 첫 가격(day_open) 대비.
+_UPDATE_QUOTE = """
+local stored_ts = redis.call('HGET', KEYS[1], 'ts')
+if stored_ts and tonumber(ARGV[3]) <= tonumber(stored_ts) then
+    return 0
+end
+
+local price = tonumber(ARGV[1])
+local day_open = redis.call('HGET', KEYS[1], 'day_open')
+local prev_close = redis.call('HGET', KEYS[1], 'prev_close')
+if redis.call('HGET', KEYS[1], 'day') ~= ARGV[4] then
+    prev_close = redis.call('HGET', KEYS[1], 'price')
+    day_open = ARGV[1]
+end
+
+local reference = tonumber(prev_close or day_open)
+local change = price - reference
+local change_pct = 0
+if reference ~= 0 then
+    change_pct = change / reference * 100
+end
+
+redis.call('HSET', KEYS[1], 'price', ARGV[1], 'volume', ARGV[2], 'ts', ARGV[3], 'day', ARGV[4],
+           'day_open', day_open, 'day_change', change, 'day_change_pct', change_pct)
+if prev_close then
+    redis.call('HSET', KEYS[1], 'prev_close', prev_close)
+end
+if tonumber(ARGV[7]) > 0 then
+    redis.call('EXPIRE', KEYS[1], ARGV[7])
+end
+
+redis.call('PUBLISH', ARGV[6], cjson.encode({
+    symbol = ARGV[5], price = price, volume = tonumber(ARGV[2]), ts = tonumber(ARGV[3]),
+    day_change = change, day_change_pct = change_pct
+}))
+return 1
+"""
+
+
+def last_price_key(symbol: str) -> str:
+    """Redis 키 패턴: last_price:{symbol} (price, volume, ts, day, day_open, prev_close, day_change, day_change_pct)"""
+    return f"{LAST_PRICE_PREFIX}:{symbol}"
+
+
+def quote_channel(prefix: str, symbol: str) -> str:
+    """시세 변경 pub/sub 채널 ({prefix}:{symbol}, 전체 구독은 PSUBSCRIBE {prefix}:*)"""
+    return f"{prefix}:{symbol}"
+
+
+class QuotePublisher:
+    """symbol별 최신 시세를 last_price 해시에 반영하고 pub/sub으로 알림 (FlushScheduler의 flush 함수)
+
+    큐 항목은 마이크로 배치(record 모드는 메시지, batch 모드는 poll)마다 symbol당 하나이며,
+    flush 시 symbol별 가장 최근 거래만 남겨 Lua 스크립트 호출 하나씩을 파이프라인으로 보낸다.
+    """
+
+    def __init__(self, redis_client, channel_prefix: str = 'quotes', ttl: int = 0):
+        self.redis_client = redis_client
+        self.channel_prefix = channel_prefix
+        self.ttl = ttl
+        self.update_quote = redis_client.register_script(_UPDATE_QUOTE)
+
+    def calls(self, quotes: List[Tuple[str, int, float, float]]) -> List[Tuple[List, List]]:
+        """quotes: (symbol, trade_timestamp epoch ms, price, volume) -> symbol별 최신 시세의 스크립트 (keys, args)"""
+        latest: Dict[str, Tuple[str, int, float, float]] = {}
+        for quote in quotes:
+            current = latest.get(quote[0])
+            if current is None or quote[1] >= current[1]:
+                latest[quote[0]] = quote
+
+        return [
+            ([last_price_key(symbol)],
+             [price, volume, timestamp, utc_date(timestamp).isoformat(), symbol,
+              quote_channel(self.channel_prefix, symbol), self.ttl])
+            for symbol, timestamp, price, volume in latest.values()
+        ]
+
+    def write(self, quotes: List[Tuple[str, int, float, float]]) -> bool:
+        calls = self.calls(quotes)
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for keys, args in calls:
+                self.update_quote(keys=keys, args=args, client=pipe)
+            pipe.execute()
+            return True
+
+        except Exception as e:
+            print(f"Error updating last prices for {len(calls)} symbols: {e}")
+            return False
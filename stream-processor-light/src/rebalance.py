@@ -0,0 +1,44 @@
+import json
+from typing import Dict, List, Tuple
+
+from kafka import ConsumerRebalanceListener
+
+PARTITION_STATE_PREFIX = 'running_avg_state'
+
+
+class PartitionStateListener(ConsumerRebalanceListener):
+    """리밸런스 시 StreamProcessor에 회수/할당 파티션을 전달하는 리스너
+
+    kafka-python은 poll() 도중 소비 스레드에서 이 콜백을 호출하므로
+    콜백 안에서 대기 중인 쓰기를 마무리해도 다른 워커와 경합하지 않는다.
+    """
+
+    def __init__(self, processor):
+        self.processor = processor
+
+    def on_partitions_revoked(self, revoked):
+        self.processor.on_partitions_revoked(revoked)
+
+    def on_partitions_assigned(self, assigned):
+        self.processor.on_partitions_assigned(assigned)
+
+
+def partition_state_key(topic: str, partition: int) -> str:
+    return f"{PARTITION_STATE_PREFIX}:{topic}:{partition}"
+
+
+def save_partition_state(redis_client, topic: str, partition: int,
+                         state: Dict[str, List[Tuple[float, float]]], ttl: int):
+    """회수된 파티션의 symbol 윈도우를 다음 소유 워커가 이어받도록 Redis에 저장"""
+    if state:
+        redis_client.set(partition_state_key(topic, partition), json.dumps(state), ex=ttl)
+
+
+def load_partition_state(redis_client, topic: str, partition: int) -> Dict[str, List[Tuple[float, float]]]:
+    """이전 소유 워커가 남긴 symbol 윈도우를 가져오고 키를 삭제"""
+    key = partition_state_key(topic, partition)
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.get(key)
+    pipe.delete(key)
+    raw, _ = pipe.execute()
+    return json.loads(raw) if raw else {}
@@ -0,0 +1,107 @@
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class SlidingWindow:
+    """시간 기반 슬라이딩 윈도우 (price*volume 합계와 건수를 누적 유지)
+
+    항목은 도착 순서대로 오른쪽에 추가되고 오래된 항목은 왼쪽에서 제거되므로
+    추가/제거 모두 amortized O(1)이다. 순서가 뒤바뀐 trade는 앞선 항목이
+    제거될 때 함께 제거된다.
+    """
+
+    __slots__ = ('span', '_entries', '_sum', '_count')
+
+    def __init__(self, span: float = 15.0):
+        self.span = span
+        self._entries = deque()  # (epoch seconds, price * volume)
+        self._sum = 0.0
+        self._count = 0
+
+    def append(self, timestamp: float, price_volume: float):
+        self._entries.append((timestamp, price_volume))
+        self._sum += price_volume
+        self._count += 1
+
+    def extend(self, timestamps: Iterable[float], price_volumes: Iterable[float]):
+        for timestamp, price_volume in zip(timestamps, price_volumes):
+            self._entries.append((timestamp, price_volume))
+            self._sum += price_volume
+            self._count += 1
+
+    def evict(self, now: float):
+        """now 기준 span초보다 오래된 항목 제거"""
+        entries = self._entries
+        cutoff = now - self.span
+        while entries and entries[0][0] < cutoff:
+            _, price_volume = entries.popleft()
+            self._sum -= price_volume
+            self._count -= 1
+
+        if not self._count:
+            # 부동소수점 누적 오차 초기화
+            self._sum = 0.0
+
+    def average(self) -> Optional[float]:
+        """윈도우 내 price*volume 평균 (비어 있으면 None)"""
+        if not self._count:
+            return None
+        return self._sum / self._count
+
+    def entries(self) -> List[Tuple[float, float]]:
+        return list(self._entries)
+
+    def totals(self) -> Tuple[float, int]:
+        """(price*volume 합계, 건수)"""
+        return self._sum, self._count
+
+    def __len__(self) -> int:
+        return self._count
+
+
+class PartitionedWindows:
+    """Kafka 파티션별 symbol 윈도우
+
+    윈도우를 파티션 단위로 보관해 리밸런스 때 회수된 파티션의 상태만
+    내보내고(export), 새로 할당된 파티션의 상태를 가져올(load) 수 있다.
+    symbol 평균은 이 워커가 가진 모든 파티션의 누적 합계를 합쳐 계산한다.
+    """
+
+    def __init__(self, span: float = 15.0):
+        self.span = span
+        self._partitions: Dict[int, Dict[str, SlidingWindow]] = {}
+
+    def window(self, partition: int, symbol: str) -> SlidingWindow:
+        windows = self._partitions.get(partition)
+        if windows is None:
+            windows = self._partitions[partition] = {}
+        window = windows.get(symbol)
+        if window is None:
+            window = windows[symbol] = SlidingWindow(self.span)
+        return window
+
+    def averages(self, now: float) -> Dict[str, float]:
+        """symbol별 price*volume 평균 (만료 항목 제거 후 계산)"""
+        totals: Dict[str, List] = {}
+        for windows in self._partitions.values():
+            for symbol, window in windows.items():
+                window.evict(now)
+                price_volume_sum, count = window.totals()
+                if count:
+                    total = totals.setdefault(symbol, [0.0, 0])
+                    total[0] += price_volume_sum
+                    total[1] += count
+        return {symbol: total[0] / total[1] for symbol, total in totals.items()}
+
+    def export_partition(self, partition: int) -> Dict[str, List[Tuple[float, float]]]:
+        """파티션 윈도우를 직렬화 가능한 형태로 꺼내고 로컬 상태에서 제거"""
+        windows = self._partitions.pop(partition, {})
+        return {symbol: window.entries() for symbol, window in windows.items() if len(window)}
+
+    def load_partition(self, partition: int, state: Dict[str, List[Tuple[float, float]]]):
+        for symbol, entries in state.items():
+            window = self.window(partition, symbol)
+            window.extend((entry[0] for entry in entries), (entry[1] for entry in entries))
+
+    def partitions(self) -> List[int]:
+        return list(self._partitions)
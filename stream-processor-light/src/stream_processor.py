@@ -1,83 +1,255 @@
 import json
+import signal
 import time
 import uuid
-import io
 import threading
 from datetime import datetime, date
 from typing import Dict, List
-from queue import Queue, Empty
-
-import avro.schema
-from avro.io import DatumReader, BinaryDecoder
-from cassandra.cluster import Cluster
-from cassandra.auth import PlainTextAuthProvider
-from kafka import KafkaConsumer
-import pandas as pd
+
+from cassandra.concurrent import execute_concurrent_with_args
+from kafka import KafkaConsumer, TopicPartition
+from kafka.structs import OffsetAndMetadata
 import redis
-from dotenv import load_dotenv
-import os
 
-# Load environment variables
-load_dotenv()
+from config import Config
+from cassandra_connection import connect_cassandra
+from cassandra_writer import CassandraWriter
+from decoder import TradeDecoder
+from trade_batch import TradeBatch, utc_date
+from sliding_window import PartitionedWindows
+from rebalance import PartitionStateListener, load_partition_state, save_partition_state
+from offsets import OffsetTracker, applied_offsets_key
+from flush_scheduler import FlushScheduler
+from candles import CandleAggregator, candle_key, parse_resolutions
+from timeuuid import TimeUUIDGenerator, trade_uuid
+from tick_streams import TickStreamWriter
+from quotes import QuotePublisher
+from metrics import (
+    DECODE_ERRORS, DECODE_SECONDS, DECODED_MESSAGES, DROPPED_TRADES, DUPLICATE_AGGREGATE_TRADES,
+    PERSIST_ERRORS, PERSIST_SECONDS, PERSISTED_AGGREGATES, REDIS_PIPELINE_SECONDS, start_metrics_server
+)
+from worker_pool import WorkerSupervisor
+from aggregates import (
+    APPLY_DAILY_AGGREGATES, DAILY_AGG_DIRTY_KEY, DAILY_AGG_PERSISTING_KEY,
+    DailyAggregate, apply_daily_aggregates_args, daily_aggregate_key
+)
 
 class StreamProcessor:
-    def __init__(self):
-        # Load Avro schema
-        with open('schemas/trades.avsc', 'r') as f:
-            self.schema = avro.schema.parse(f.read())
+    # trades/candles 쓰기 스테이지 (asyncio 엔진은 소비 루프를 막지 않는 writer로 교체)
+    writer_class = CassandraWriter
+
+    def __init__(self, worker_index: int = 0):
+        # 워커 번호 (WorkerSupervisor가 여러 프로세스를 띄울 때 0..N-1)
+        self.worker_index = worker_index
+        
+        # SIGTERM/SIGINT 시 설정: 소비 루프와 persist 스레드가 멈추고 run()이 종료 절차를 수행
+        self.stopping = threading.Event()
+        self.shutdown_timeout = Config.SHUTDOWN_TIMEOUT
+        
+        # Load Avro schema (스키마당 디코더 1개 재사용)
+        self.decoder = TradeDecoder(Config.SCHEMA_PATH, Config.TRADE_DECODER)
+        self.schema = self.decoder.schema
         
         # Initialize Kafka consumer
-        self.consumer = KafkaConsumer(
-            'market',
-            bootstrap_servers=f"{os.getenv('KAFKA_SERVER')}:{os.getenv('KAFKA_PORT')}",
-            group_id='stream-processor-group',
-            auto_offset_reset='latest',
-            enable_auto_commit=True
-        )
+        # consumer_timeout_ms: 메시지가 없을 때도 주기적으로 빠져나와 대기 중인 Cassandra 배치를 flush
+        # COMMIT_MODE=at_least_once: Cassandra/Redis 쓰기가 끝난 offset만 수동 커밋
+        self.topic = Config.KAFKA_TOPIC
+        self.commit_mode = Config.COMMIT_MODE
+        if self.commit_mode not in ('auto', 'at_least_once'):
+            raise ValueError(f"Invalid COMMIT_MODE: {self.commit_mode}. Must be 'auto' or 'at_least_once'")
+        self.at_least_once = self.commit_mode == 'at_least_once'
+        self.consumer = self.create_consumer()
+        self.offsets = OffsetTracker()
+        self.commit_interval = Config.COMMIT_INTERVAL_MS / 1000
+        self.last_checkpoint_time = time.time()
+        
+        # 파티션별로 Redis 집계에 이미 반영된 마지막 offset (재처리 시 중복 반영 방지)
+        self.applied_offsets_key = applied_offsets_key(Config.KAFKA_GROUP_ID, self.topic)
+        self.applied_offsets: Dict[int, int] = {}
         
         # Initialize Cassandra connection
-        auth_provider = PlainTextAuthProvider(
-            username=os.getenv('CASSANDRA_USERNAME', 'cassandra'),
-            password=os.getenv('CASSANDRA_PASSWORD', 'cassandra')
-        )
-        self.cluster = Cluster(
-            [os.getenv('CASSANDRA_HOST', 'cassandra')],
-            auth_provider=auth_provider
-        )
-        self.session = self.cluster.connect('market')
+        self.cluster, self.session = self.connect_cassandra()
         
         # Initialize Redis connection
-        self.redis_client = redis.Redis(
-            host=os.getenv('REDIS_HOST', 'redis'),
-            port=int(os.getenv('REDIS_PORT', '6379')),
-            decode_responses=True
-        )
+        self.redis_client = self.create_redis_client()
+        self.apply_daily_aggregates = self.redis_client.register_script(APPLY_DAILY_AGGREGATES)
         
         # Prepare Cassandra statements
+        # TRADES_TABLE_LAYOUT: legacy (trades), bucketed (trades_by_day), dual (마이그레이션 중 양쪽 모두)
+        self.trades_table_layout = Config.TRADES_TABLE_LAYOUT
+        if self.trades_table_layout not in ('legacy', 'bucketed', 'dual'):
+            raise ValueError(f"Invalid TRADES_TABLE_LAYOUT: {self.trades_table_layout}. "
+                             f"Must be 'legacy', 'bucketed' or 'dual'")
+        self.write_legacy_trades = self.trades_table_layout in ('legacy', 'dual')
+        self.write_bucketed_trades = self.trades_table_layout in ('bucketed', 'dual')
         self.prepare_statements()
         
-        # Initialize running averages tracking
-        self.running_averages = {}
+        # trades.uuid는 메시지 위치(파티션, offset, 순번)로 정해지는 TimeUUID라 재처리해도 같은 행을 덮어씀
+        # 메시지 위치를 모르는 호출(trade_id 없이 process_trade)만 카운터 생성기를 사용 (uuid4의 os.urandom 호출 없음)
+        self.trade_ids = TimeUUIDGenerator()
+        # INGEST_TIMESTAMP_MODE: batch (메시지/poll당 한 번) 또는 trade (trade마다)
+        # ingest_timestamp는 epoch ms 정수로 전달 (datetime 생성/직렬화 비용 제거)
+        self.ingest_timestamp_mode = Config.INGEST_TIMESTAMP_MODE
+        if self.ingest_timestamp_mode not in ('batch', 'trade'):
+            raise ValueError(f"Invalid INGEST_TIMESTAMP_MODE: {self.ingest_timestamp_mode}. "
+                             f"Must be 'batch' or 'trade'")
+        
+        # Subscribe with a rebalance listener (회수 파티션의 쓰기 마무리 + symbol 상태 인계)
+        self.consumer.subscribe([self.topic], listener=self.create_rebalance_listener())
+        self.partition_lag: Dict[int, int] = {}
+        self.lag_report_interval = Config.LAG_REPORT_INTERVAL
+        self.last_lag_report_time = time.time()
+        
+        # Batched async write stage for trades (symbol 파티션별 UNLOGGED 배치)
+        self.trade_writer = self.create_writer('trades')
+        
+        # OHLCV 봉 (CANDLE_RESOLUTIONS가 비어 있으면 비활성화): 닫힌 봉은 candles 테이블, 진행 중인 봉은 Redis
+        resolutions = parse_resolutions(Config.CANDLE_RESOLUTIONS)
+        self.candles = CandleAggregator(resolutions, grace_ms=Config.CANDLE_CLOSE_GRACE_MS) if resolutions else None
+        self.candle_writer = self.create_writer('candles')
+        self.writers = [self.trade_writer, self.candle_writer]
+        self.candle_flush_interval = Config.CANDLE_FLUSH_INTERVAL_MS / 1000
+        self.candle_redis_ttl = Config.CANDLE_REDIS_TTL
+        self.last_candle_flush_time = time.time()
+        self.flush_interval = Config.CASSANDRA_FLUSH_INTERVAL_MS / 1000
+        self.last_flush_time = time.time()
+        self.rebalance_timeout = Config.REBALANCE_FLUSH_TIMEOUT
+        
+        # Processing mode: record (메시지 단위) 또는 batch (poll 단위 컬럼 처리)
+        self.processing_mode = Config.PROCESSING_MODE
+        if self.processing_mode not in ('record', 'batch'):
+            raise ValueError(f"Invalid PROCESSING_MODE: {self.processing_mode}. Must be 'record' or 'batch'")
+        self.poll_max_records = Config.POLL_MAX_RECORDS
+        self.poll_timeout_ms = Config.POLL_TIMEOUT_MS
+        
+        # record 모드의 decode 시간은 누적해 두었다가 flush 주기마다 한 번만 메트릭에 반영
+        self.decode_seconds = 0.0
+        self.decoded_messages = 0
+        
+        # Initialize running averages tracking (partition -> symbol -> SlidingWindow)
+        self.running_average_span = Config.RUNNING_AVERAGE_SPAN
+        self.running_averages = PartitionedWindows(self.running_average_span)
         self.last_aggregate_time = time.time()
         
         # Thread-safe batch processing for Redis updates
-        self.batch_queue = Queue(maxsize=10000)  # Thread-safe queue
-        self.batch_size = int(os.getenv('BATCH_SIZE', 100))  # 배치 크기
-        self.batch_interval = int(os.getenv('BATCH_INTERVAL', 10))  # 10초마다 배치 처리
+        # BATCH_SIZE개가 쌓이거나 가장 오래된 항목이 BATCH_INTERVAL초를 넘기면 flush
+        self.batch_size = Config.BATCH_SIZE  # 배치 크기
+        self.batch_interval = Config.BATCH_INTERVAL  # 최대 10초 안에 배치 처리
+        self.batch_queue = FlushScheduler(
+            self.update_redis_aggregates,
+            batch_size=self.batch_size,
+            interval=self.batch_interval,
+            capacity=Config.BATCH_QUEUE_SIZE,
+            # at-least-once 모드에서는 집계를 버릴 수 없으므로 항상 block
+            policy='block' if self.at_least_once else Config.BATCH_QUEUE_POLICY,
+            stats_interval=Config.CASSANDRA_STATS_INTERVAL,
+            name='redis-aggregates'
+        )
+        # record 모드에서 현재 메시지의 (symbol, 거래일)별 집계 델타 (메시지가 끝나면 한 번에 큐에 넣음)
+        self.pending_aggregates: Dict[tuple, DailyAggregate] = {}
+        
+        # 최근 tick을 symbol별 capped Redis Stream에 추가 (TICK_STREAM_MAXLEN=0이면 비활성화)
+        # 실시간 조회용 best-effort 데이터이므로 큐가 가득 차면 소비 루프를 막지 않고 버림
+        self.tick_queue = None
+        if Config.TICK_STREAM_MAXLEN > 0:
+            self.tick_writer = TickStreamWriter(
+                self.redis_client, Config.TICK_STREAM_MAXLEN, Config.TICK_STREAM_RETENTION_SECONDS
+            )
+            self.tick_queue = FlushScheduler(
+                self.tick_writer.write,
+                batch_size=Config.TICK_STREAM_BATCH_SIZE,
+                interval=Config.TICK_STREAM_FLUSH_MS / 1000,
+                capacity=Config.TICK_STREAM_QUEUE_SIZE,
+                policy='drop',
+                stats_interval=Config.CASSANDRA_STATS_INTERVAL,
+                name='tick-streams'
+            )
+        
+        # symbol별 최신 시세 last_price:{symbol} + pub/sub 알림 (마이크로 배치마다 symbol당 한 번)
+        # pending_quotes: record 모드에서 현재 메시지의 symbol별 최신 trade
+        self.quote_queue = None
+        self.pending_quotes: Dict[str, tuple] = {}
+        if Config.QUOTES_ENABLED:
+            self.quote_publisher = QuotePublisher(
+                self.redis_client, Config.QUOTE_CHANNEL_PREFIX, Config.QUOTE_REDIS_TTL
+            )
+            self.quote_queue = FlushScheduler(
+                self.quote_publisher.write,
+                batch_size=Config.QUOTE_BATCH_SIZE,
+                interval=Config.QUOTE_FLUSH_MS / 1000,
+                capacity=Config.QUOTE_QUEUE_SIZE,
+                policy='drop',
+                stats_interval=Config.CASSANDRA_STATS_INTERVAL,
+                name='quotes'
+            )
         
         # Daily aggregation persistence
         self.last_daily_persist_time = time.time()
-        self.daily_persist_interval = int(os.getenv('DAILY_PERSIST_INTERVAL', 300))  # 5분마다 Cassandra에 저장
+        self.daily_persist_interval = Config.DAILY_PERSIST_INTERVAL  # 5분마다 Cassandra에 저장
+        self.daily_persist_chunk_size = Config.DAILY_PERSIST_CHUNK_SIZE
+        self.daily_persist_concurrency = Config.DAILY_PERSIST_CONCURRENCY
         
-        # Start background thread for batch processing
-        self.batch_thread = threading.Thread(target=self.batch_processor, daemon=True)
-        self.batch_thread.start()
+        self.start_background()
         
-        # Start background thread for daily aggregation persistence
-        self.daily_persist_thread = threading.Thread(target=self.daily_persist_processor, daemon=True)
-        self.daily_persist_thread.start()
+        # Prometheus /metrics (워커마다 METRICS_PORT + worker_index)
+        start_metrics_server(self, Config.METRICS_PORT + worker_index if Config.METRICS_PORT else 0)
         
-        print("StreamProcessor initialized with Redis daily aggregation")
+        print(f"StreamProcessor worker {self.worker_index} initialized with Redis daily aggregation")
+
+    # 외부 연결 생성 (benchmarks/replay_benchmark.py는 이 메서드들을 재정의해 fake로 대체)
+    def create_consumer(self) -> KafkaConsumer:
+        return KafkaConsumer(
+            bootstrap_servers=Config.get_kafka_bootstrap_servers(),
+            group_id=Config.KAFKA_GROUP_ID,
+            client_id=f"stream-processor-{self.worker_index}",
+            auto_offset_reset='latest',
+            enable_auto_commit=not self.at_least_once,
+            consumer_timeout_ms=Config.CASSANDRA_FLUSH_INTERVAL_MS
+        )
+
+    def create_rebalance_listener(self):
+        return PartitionStateListener(self)
+
+    def connect_cassandra(self):
+        return connect_cassandra(Config.CASSANDRA_KEYSPACE)
+
+    def create_redis_client(self) -> redis.Redis:
+        return redis.Redis(
+            host=Config.REDIS_HOST,
+            port=Config.REDIS_PORT,
+            decode_responses=True
+        )
+
+    def create_writer(self, name: str) -> CassandraWriter:
+        return self.writer_class(
+            self.session,
+            max_batch_rows=Config.CASSANDRA_MAX_BATCH_ROWS,
+            max_in_flight=Config.CASSANDRA_MAX_IN_FLIGHT,
+            stats_interval=Config.CASSANDRA_STATS_INTERVAL,
+            max_retries=Config.CASSANDRA_WRITE_RETRIES,
+            name=name
+        )
+
+    def start_background(self):
+        """Redis 집계/tick/시세 flush 스레드와 일별 집계 저장 스레드 시작"""
+        self.batch_thread = threading.Thread(target=self.batch_queue.run, daemon=True)
+        self.batch_thread.start()
+        self.tick_thread = None
+        if self.tick_queue is not None:
+            self.tick_thread = threading.Thread(target=self.tick_queue.run, daemon=True)
+            self.tick_thread.start()
+        self.quote_thread = None
+        if self.quote_queue is not None:
+            self.quote_thread = threading.Thread(target=self.quote_queue.run, daemon=True)
+            self.quote_thread.start()
+        self.start_daily_persist()
+
+    def start_daily_persist(self):
+        # Redis 집계는 모든 워커가 공유하므로 저장은 0번 워커만 수행
+        self.daily_persist_thread = None
+        if self.worker_index == 0:
+            self.daily_persist_thread = threading.Thread(target=self.daily_persist_processor, daemon=True)
+            self.daily_persist_thread.start()
 
     def prepare_statements(self):
         # Prepare statements for trades
@@ -87,6 +259,14 @@ class StreamProcessor:
             VALUES (?, ?, ?, ?, ?, ?, ?)
         """)
         
+        # (symbol, 거래일) 파티션 테이블: 같은 ms의 trade도 uuid로 구분되어 덮어쓰지 않음
+        # 파라미터 순서는 trades와 같고 trade_date만 마지막에 추가
+        self.insert_trade_by_day = self.session.prepare("""
+            INSERT INTO trades_by_day (uuid, symbol, trade_conditions, price, volume,
+                                       trade_timestamp, ingest_timestamp, trade_date)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """)
+        
         # Prepare statement for running averages
         self.insert_average = self.session.prepare("""
             INSERT INTO running_averages_15_sec (uuid, symbol, price_volume_multiply, 
@@ -94,6 +274,13 @@ class StreamProcessor:
             VALUES (?, ?, ?, ?)
         """)
         
+        # Prepare statement for OHLCV candles
+        self.insert_candle = self.session.prepare("""
+            INSERT INTO candles (symbol, resolution, bar_date, bar_start, open, high, low, close,
+                                 volume, vwap, trade_count, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """)
+        
         # Prepare statement for daily aggregates
         self.upsert_daily_aggregate = self.session.prepare("""
             INSERT INTO daily_aggregates (symbol, trade_date, total_volume, total_amount, 
@@ -102,139 +289,244 @@ class StreamProcessor:
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
         """)
 
-    def process_trade(self, trade_data: Dict):
-        # Extract trade data
+    def process_trade(self, trade_data: Dict, partition: int = 0, offset: int = -1,
+                      ingest_timestamp: int = None, trade_id: uuid.UUID = None):
+        """trade 한 건 처리 (PROCESSING_MODE=record)
+
+        ingest_timestamp/trade_id를 넘기면 그대로 사용하고, 없으면 여기서 만든다.
+        (process_message는 메시지 위치로 정해지는 uuid를 넘기므로 재처리해도 같은 행을 덮어씀)
+        """
+        # Extract trade data (trade_timestamp는 epoch ms 그대로 Cassandra에 전달)
         trade_conditions = trade_data.get('c', [])
         price = trade_data.get('p')
         symbol = trade_data.get('s')
-        trade_timestamp = datetime.fromtimestamp(trade_data.get('t') / 1000)
+        timestamp_ms = trade_data.get('t')
         volume = trade_data.get('v')
+        amount = price * volume
+        trade_date = utc_date(timestamp_ms)
         
-        # Generate UUID and current timestamp
-        trade_uuid = uuid.uuid4()
-        ingest_timestamp = datetime.now()
+        if trade_id is None:
+            trade_id = self.trade_ids.next()
+        if ingest_timestamp is None:
+            ingest_timestamp = int(time.time() * 1000)
         
-        # Insert into trades table
-        self.session.execute(self.insert_trade, (
-            trade_uuid,
+        # Queue insert into trades table (파티션 키별로 묶어 비동기 전송)
+        row = (
+            trade_id,
             symbol,
             str(trade_conditions),
             price,
             volume,
-            trade_timestamp,
+            timestamp_ms,
             ingest_timestamp
-        ))
-        
-        # Add to thread-safe queue for Redis processing
-        try:
-            trade_data = {
-                'symbol': symbol,
-                'price': price,
-                'volume': volume,
-                'trade_timestamp': trade_timestamp,
-                'amount': price * volume
-            }
-            self.batch_queue.put_nowait(trade_data)
-        except Exception as e:
-            print(f"Warning: Batch queue full, dropping trade data: {e}")
+        )
+        if self.write_legacy_trades:
+            self.trade_writer.add(symbol, self.insert_trade, row)
+        if self.write_bucketed_trades:
+            self.trade_writer.add((symbol, trade_date), self.insert_trade_by_day, row + (trade_date,))
         
-        # Update running averages (기존 로직 유지)
-        if symbol not in self.running_averages:
-            self.running_averages[symbol] = []
+        # Redis 집계는 메시지 단위로 (symbol, 거래일)별로 합쳐 두었다가 publish_pending()이 큐에 넣음
+        # (이미 반영된 offset이면 건너뜀)
+        if offset < 0 or offset > self.applied_offsets.get(partition, -1):
+            aggregate = DailyAggregate(
+                symbol, trade_date, volume, amount, 1, timestamp_ms, timestamp_ms, partition, offset
+            )
+            pending = self.pending_aggregates.get((symbol, trade_date))
+            if pending is None:
+                self.pending_aggregates[(symbol, trade_date)] = aggregate
+            else:
+                pending.merge(aggregate)
+            
+            if self.candles is not None:
+                self.candles.add(symbol, timestamp_ms, price, volume)
+            if self.tick_queue is not None:
+                self.tick_queue.put((symbol, timestamp_ms, price, volume))
+            if self.quote_queue is not None:
+                pending = self.pending_quotes.get(symbol)
+                if pending is None or timestamp_ms >= pending[1]:
+                    self.pending_quotes[symbol] = (symbol, timestamp_ms, price, volume)
         
-        self.running_averages[symbol].append({
-            'price': price,
-            'volume': volume,
-            'timestamp': trade_timestamp
-        })
+        # Update running averages (15초 슬라이딩 윈도우, amortized O(1))
+        window = self.running_averages.window(partition, symbol)
+        window.append(timestamp_ms / 1000, amount)
         
         # Clean old data (older than 15 seconds)
+        window.evict(time.time())
+
+    def process_batch(self, batch: TradeBatch, partition: int = 0, offset: int = -1,
+                      update_aggregates: bool = True):
+        """한 파티션의 컬럼 배치 단위 처리 (PROCESSING_MODE=batch)
+
+        Redis 집계 델타는 batch의 메시지별 offset으로 나뉘고(offset은 batch에 offsets가 없을 때만 사용),
+        update_aggregates=False는 Redis 집계에 이미 반영된 재처리 메시지에 사용한다.
+        """
+        ingest_timestamp = int(time.time() * 1000)
+        
+        # Insert into trades table (trade_timestamp는 epoch ms 그대로 전달)
+        add = self.trade_writer.add
+        symbols = batch.symbols.tolist()
+        prices = batch.prices.tolist()
+        volumes = batch.volumes.tolist()
+        trade_timestamps = batch.timestamps.tolist()
+        trade_dates = batch.trade_dates() if self.write_bucketed_trades else [None] * len(batch)
+        trade_ids = batch.trade_ids(partition) if batch.offsets is not None else self.trade_ids.many(len(batch))
+        for trade_id, symbol, conditions, price, volume, timestamp, trade_date in zip(
+                trade_ids, symbols, batch.conditions,
+                prices, volumes, trade_timestamps, trade_dates):
+            row = (
+                trade_id,
+                symbol,
+                str(conditions),
+                price,
+                volume,
+                timestamp,
+                ingest_timestamp
+            )
+            if self.write_legacy_trades:
+                add(symbol, self.insert_trade, row)
+            if self.write_bucketed_trades:
+                add((symbol, trade_date), self.insert_trade_by_day, row + (trade_date,))
+        
+        # (메시지, symbol, 거래일)별로 미리 집계한 뒤 Redis 큐에 추가 (한 번의 put_many로 같은 flush에 들어감)
+        if update_aggregates:
+            aggregates = batch.daily_aggregates(partition, offset)
+            queued = self.batch_queue.put_many(aggregates)
+            if queued < len(aggregates):
+                DROPPED_TRADES.inc(sum(aggregate.trade_count for aggregate in aggregates[queued:]))
+            if self.tick_queue is not None:
+                self.tick_queue.put_many(zip(symbols, trade_timestamps, prices, volumes))
+        
+        # Update running averages: symbol별로 한 번에 추가하고 한 번만 정리
         current_time = time.time()
-        self.running_averages[symbol] = [
-            trade for trade in self.running_averages[symbol]
-            if (current_time - trade['timestamp'].timestamp()) <= 15
-        ]
+        timestamps = batch.timestamps / 1000
+        price_volumes = batch.amounts
+        update_candles = update_aggregates and self.candles is not None
+        update_quotes = update_aggregates and self.quote_queue is not None
+        quotes = []
+        for symbol, rows in batch.symbol_groups():
+            window = self.running_averages.window(partition, symbol)
+            window.extend(timestamps[rows].tolist(), price_volumes[rows].tolist())
+            window.evict(current_time)
+            if update_candles:
+                self.candles.add_batch(symbol, batch.timestamps[rows], batch.prices[rows], batch.volumes[rows])
+            if update_quotes:
+                latest = rows[batch.timestamps[rows].argmax()]
+                quotes.append((symbol, trade_timestamps[latest], prices[latest], volumes[latest]))
+        if quotes:
+            self.quote_queue.put_many(quotes)
+
+    def publish_pending(self):
+        """record 모드: 메시지 하나를 처리한 뒤 모아 둔 집계 델타와 symbol별 최신 시세를 큐에 넣음
+
+        집계 델타는 put_many() 한 번으로 넣어 한 메시지의 trade가 서로 다른 flush로 나뉘지 않게 한다.
+        (APPLY_DAILY_AGGREGATES는 offset 단위로 중복을 판단하므로, 나뉘면 뒤쪽 flush가 중복으로 건너뛰어짐)
+        """
+        if self.pending_aggregates:
+            aggregates = list(self.pending_aggregates.values())
+            self.pending_aggregates = {}
+            queued = self.batch_queue.put_many(aggregates)
+            if queued < len(aggregates):
+                DROPPED_TRADES.inc(sum(aggregate.trade_count for aggregate in aggregates[queued:]))
+        if self.pending_quotes:
+            self.quote_queue.put_many(self.pending_quotes.values())
+            self.pending_quotes = {}
 
-    def batch_processor(self):
-        """배치로 Redis 업데이트를 처리하는 백그라운드 스레드 (Thread-safe)"""
-        batch_trades = []
-        last_batch_time = time.time()
+    def flush_writes(self):
+        """대기 중인 Cassandra 배치를 전송"""
+        self.trade_writer.flush()
+        self.last_flush_time = time.time()
+        self.observe_decode()
         
-        while True:
-            try:
-                current_time = time.time()
-                
-                # Queue에서 데이터 수집 (non-blocking)
-                try:
-                    while len(batch_trades) < self.batch_size:
-                        # 0.1초 타임아웃으로 큐에서 데이터 가져오기
-                        trade_data = self.batch_queue.get(timeout=0.1)
-                        batch_trades.append(trade_data)
-                        self.batch_queue.task_done()
-                except Empty:
-                    # 큐가 비어있거나 타임아웃
-                    pass
-                
-                # 배치 크기 또는 시간 간격에 따라 처리
-                should_process = (
-                    len(batch_trades) >= self.batch_size or 
-                    (len(batch_trades) > 0 and current_time - last_batch_time >= self.batch_interval)
-                )
-                
-                if should_process:
-                    # 현재 배치 처리
-                    self.update_redis_aggregates(batch_trades)
-                    batch_trades = []  # 배치 초기화
-                    last_batch_time = current_time
-                
-                # 배치가 없으면 잠시 대기
-                if not batch_trades:
-                    time.sleep(0.1)
-                
-            except Exception as e:
-                print(f"Error in batch processor: {e}")
-                time.sleep(5)
+        if self.candles is not None and self.last_flush_time - self.last_candle_flush_time >= self.candle_flush_interval:
+            self.flush_candles()
 
-    def update_redis_aggregates(self, trades_batch: List[Dict]):
-        """Redis에 일별 집계 데이터 업데이트"""
+    def flush_candles(self, close_all: bool = False):
+        """닫힌 봉을 candles 테이블에 쓰고, 바뀐 진행 중 봉을 Redis에 반영"""
+        current_time = time.time()
+        self.last_candle_flush_time = current_time
+        if close_all:
+            self.candles.close_all()
+        else:
+            self.candles.close_expired(int(current_time * 1000))
+        
+        updated_at = datetime.now()
+        for candle in self.candles.pop_closed():
+            bar_date = candle.bar_date
+            self.candle_writer.add((candle.symbol, candle.resolution, bar_date), self.insert_candle, (
+                candle.symbol,
+                candle.resolution,
+                bar_date,
+                candle.start,
+                candle.open,
+                candle.high,
+                candle.low,
+                candle.close,
+                candle.volume,
+                candle.vwap,
+                candle.trade_count,
+                updated_at
+            ))
+        self.candle_writer.flush()
+        
+        dirty = self.candles.pop_dirty()
+        if dirty:
+            self.write_current_candles(dirty)
+
+    def write_current_candles(self, dirty):
+        """진행 중인 봉을 Redis 해시(candle_key)에 반영"""
         try:
-            pipe = self.redis_client.pipeline()
-            
-            for trade in trades_batch:
-                symbol = trade['symbol']
-                trade_date = trade['trade_timestamp'].date().isoformat()
-                amount = trade['amount']
-                volume = trade['volume']
-                
-                # Redis 키 패턴: daily_agg:{symbol}:{date}
-                key = f"daily_agg:{symbol}:{trade_date}"
-                
-                # Hash로 저장 (total_volume, total_amount, trade_count, first_trade, last_trade)
-                pipe.hincrbyfloat(key, 'total_volume', volume)
-                pipe.hincrbyfloat(key, 'total_amount', amount)
-                pipe.hincrby(key, 'trade_count', 1)
-                
-                # 첫 거래 시간과 마지막 거래 시간 업데이트
-                trade_timestamp_str = trade['trade_timestamp'].isoformat()
-                
-                # 첫 거래 시간 설정 (존재하지 않으면 설정)
-                pipe.hsetnx(key, 'first_trade_time', trade_timestamp_str)
-                
-                # 마지막 거래 시간은 항상 업데이트
-                pipe.hset(key, 'last_trade_time', trade_timestamp_str)
-                
-                # TTL 설정 (30일)
-                pipe.expire(key, 30 * 24 * 3600)
-            
+            pipe = self.redis_client.pipeline(transaction=False)
+            for candle in dirty:
+                key = candle_key(candle.symbol, candle.resolution)
+                pipe.hset(key, mapping=candle.to_redis())
+                pipe.expire(key, self.candle_redis_ttl)
             pipe.execute()
-            print(f"Updated Redis aggregates for {len(trades_batch)} trades")
+        except Exception as e:
+            print(f"Error updating current candles in Redis: {e}")
+
+    def wait_writes_idle(self, timeout: float) -> bool:
+        """모든 Cassandra 쓰기 스테이지의 진행 중 요청이 끝날 때까지 대기"""
+        deadline = time.time() + timeout
+        return all([writer.wait_idle(max(0, deadline - time.time())) for writer in self.writers])
+
+    def write_barriers(self) -> List:
+        return [writer.barrier() for writer in self.writers]
+
+    def observe_decode(self):
+        """누적된 decode 시간을 메트릭에 반영"""
+        if self.decoded_messages:
+            DECODE_SECONDS.observe(self.decode_seconds)
+            DECODED_MESSAGES.inc(self.decoded_messages)
+            self.decode_seconds = 0.0
+            self.decoded_messages = 0
+
+    def update_redis_aggregates(self, trades_batch: List[DailyAggregate]) -> bool:
+        """Redis에 일별 집계 데이터 업데이트
+
+        배치를 (daily_agg 키, 파티션, offset)별 델타로 합친 뒤 APPLY_DAILY_AGGREGATES 스크립트
+        EVALSHA 한 번으로 반영한다. 스크립트가 키별 반영 offset을 같은 원자적 실행 안에서 확인하고
+        기록하므로, 재처리되거나 두 워커가 함께 처리한 메시지도 집계에 한 번만 더해진다.
+        """
+        keys, args = apply_daily_aggregates_args(trades_batch, self.applied_offsets_key)
+        try:
+            with REDIS_PIPELINE_SECONDS.time():
+                result = self.apply_daily_aggregates(keys=keys, args=args)
+            self.record_aggregate_result(result)
+            return True
             
         except Exception as e:
             print(f"Error updating Redis aggregates: {e}")
+            return False
+
+    def record_aggregate_result(self, result):
+        applied, skipped, key_count = result
+        if skipped:
+            DUPLICATE_AGGREGATE_TRADES.inc(skipped)
+        print(f"Updated Redis aggregates for {applied} trades ({key_count} keys, {skipped} duplicates skipped)")
 
     def daily_persist_processor(self):
-        """일별 집계 데이터를 Cassandra에 저장하는 백그라운드 스레드"""
-        while True:
+        """일별 집계 데이터를 Cassandra에 저장하는 백그라운드 스레드 (종료 시 마지막 저장은 shutdown()이 수행)"""
+        while not self.stopping.is_set():
             try:
                 current_time = time.time()
                 
@@ -242,74 +534,112 @@ class StreamProcessor:
                     self.persist_daily_aggregates_to_cassandra()
                     self.last_daily_persist_time = current_time
                 
-                time.sleep(30)  # 30초마다 체크
+                self.stopping.wait(30)  # 30초마다 체크
                 
             except Exception as e:
                 print(f"Error in daily persist processor: {e}")
-                time.sleep(60)
+                self.stopping.wait(60)
 
     def persist_daily_aggregates_to_cassandra(self):
-        """Redis의 일별 집계 데이터를 Cassandra에 저장"""
+        """마지막 저장 이후 변경된(dirty) 일별 집계만 Cassandra에 저장
+
+        KEYS 대신 dirty 집합을 스냅샷으로 옮겨 SSCAN으로 청크 단위로 읽고,
+        청크마다 HGETALL을 파이프라인으로 묶은 뒤 Cassandra upsert를 동시에 실행한다.
+        """
+        started = time.perf_counter()
         try:
-            # Redis에서 모든 일별 집계 키 조회
-            keys = self.redis_client.keys('daily_agg:*')
+            # dirty 집합을 스냅샷으로 원자적으로 이동 (이전 주기에서 남은 스냅샷이 있으면 합침)
+            pipe = self.redis_client.pipeline(transaction=True)
+            pipe.sunionstore(DAILY_AGG_PERSISTING_KEY, [DAILY_AGG_PERSISTING_KEY, DAILY_AGG_DIRTY_KEY])
+            pipe.delete(DAILY_AGG_DIRTY_KEY)
+            pipe.execute()
             
-            for key in keys:
-                try:
-                    # 키 파싱: daily_agg:{symbol}:{date}
-                    _, symbol, date_str = key.split(':', 2)
-                    trade_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-                    
-                    # Redis에서 집계 데이터 조회
-                    agg_data = self.redis_client.hgetall(key)
-                    
-                    if not agg_data:
-                        continue
-                    
-                    total_volume = float(agg_data.get('total_volume', 0))
-                    total_amount = float(agg_data.get('total_amount', 0))
-                    trade_count = int(agg_data.get('trade_count', 0))
-                    first_trade_time = datetime.fromisoformat(agg_data.get('first_trade_time'))
-                    last_trade_time = datetime.fromisoformat(agg_data.get('last_trade_time'))
-                    
-                    # Cassandra에 upsert
-                    self.session.execute(self.upsert_daily_aggregate, (
-                        symbol,
-                        trade_date,
-                        total_volume,
-                        total_amount,
-                        trade_count,
-                        first_trade_time,
-                        last_trade_time,
-                        datetime.now(),  # created_at
-                        datetime.now()   # updated_at
-                    ))
-                    
-                except Exception as e:
-                    print(f"Error processing key {key}: {e}")
-                    continue
+            persisted = 0
+            failed_keys = []
+            chunk = []
+            for key in self.redis_client.sscan_iter(DAILY_AGG_PERSISTING_KEY, count=self.daily_persist_chunk_size):
+                chunk.append(key)
+                if len(chunk) >= self.daily_persist_chunk_size:
+                    persisted += self._persist_daily_aggregate_chunk(chunk, failed_keys)
+                    chunk = []
+            if chunk:
+                persisted += self._persist_daily_aggregate_chunk(chunk, failed_keys)
             
-            print(f"Persisted {len(keys)} daily aggregates to Cassandra")
+            # 실패한 키는 다음 주기에 다시 저장되도록 dirty 집합에 되돌림
+            pipe = self.redis_client.pipeline(transaction=True)
+            if failed_keys:
+                pipe.sadd(DAILY_AGG_DIRTY_KEY, *failed_keys)
+            pipe.delete(DAILY_AGG_PERSISTING_KEY)
+            pipe.execute()
+            
+            PERSISTED_AGGREGATES.inc(persisted)
+            PERSIST_ERRORS.inc(len(failed_keys))
+            print(f"Persisted {persisted} daily aggregates to Cassandra ({len(failed_keys)} failed)")
             
         except Exception as e:
+            PERSIST_ERRORS.inc()
             print(f"Error persisting daily aggregates: {e}")
+        finally:
+            PERSIST_SECONDS.observe(time.perf_counter() - started)
+
+    def _persist_daily_aggregate_chunk(self, keys: List[str], failed_keys: List[str]) -> int:
+        """키 청크를 HGETALL 파이프라인 1회로 읽고 Cassandra에 동시 upsert"""
+        pipe = self.redis_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.hgetall(key)
+        results = pipe.execute()
+        
+        now = datetime.now()
+        upsert_keys = []
+        params = []
+        for key, agg_data in zip(keys, results):
+            if not agg_data:
+                # TTL 만료 등으로 사라진 키
+                continue
+            try:
+                # 키 파싱: daily_agg:{symbol}:{date}
+                _, symbol, date_str = key.split(':', 2)
+                params.append((
+                    symbol,
+                    datetime.strptime(date_str, '%Y-%m-%d').date(),
+                    float(agg_data.get('total_volume', 0)),
+                    float(agg_data.get('total_amount', 0)),
+                    int(agg_data.get('trade_count', 0)),
+                    datetime.fromisoformat(agg_data.get('first_trade_time')),
+                    datetime.fromisoformat(agg_data.get('last_trade_time')),
+                    now,  # created_at
+                    now   # updated_at
+                ))
+                upsert_keys.append(key)
+            except Exception as e:
+                print(f"Error processing key {key}: {e}")
+        
+        results = execute_concurrent_with_args(
+            self.session, self.upsert_daily_aggregate, params,
+            concurrency=self.daily_persist_concurrency, raise_on_first_error=False
+        )
+        
+        persisted = 0
+        for key, (success, result) in zip(upsert_keys, results):
+            if success:
+                persisted += 1
+            else:
+                print(f"Error persisting key {key}: {result}")
+                failed_keys.append(key)
+        return persisted
 
     def calculate_running_averages(self):
-        """기존 running averages 계산 로직 유지"""
+        """symbol별 15초 윈도우의 price*volume 평균을 저장 (윈도우의 누적 합계 사용)"""
         current_time = time.time()
         if current_time - self.last_aggregate_time >= 5:  # Every 5 seconds
-            for symbol, trades in self.running_averages.items():
-                if trades:
-                    df = pd.DataFrame(trades)
-                    avg_price_volume = (df['price'] * df['volume']).mean()
-                    
-                    # Insert running average
-                    self.session.execute(self.insert_average, (
-                        uuid.uuid4(),
-                        symbol,
-                        avg_price_volume,
-                        datetime.now()
-                    ))
+            for symbol, avg_price_volume in self.running_averages.averages(current_time).items():
+                # Insert running average
+                self.session.execute(self.insert_average, (
+                    uuid.uuid4(),
+                    symbol,
+                    avg_price_volume,
+                    datetime.now()
+                ))
             
             self.last_aggregate_time = current_time
 
@@ -319,7 +649,7 @@ class StreamProcessor:
             trade_date = date.today()
         
         # Redis에서 먼저 조회
-        key = f"daily_agg:{symbol}:{trade_date.isoformat()}"
+        key = daily_aggregate_key(symbol, trade_date)
         redis_data = self.redis_client.hgetall(key)
         
         if redis_data:
@@ -353,36 +683,346 @@ class StreamProcessor:
         
         return None
 
+    def on_partitions_revoked(self, revoked):
+        """리밸런스로 파티션을 잃기 전에 쓰기를 마무리하고 symbol 윈도우를 Redis로 넘김"""
+        if self.at_least_once:
+            # 다음 소유 워커가 커밋 위치부터 이어받도록 처리한 offset까지 커밋
+            self.commit_pending_offsets(timeout=self.rebalance_timeout)
+            self.offsets.forget(revoked)
+        else:
+            self.flush_writes()
+            if not self.wait_writes_idle(self.rebalance_timeout):
+                print(f"Warning: Cassandra writes still in flight after {self.rebalance_timeout}s during rebalance")
+        self.save_revoked_state(revoked)
+
+    def save_revoked_state(self, revoked):
+        """회수된 파티션의 symbol 윈도우를 다음 소유 워커가 이어받도록 Redis에 저장"""
+        for topic_partition in revoked:
+            state = self.running_averages.export_partition(topic_partition.partition)
+            try:
+                save_partition_state(
+                    self.redis_client, self.topic, topic_partition.partition,
+                    state, ttl=int(self.running_average_span * 4)
+                )
+            except Exception as e:
+                print(f"Error saving state for partition {topic_partition.partition}: {e}")
+        
+        print(f"Worker {self.worker_index} revoked partitions: {sorted(tp.partition for tp in revoked)}")
+
+    def on_partitions_assigned(self, assigned):
+        """새로 할당된 파티션의 symbol 윈도우와 Redis 반영 offset을 이전 소유 워커로부터 이어받음"""
+        try:
+            self.load_applied_offsets(assigned)
+        except Exception as e:
+            print(f"Error loading applied offsets: {e}")
+        
+        for topic_partition in assigned:
+            try:
+                state = load_partition_state(self.redis_client, self.topic, topic_partition.partition)
+                self.running_averages.load_partition(topic_partition.partition, state)
+            except Exception as e:
+                print(f"Error loading state for partition {topic_partition.partition}: {e}")
+        
+        print(f"Worker {self.worker_index} assigned partitions: {sorted(tp.partition for tp in assigned)}")
+
+    def load_applied_offsets(self, partitions):
+        """Redis 집계에 반영된 파티션별 마지막 offset 조회"""
+        partitions = [topic_partition.partition for topic_partition in partitions]
+        if not partitions:
+            return
+        values = self.redis_client.hmget(self.applied_offsets_key, [str(partition) for partition in partitions])
+        for partition, value in zip(partitions, values):
+            self.applied_offsets[partition] = int(value) if value is not None else -1
+
+    def track_offset(self, topic: str, partition: int, offset: int):
+        if self.at_least_once:
+            self.offsets.track(TopicPartition(topic, partition), offset)
+
+    def commit_offsets(self):
+        """at-least-once 모드: 주기적으로 체크포인트를 만들고, 쓰기가 끝난 체크포인트까지 커밋"""
+        if not self.at_least_once:
+            return
+        
+        positions, failed = self.completed_offsets()
+        if failed:
+            self.rewind_offsets()
+        elif positions:
+            self._commit(positions)
+
+    def completed_offsets(self):
+        """주기가 되면 체크포인트를 만들고, 쓰기가 끝난 체크포인트의 (커밋할 offset, 실패 여부)를 반환"""
+        current_time = time.time()
+        if current_time - self.last_checkpoint_time >= self.commit_interval and self.offsets.has_progress():
+            self.pending_checkpoint()
+            self.last_checkpoint_time = current_time
+        return self.offsets.pop_completed()
+
+    def pending_checkpoint(self):
+        """대기 중인 Cassandra 배치를 전송하고 지금까지 처리한 offset의 체크포인트를 만듦"""
+        self.flush_writes()
+        redis_barrier = self.batch_queue.barrier()
+        return self.offsets.checkpoint(self.write_barriers() + [redis_barrier])
+
+    def commit_pending_offsets(self, timeout: float):
+        """대기 중인 쓰기를 모두 마무리한 뒤 처리한 offset까지 동기 커밋 (리밸런스/종료 시)"""
+        checkpoint = self.pending_checkpoint()
+        
+        deadline = time.time() + timeout
+        for barrier in checkpoint.barriers:
+            barrier.wait(max(0, deadline - time.time()))
+        
+        positions = self.durable_positions(checkpoint, timeout)
+        if positions:
+            self._commit(positions)
+
+    def durable_positions(self, checkpoint, timeout: float):
+        """barrier 대기가 끝난 체크포인트에서 커밋할 offset (완료되지 않았거나 실패했으면 None)"""
+        positions, failed = self.offsets.pop_completed()
+        if failed or not checkpoint.is_done():
+            print(f"Warning: pending writes not durable within {timeout}s, offsets not committed")
+            return None
+        return positions
+
+    def _commit(self, positions: Dict[TopicPartition, int]):
+        try:
+            self.consumer.commit(offsets=self.commit_request(positions))
+            self.offsets.mark_committed(positions)
+        except Exception as e:
+            print(f"Error committing offsets: {e}")
+
+    @staticmethod
+    def commit_request(positions: Dict[TopicPartition, int]) -> Dict[TopicPartition, OffsetAndMetadata]:
+        return {
+            topic_partition: OffsetAndMetadata(offset, '')
+            for topic_partition, offset in positions.items()
+        }
+
+    def rewind_offsets(self):
+        """쓰기가 실패한 경우 마지막 커밋 위치로 되돌아가 재처리
+
+        Redis 큐를 먼저 비운 뒤 반영 offset을 다시 읽으므로 재처리 메시지가 집계에 중복 반영되지 않고,
+        trades는 PRIMARY KEY 기준 upsert라 다시 써도 같은 행이 된다.
+        """
+        print("Warning: write failed, rewinding to last committed offsets")
+        redis_barrier = self.batch_queue.barrier()
+        redis_barrier.wait(self.rebalance_timeout)
+        self.wait_writes_idle(self.rebalance_timeout)
+        
+        positions = self.reset_to_committed()
+        assignment = self.consumer.assignment()
+        self.load_applied_offsets(assignment)
+        for topic_partition in assignment:
+            offset = positions.get(topic_partition)
+            if offset is None:
+                offset = self.consumer.committed(topic_partition)
+            if offset is not None:
+                self.consumer.seek(topic_partition, offset)
+
+    def reset_to_committed(self) -> Dict[TopicPartition, int]:
+        """대기 중인 체크포인트와 writer/Redis 집계 큐의 실패 상태를 버리고 마지막 커밋 위치를 반환"""
+        positions = self.offsets.rewind()
+        for writer in self.writers:
+            writer.reset_failures()
+        self.batch_queue.reset_failures()
+        return positions
+
+    def report_consumer_lag(self):
+        """할당된 파티션별 lag (highwater - 현재 position) 계산 및 출력"""
+        if not self.lag_report_due():
+            return
+        
+        lag = {}
+        for topic_partition in self.consumer.assignment():
+            highwater = self.consumer.highwater(topic_partition)
+            if highwater is None:
+                continue
+            lag[topic_partition.partition] = max(0, highwater - self.consumer.position(topic_partition))
+        self.record_consumer_lag(lag)
+
+    def lag_report_due(self) -> bool:
+        current_time = time.time()
+        if current_time - self.last_lag_report_time < self.lag_report_interval:
+            return False
+        self.last_lag_report_time = current_time
+        return True
+
+    def record_consumer_lag(self, lag: Dict[int, int]):
+        self.partition_lag = lag
+        print(f"Worker {self.worker_index} consumer lag: total={sum(lag.values())} by partition={lag}")
+
+    def consume_records(self):
+        """메시지 단위 처리 (PROCESSING_MODE=record)"""
+        while not self.stopping.is_set():
+            # Process Kafka messages
+            for message in self.consumer:
+                self.process_message(message)
+                self.commit_offsets()
+                if self.stopping.is_set():
+                    break
+            
+            # consumer_timeout_ms 만료 (유휴 상태): 남은 배치 전송
+            self.flush_writes()
+            self.commit_offsets()
+            self.report_consumer_lag()
+
+    def process_message(self, message):
+        """Kafka 메시지 하나를 decode해 trade별로 처리 (record 모드, 두 엔진 공용)"""
+        try:
+            # Decode Avro message
+            started = time.perf_counter()
+            decoded_message = self.decoder.decode(message.value)
+            self.decode_seconds += time.perf_counter() - started
+            self.decoded_messages += 1
+            
+            # Process each trade in the message (uuid는 메시지 안의 순번으로, ingest 시각은 메시지 단위로 생성)
+            ingest_timestamp = int(time.time() * 1000) if self.ingest_timestamp_mode == 'batch' else None
+            for index, trade in enumerate(decoded_message['data']):
+                trade_id = trade_uuid(trade['t'], message.partition, message.offset, index)
+                self.process_trade(trade, message.partition, message.offset, ingest_timestamp, trade_id)
+            self.publish_pending()
+            
+            # Calculate and store running averages (기존 로직)
+            # self.calculate_running_averages()
+            
+            if time.time() - self.last_flush_time >= self.flush_interval:
+                self.flush_writes()
+            
+        except Exception as e:
+            print(f"Error processing message: {e}")
+        
+        self.track_offset(message.topic, message.partition, message.offset)
+
+    def consume_batches(self):
+        """poll(max_records=N) 단위로 받아 컬럼 배치로 처리 (PROCESSING_MODE=batch)"""
+        while not self.stopping.is_set():
+            records = self.consumer.poll(
+                timeout_ms=self.poll_timeout_ms,
+                max_records=self.poll_max_records
+            )
+            self.process_records(records)
+            
+            self.flush_writes()
+            self.commit_offsets()
+            self.report_consumer_lag()
+
+    def process_records(self, records):
+        """poll 결과({TopicPartition: [message]})를 파티션별 컬럼 배치로 처리 (batch 모드, 두 엔진 공용)"""
+        # 파티션별로 배치를 만들어 symbol 상태를 파티션 단위로 유지
+        for topic_partition, partition_records in records.items():
+            partition = topic_partition.partition
+            applied_offset = self.applied_offsets.get(partition, -1)
+            
+            # Redis 집계에 이미 반영된 메시지(재처리분)는 Cassandra에만 다시 씀
+            replayed_messages, replayed_offsets = [], []
+            decoded_messages, decoded_offsets = [], []
+            started = time.perf_counter()
+            for message in partition_records:
+                try:
+                    decoded_message = self.decoder.decode(message.value)
+                except Exception as e:
+                    DECODE_ERRORS.inc()
+                    print(f"Error decoding message: {e}")
+                    continue
+                if message.offset > applied_offset:
+                    decoded_messages.append(decoded_message)
+                    decoded_offsets.append(message.offset)
+                else:
+                    replayed_messages.append(decoded_message)
+                    replayed_offsets.append(message.offset)
+            self.decode_seconds += time.perf_counter() - started
+            self.decoded_messages += len(decoded_messages) + len(replayed_messages)
+            
+            try:
+                if replayed_messages:
+                    self.process_batch(TradeBatch.from_messages(replayed_messages, replayed_offsets),
+                                       partition, update_aggregates=False)
+                if decoded_messages:
+                    self.process_batch(TradeBatch.from_messages(decoded_messages, decoded_offsets), partition)
+            except Exception as e:
+                print(f"Error processing batch of {len(partition_records)} messages: {e}")
+            
+            self.track_offset(topic_partition.topic, partition, partition_records[-1].offset)
+
+    def stop(self, signum=None, frame=None):
+        """소비를 멈추도록 요청 (시그널 핸들러, 현재 메시지/배치까지 처리한 뒤 run()이 종료 절차 수행)"""
+        if not self.stopping.is_set():
+            print(f"Worker {self.worker_index} stopping (signal {signum})...")
+        self.stopping.set()
+
     def run(self):
-        print("Starting enhanced stream processor with Redis daily aggregation...")
+        print(f"Starting enhanced stream processor with Redis daily aggregation ({self.processing_mode} mode)...")
+        # 컨테이너에서 PID 1로 실행되면 핸들러가 없는 SIGTERM은 무시되므로 직접 처리
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, self.stop)
+            signal.signal(signal.SIGINT, self.stop)
         try:
-            while True:
-                # Process Kafka messages
-                for message in self.consumer:
-                    try:
-                        # Decode Avro message
-                        reader = DatumReader(self.schema)
-                        decoder = BinaryDecoder(io.BytesIO(message.value))
-                        decoded_message = reader.read(decoder)
-                        
-                        # Process each trade in the message
-                        for trade in decoded_message['data']:
-                            self.process_trade(trade)
-                        
-                        # Calculate and store running averages (기존 로직)
-                        # self.calculate_running_averages()
-                        
-                    except Exception as e:
-                        print(f"Error processing message: {e}")
-                        continue
+            if self.processing_mode == 'batch':
+                self.consume_batches()
+            else:
+                self.consume_records()
                 
         except KeyboardInterrupt:
             print("Shutting down...")
         finally:
-            self.consumer.close()
-            self.cluster.shutdown()
-            self.redis_client.close()
+            self.shutdown()
+
+    def shutdown(self):
+        """종료 절차: 남은 쓰기 flush → Redis 큐 drain → 일별 집계 저장 → offset 커밋 → 연결 종료
+
+        전체가 SHUTDOWN_TIMEOUT초 안에 끝나도록 단계마다 남은 시간만큼만 기다린다.
+        (Kubernetes terminationGracePeriodSeconds보다 짧아야 SIGKILL 전에 끝남)
+        """
+        self.stopping.set()
+        started = time.time()
+        deadline = started + self.shutdown_timeout
+        
+        def remaining() -> float:
+            return max(0.0, deadline - time.time())
+        
+        # 진행 중인 봉까지 닫아서 저장
+        if self.candles is not None:
+            self.flush_candles(close_all=True)
+        if self.at_least_once:
+            # Cassandra 쓰기와 Redis 집계가 끝난 offset까지 커밋
+            self.commit_pending_offsets(timeout=remaining())
+        else:
+            self.flush_writes()
+            self.wait_writes_idle(timeout=remaining())
+        
+        # 남은 Redis 집계/tick/시세를 flush하고 스케줄러 종료
+        for queue, thread in ((self.batch_queue, self.batch_thread), (self.tick_queue, self.tick_thread),
+                              (self.quote_queue, self.quote_thread)):
+            if queue is not None:
+                queue.stop()
+                thread.join(timeout=remaining())
+        
+        # 마지막 persist 이후 바뀐 일별 집계를 저장 (진행 중인 주기 저장이 있으면 끝날 때까지 대기)
+        if self.daily_persist_thread is not None:
+            self.daily_persist_thread.join(timeout=remaining())
+            if self.daily_persist_thread.is_alive():
+                print("Warning: daily persist still running at shutdown, skipping final persist")
+            elif remaining() > 0:
+                self.persist_daily_aggregates_to_cassandra()
+        
+        # auto 모드는 close()에서 현재 위치를 커밋 (at-least-once는 위에서 이미 커밋)
+        self.consumer.close(autocommit=not self.at_least_once)
+        self.cluster.shutdown()
+        self.redis_client.close()
+        print(f"Worker {self.worker_index} shut down in {time.time() - started:.1f}s")
+
+def create_processor(worker_index: int = 0) -> StreamProcessor:
+    """ENGINE 설정에 맞는 StreamProcessor 생성 (asyncio 엔진은 aiokafka가 필요하므로 선택 시에만 import)"""
+    if Config.ENGINE == 'asyncio':
+        from async_engine import AsyncStreamProcessor
+        return AsyncStreamProcessor(worker_index=worker_index)
+    if Config.ENGINE != 'threaded':
+        raise ValueError(f"Invalid ENGINE: {Config.ENGINE}. Must be 'threaded' or 'asyncio'")
+    return StreamProcessor(worker_index=worker_index)
 
 if __name__ == "__main__":
-    processor = StreamProcessor()
-    processor.run()
\ No newline at end of file
+    if Config.STREAM_WORKERS > 1:
+        # 워커마다 SHUTDOWN_TIMEOUT 동안 종료 절차를 수행하므로 그보다 조금 더 기다린 뒤 kill
+        WorkerSupervisor(Config.STREAM_WORKERS, shutdown_timeout=Config.SHUTDOWN_TIMEOUT + 5).run()
+    else:
+        processor = create_processor()
+        processor.run()
\ No newline at end of file
@@ -7,13 +7,13 @@ from typing import Dict, List
 
 import avro.schema
 from avro.io import DatumReader, BinaryDecoder
-from cassandra.cluster import Cluster
-from cassandra.auth import PlainTextAuthProvider
 from kafka import KafkaConsumer
 import pandas as pd
 from dotenv import load_dotenv
 import os
 
+from cassandra_connection import connect_cassandra
+
 # Load environment variables
 load_dotenv()
 
@@ -33,15 +33,7 @@ class StreamProcessor:
         )
         
         # Initialize Cassandra connection
-        auth_provider = PlainTextAuthProvider(
-            username=os.getenv('CASSANDRA_USERNAME', 'cassandra'),
-            password=os.getenv('CASSANDRA_PASSWORD', 'cassandra')
-        )
-        self.cluster = Cluster(
-            [os.getenv('CASSANDRA_HOST', 'cassandra')],
-            auth_provider=auth_provider
-        )
-        self.session = self.cluster.connect('market')
+        self.cluster, self.session = connect_cassandra('market')
         
         # Prepare Cassandra statements
         self.prepare_statements()
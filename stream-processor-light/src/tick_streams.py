@@ -0,0 +1,53 @@
+import time
+from typing import List, Tuple
+
+TICK_STREAM_PREFIX = 'ticks'
+
+
+def tick_stream_key(symbol: str) -> str:
+    """symbol별 최근 tick을 보관하는 Redis Stream 키
+
+    최근 N건:   XREVRANGE ticks:{symbol} + - COUNT N
+    최근 5분:   XRANGE ticks:{symbol} {now_ms - 300000} +
+    (entry ID의 ms 부분은 Redis에 기록된 시각, 필드 t는 거래 시각)
+    """
+    return f"{TICK_STREAM_PREFIX}:{symbol}"
+
+
+class TickStreamWriter:
+    """trade를 symbol별 capped Redis Stream에 추가 (FlushScheduler의 flush 함수)
+
+    XADD마다 MAXLEN ~로 길이를 제한하고, retention_seconds가 있으면 flush마다 키별로
+    XTRIM MINID ~를 한 번 보내 그보다 오래된 tick을 지운다. 한동안 trade가 없는 symbol은
+    키 TTL(retention)로 정리된다. 명령은 flush당 비트랜잭션 파이프라인 하나로 전송한다.
+    """
+
+    def __init__(self, redis_client, maxlen: int, retention_seconds: int = 0):
+        self.redis_client = redis_client
+        self.maxlen = maxlen
+        self.retention_seconds = retention_seconds
+
+    def queue(self, pipe, ticks: List[Tuple[str, int, float, float]]):
+        """ticks: (symbol, trade_timestamp epoch ms, price, volume) — 파이프라인에 명령만 추가"""
+        keys = set()
+        for symbol, timestamp, price, volume in ticks:
+            key = tick_stream_key(symbol)
+            keys.add(key)
+            pipe.xadd(key, {'t': timestamp, 'p': price, 'v': volume}, maxlen=self.maxlen, approximate=True)
+
+        if self.retention_seconds > 0:
+            min_id = int(time.time() * 1000) - self.retention_seconds * 1000
+            for key in keys:
+                pipe.xtrim(key, minid=min_id, approximate=True)
+                pipe.expire(key, self.retention_seconds)
+
+    def write(self, ticks: List[Tuple[str, int, float, float]]) -> bool:
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            self.queue(pipe, ticks)
+            pipe.execute()
+            return True
+
+        except Exception as e:
+            print(f"Error writing {len(ticks)} ticks to Redis streams: {e}")
+            return False
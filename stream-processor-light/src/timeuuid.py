@@ -0,0 +1,81 @@
+import os
+import time
+from typing import List
+from uuid import UUID, SafeUUID
+
+# 1582-10-15(UUID v1 기준 시각)부터 Unix epoch까지의 100ns 단위 간격
+_GREGORIAN_OFFSET = 0x01b21dd213814000
+_TIME_LOW_SPAN = 1 << 32
+
+_new = object.__new__
+_setattr = object.__setattr__
+_UNKNOWN = SafeUUID.unknown
+
+
+def _fields_to_int(timestamp: int) -> int:
+    """60비트 시각을 v1 레이아웃(time_low, time_mid, version+time_hi)으로 배치"""
+    return ((timestamp & 0xffffffff) << 96
+            | (timestamp >> 32 & 0xffff) << 80
+            | (0x1000 | timestamp >> 48 & 0x0fff) << 64)
+
+
+def _from_int(value: int) -> UUID:
+    # UUID(int=...)의 인자 검증을 건너뜀 (값은 항상 128비트 v1이므로 검증이 필요 없음)
+    result = _new(UUID)
+    _setattr(result, 'int', value)
+    _setattr(result, 'is_safe', _UNKNOWN)
+    return result
+
+
+def trade_uuid(timestamp_ms: int, partition: int, offset: int, index: int) -> UUID:
+    """Kafka 메시지 위치로 정해지는 trades.uuid (TimeUUID v1)
+
+    시각 필드는 trade 시각(ms)에 메시지 안의 순번(index, 100ns 단위)을 더한 값이고,
+    clock_seq에는 파티션, node에는 offset을 넣는다. 같은 메시지를 재처리(rewind/재배포)해도
+    같은 uuid가 나오므로 trades/trades_by_day의 같은 행을 덮어쓴다.
+    (메시지 안의 순번이 10000 미만이면 같은 파티션 안에서 중복되지 않음)
+    """
+    timestamp = timestamp_ms * 10_000 + index + _GREGORIAN_OFFSET
+    # node의 multicast 비트(40)는 켜 두고 offset은 나머지 47비트에 배치 (TimeUUIDGenerator와 같은 규칙)
+    node = (offset >> 40) << 41 | 0x010000000000 | offset & 0xffffffffff
+    return _from_int(_fields_to_int(timestamp) | (0x8000 | partition & 0x3fff) << 48 | node)
+
+
+class TimeUUIDGenerator:
+    """trades.uuid용 TimeUUID(v1) 생성기
+
+    uuid4()는 호출마다 os.urandom을 읽지만, 여기서는 node/clock_seq를 생성 시 한 번만
+    무작위로 정하고 이후에는 단조 증가하는 100ns 카운터로 시각 필드만 바꾼다.
+    같은 100ns 안에 여러 개를 만들면 카운터가 앞서 나가므로 프로세스 안에서는 중복되지 않는다.
+    스레드 하나에서만 호출해야 한다 (소비 루프 전용).
+    """
+
+    __slots__ = ('_last', '_tail')
+
+    def __init__(self):
+        # 무작위 node에는 multicast 비트를 켜서 실제 MAC 주소와 겹치지 않게 함 (RFC 4122 4.5)
+        node = int.from_bytes(os.urandom(6), 'big') | 0x010000000000
+        clock_seq = int.from_bytes(os.urandom(2), 'big') & 0x3fff
+        self._tail = (0x8000 | clock_seq) << 48 | node  # variant + clock_seq + node
+        self._last = 0
+
+    def _reserve(self, count: int) -> int:
+        """count개의 연속된 시각을 예약하고 첫 시각을 반환"""
+        timestamp = time.time_ns() // 100 + _GREGORIAN_OFFSET
+        if timestamp <= self._last:
+            timestamp = self._last + 1
+        self._last = timestamp + count - 1
+        return timestamp
+
+    def next(self) -> UUID:
+        return _from_int(_fields_to_int(self._reserve(1)) | self._tail)
+
+    def many(self, count: int) -> List[UUID]:
+        """시계를 한 번만 읽어 시각이 연속된 count개를 생성 (메시지/배치 단위)"""
+        start = self._reserve(count)
+        if (start & 0xffffffff) + count > _TIME_LOW_SPAN:
+            # time_low가 넘치면 상위 필드도 바뀌므로 하나씩 배치
+            return [_from_int(_fields_to_int(timestamp) | self._tail) for timestamp in range(start, start + count)]
+        # 그 외에는 time_low(상위 32비트)만 1씩 증가
+        base = _fields_to_int(start) | self._tail
+        return [_from_int(base + (index << 96)) for index in range(count)]
@@ -0,0 +1,147 @@
+from datetime import date
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Tuple
+from uuid import UUID
+
+import numpy as np
+
+from aggregates import DailyAggregate
+from timeuuid import trade_uuid
+
+MS_PER_DAY = 86_400_000
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+@lru_cache(maxsize=64)
+def _day_date(day: int) -> date:
+    return date.fromordinal(_EPOCH_ORDINAL + day)
+
+
+def utc_date(timestamp_ms: int) -> date:
+    """epoch ms의 UTC 날짜 (trades_by_day 파티션 키, 같은 날짜는 같은 date 객체를 재사용)"""
+    return _day_date(timestamp_ms // MS_PER_DAY)
+
+
+class TradeBatch:
+    """한 번의 poll로 받은 trade들을 컬럼(NumPy 배열) 형태로 보관
+
+    집계는 모두 배열 연산으로 처리하고, 행 단위가 필요한 곳(Cassandra insert)만
+    tolist()로 파이썬 스칼라를 꺼내 사용한다.
+    """
+
+    __slots__ = ('symbols', 'prices', 'volumes', 'timestamps', 'conditions', 'offsets', 'indexes')
+
+    def __init__(self, symbols: np.ndarray, prices: np.ndarray, volumes: np.ndarray,
+                 timestamps: np.ndarray, conditions: List, offsets: np.ndarray = None,
+                 indexes: np.ndarray = None):
+        self.symbols = symbols        # object (str)
+        self.prices = prices          # float64
+        self.volumes = volumes        # float64
+        self.timestamps = timestamps  # int64, epoch milliseconds
+        self.conditions = conditions  # list (Cassandra에 문자열로만 저장)
+        self.offsets = offsets        # int64, 행이 속한 메시지의 Kafka offset (모르면 None)
+        self.indexes = indexes        # int64, 메시지 안에서의 trade 순번
+
+    @classmethod
+    def from_messages(cls, messages: Iterable[Dict], offsets: Iterable[int]) -> 'TradeBatch':
+        """디코딩된 Avro 메시지들을 컬럼으로 변환 (offsets는 메시지별 Kafka offset)"""
+        symbols, prices, volumes, timestamps, conditions = [], [], [], [], []
+        message_offsets, indexes = [], []
+        for message, offset in zip(messages, offsets):
+            trades = message['data']
+            for trade in trades:
+                symbols.append(trade['s'])
+                prices.append(trade['p'])
+                volumes.append(trade['v'])
+                timestamps.append(trade['t'])
+                conditions.append(trade.get('c', []))
+            message_offsets.extend([offset] * len(trades))
+            indexes.extend(range(len(trades)))
+
+        return cls(
+            np.array(symbols, dtype=object),
+            np.array(prices, dtype=np.float64),
+            np.array(volumes, dtype=np.float64),
+            np.array(timestamps, dtype=np.int64),
+            conditions,
+            np.array(message_offsets, dtype=np.int64),
+            np.array(indexes, dtype=np.int64)
+        )
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def amounts(self) -> np.ndarray:
+        return self.prices * self.volumes
+
+    def symbol_groups(self) -> Iterator[Tuple[str, np.ndarray]]:
+        """symbol별 (symbol, 행 인덱스 배열) — 인덱스는 원래 순서를 유지"""
+        unique_symbols, inverse = np.unique(self.symbols, return_inverse=True)
+        order = np.argsort(inverse, kind='stable')
+        bounds = np.cumsum(np.bincount(inverse, minlength=len(unique_symbols)))
+        start = 0
+        for symbol, end in zip(unique_symbols.tolist(), bounds.tolist()):
+            yield symbol, order[start:end]
+            start = end
+
+    def trade_ids(self, partition: int) -> List[UUID]:
+        """행별 trades.uuid (메시지 위치로 정해지므로 재처리해도 같은 값, offsets가 필요)"""
+        return [trade_uuid(timestamp, partition, offset, index) for timestamp, offset, index in zip(
+            self.timestamps.tolist(), self.offsets.tolist(), self.indexes.tolist())]
+
+    def trade_dates(self) -> List[date]:
+        """행별 UTC 거래일 (같은 날짜는 같은 date 객체를 재사용)"""
+        return [_day_date(day) for day in (self.timestamps // MS_PER_DAY).tolist()]
+
+    def daily_aggregates(self, partition: int = 0, offset: int = -1) -> List[DailyAggregate]:
+        """(메시지 offset, symbol, 거래일)별 거래량/거래대금/건수/첫·마지막 거래 시각 집계
+
+        거래일은 UTC 기준 (record 모드의 utc_date()와 동일), 거래 시각은 epoch ms.
+        메시지별 offset(self.offsets)이 있으면 record 모드처럼 메시지마다 델타를 나눠,
+        재처리 poll의 경계가 처음과 달라도 Lua 스크립트가 메시지 단위로 중복을 가려낸다.
+        offsets가 없으면 모든 행을 offset 하나로 본다. 결과는 offset 오름차순.
+        """
+        if not len(self):
+            return []
+
+        days = self.timestamps // MS_PER_DAY
+        unique_symbols, symbol_index = np.unique(self.symbols, return_inverse=True)
+        unique_days, day_index = np.unique(days, return_inverse=True)
+        if self.offsets is not None:
+            unique_offsets, offset_index = np.unique(self.offsets, return_inverse=True)
+        else:
+            unique_offsets, offset_index = np.array([offset]), np.zeros(len(self), dtype=np.int64)
+        symbol_count, day_count = len(unique_symbols), len(unique_days)
+        groups, group_index = np.unique(
+            (offset_index * symbol_count + symbol_index) * day_count + day_index, return_inverse=True
+        )
+
+        group_count = len(groups)
+        total_volume = np.bincount(group_index, weights=self.volumes, minlength=group_count)
+        total_amount = np.bincount(group_index, weights=self.amounts, minlength=group_count)
+        trade_count = np.bincount(group_index, minlength=group_count)
+
+        first_time = np.full(group_count, np.iinfo(np.int64).max, dtype=np.int64)
+        last_time = np.full(group_count, np.iinfo(np.int64).min, dtype=np.int64)
+        np.minimum.at(first_time, group_index, self.timestamps)
+        np.maximum.at(last_time, group_index, self.timestamps)
+
+        aggregates = []
+        for group, volume, amount, count, first, last in zip(
+                groups.tolist(), total_volume.tolist(), total_amount.tolist(),
+                trade_count.tolist(), first_time.tolist(), last_time.tolist()):
+            message, day = divmod(group, day_count)
+            message, symbol = divmod(message, symbol_count)
+            aggregates.append(DailyAggregate(
+                unique_symbols[symbol],
+                _day_date(int(unique_days[day])),
+                volume,
+                amount,
+                count,
+                first,
+                last,
+                partition,
+                int(unique_offsets[message])
+            ))
+        return aggregates
@@ -0,0 +1,75 @@
+import multiprocessing
+import signal
+import time
+from typing import Dict
+
+
+def run_worker(worker_index: int):
+    """워커 프로세스 진입점: 프로세스마다 자체 consumer/Cassandra 세션/Redis 클라이언트를 생성"""
+    from stream_processor import create_processor
+
+    processor = create_processor(worker_index)
+    processor.run()
+
+
+class WorkerSupervisor:
+    """STREAM_WORKERS개의 StreamProcessor 워커 프로세스를 띄우고 감시
+
+    모든 워커는 같은 consumer group에 참여하므로 Kafka가 파티션을 나눠 준다.
+    종료된 워커는 restart_delay초 뒤 같은 번호로 다시 시작한다.
+    """
+
+    def __init__(self, worker_count: int, restart_delay: float = 5, shutdown_timeout: float = 30):
+        self.worker_count = worker_count
+        self.restart_delay = restart_delay
+        self.shutdown_timeout = shutdown_timeout
+        self.context = multiprocessing.get_context('spawn')
+        self.workers: Dict[int, multiprocessing.Process] = {}
+        self.stopping = False
+
+    def start_worker(self, worker_index: int):
+        process = self.context.Process(
+            target=run_worker,
+            args=(worker_index,),
+            name=f"stream-processor-{worker_index}"
+        )
+        process.start()
+        self.workers[worker_index] = process
+        print(f"Started worker {worker_index} (pid {process.pid})")
+
+    def stop(self, signum=None, frame=None):
+        self.stopping = True
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        for worker_index in range(self.worker_count):
+            self.start_worker(worker_index)
+
+        try:
+            while not self.stopping:
+                for worker_index, process in list(self.workers.items()):
+                    if process.is_alive():
+                        continue
+                    print(f"Worker {worker_index} exited with code {process.exitcode}, "
+                          f"restarting in {self.restart_delay}s")
+                    time.sleep(self.restart_delay)
+                    if not self.stopping:
+                        self.start_worker(worker_index)
+                time.sleep(1)
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        print(f"Stopping {len(self.workers)} workers...")
+        for process in self.workers.values():
+            if process.is_alive():
+                process.terminate()
+
+        deadline = time.time() + self.shutdown_timeout
+        for worker_index, process in self.workers.items():
+            process.join(max(0, deadline - time.time()))
+            if process.is_alive():
+                print(f"Worker {worker_index} did not stop in time, killing")
+                process.kill()
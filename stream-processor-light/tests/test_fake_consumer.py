@@ -0,0 +1,26 @@
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(ROOT, 'src'))
+sys.path.append(os.path.join(ROOT, 'benchmarks'))
+
+from kafka import TopicPartition  # noqa: E402
+
+from fakes import FakeConsumer  # noqa: E402
+
+
+def test_seek_replays_partition_from_offset():
+    consumer = FakeConsumer([b'a', b'b', b'c', b'd', b'e'], topic='market', partitions=2)
+    first = consumer.poll(max_records=4)
+    assert consumer.position(TopicPartition('market', 0)) == 2
+
+    # 파티션 0을 offset 1부터 다시 읽음 (파티션 1은 남은 위치 그대로)
+    consumer.seek(TopicPartition('market', 0), 1)
+    replayed = consumer.poll(max_records=10)
+
+    assert [m.value for m in first[TopicPartition('market', 0)]] == [b'a', b'c']
+    assert [m.offset for m in replayed[TopicPartition('market', 0)]] == [1, 2]
+    assert [m.value for m in replayed[TopicPartition('market', 0)]] == [b'c', b'e']
+    assert TopicPartition('market', 1) not in replayed
+    assert consumer.position(TopicPartition('market', 0)) == 3
@@ -0,0 +1,63 @@
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from async_engine import AsyncFlushScheduler  # noqa: E402
+from flush_scheduler import FlushScheduler  # noqa: E402
+from offsets import RedisBarrier  # noqa: E402
+
+
+def failing_first_flush(calls):
+    def flush(batch):
+        calls.append(list(batch))
+        return len(calls) > 1  # 첫 flush(크기/마감 트리거)만 실패
+    return flush
+
+
+def test_barrier_reports_earlier_failed_flush():
+    calls = []
+    scheduler = FlushScheduler(failing_first_flush(calls), batch_size=2)
+    scheduler._drain([1, 2])  # 크기 트리거 flush 실패
+
+    barrier = RedisBarrier()
+    scheduler._drain([3, barrier])  # barrier 직전 배치는 성공
+
+    assert calls == [[1, 2], [3]]
+    assert barrier.is_done() and barrier.failed
+
+    # rewind 전까지는 이후 barrier도 실패로 표시
+    later = RedisBarrier()
+    scheduler._drain([later])
+    assert later.failed
+
+    scheduler.reset_failures()
+    after_rewind = RedisBarrier()
+    scheduler._drain([4, after_rewind])
+    assert not after_rewind.failed
+
+
+def test_async_barrier_reports_earlier_failed_flush():
+    calls = []
+    flush_sync = failing_first_flush(calls)
+
+    async def flush(batch):
+        return flush_sync(batch)
+
+    scheduler = AsyncFlushScheduler(flush, batch_size=2)
+    barrier = RedisBarrier()
+
+    async def run():
+        await scheduler._drain([1, 2])
+        await scheduler._drain([3, barrier])
+
+    asyncio.run(run())
+
+    assert calls == [[1, 2], [3]]
+    assert barrier.failed
+
+    scheduler.reset_failures()
+    after_rewind = RedisBarrier()
+    asyncio.run(scheduler._drain([after_rewind]))
+    assert not after_rewind.failed
@@ -0,0 +1,41 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from trade_batch import TradeBatch  # noqa: E402
+
+
+def message(*trades):
+    return {'data': [{'s': symbol, 'p': 1.0, 'v': volume, 't': 1700000000000, 'c': []}
+                     for symbol, volume in trades], 'type': 'trade'}
+
+
+MESSAGES = [message(('AAPL', 1.0)), message(('AAPL', 2.0), ('MSFT', 3.0)), message(('AAPL', 4.0))]
+
+
+def apply(watermarks, totals, aggregates):
+    """APPLY_DAILY_AGGREGATES와 같은 규칙: 키별 반영 offset 이하의 델타는 건너뜀"""
+    for aggregate in aggregates:
+        if aggregate.offset <= watermarks.get(aggregate.symbol, -1):
+            continue
+        totals[aggregate.symbol] = totals.get(aggregate.symbol, 0) + aggregate.total_volume
+        watermarks[aggregate.symbol] = aggregate.offset
+
+
+def test_daily_aggregates_split_by_message_offset():
+    aggregates = TradeBatch.from_messages(MESSAGES, [10, 11, 12]).daily_aggregates(partition=1)
+
+    assert [(a.offset, a.symbol, a.total_volume) for a in aggregates] == [
+        (10, 'AAPL', 1.0), (11, 'AAPL', 2.0), (11, 'MSFT', 3.0), (12, 'AAPL', 4.0)
+    ]
+    assert {a.partition for a in aggregates} == {1}
+
+
+def test_replay_with_different_poll_boundaries_is_not_double_counted():
+    watermarks, totals = {}, {}
+    apply(watermarks, totals, TradeBatch.from_messages(MESSAGES[:2], [10, 11]).daily_aggregates())
+    # rewind 후 다른 경계로 다시 poll: offset 11까지는 이미 반영됨
+    apply(watermarks, totals, TradeBatch.from_messages(MESSAGES[1:], [11, 12]).daily_aggregates())
+
+    assert totals == {'AAPL': 7.0, 'MSFT': 3.0}
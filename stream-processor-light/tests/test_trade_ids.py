@@ -0,0 +1,34 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from timeuuid import trade_uuid  # noqa: E402
+from trade_batch import TradeBatch  # noqa: E402
+
+MESSAGES = [
+    {'data': [{'s': 'AAPL', 'p': 1.0, 'v': 2.0, 't': 1700000000000, 'c': []},
+              {'s': 'MSFT', 'p': 3.0, 'v': 4.0, 't': 1700000000000, 'c': None}], 'type': 'trade'},
+    {'data': [{'s': 'AAPL', 'p': 5.0, 'v': 6.0, 't': 1700000000001, 'c': ['1']}], 'type': 'trade'},
+]
+
+
+def test_replayed_batch_reuses_trade_ids():
+    first = TradeBatch.from_messages(MESSAGES, [10, 11]).trade_ids(2)
+    replayed = TradeBatch.from_messages(MESSAGES, [10, 11]).trade_ids(2)
+
+    assert first == replayed
+    assert len(set(first)) == 3
+    # record 모드(process_message)와 같은 uuid
+    assert first == [trade_uuid(trade['t'], 2, offset, index)
+                     for message, offset in zip(MESSAGES, [10, 11])
+                     for index, trade in enumerate(message['data'])]
+
+
+def test_trade_uuid_keeps_trade_time_and_position():
+    trade_id = trade_uuid(1700000000123, 3, 123456789, 2)
+
+    assert trade_id.version == 1
+    assert (trade_id.time - 0x01b21dd213814000) // 10_000 == 1700000000123
+    assert trade_id != trade_uuid(1700000000123, 4, 123456789, 2)
+    assert trade_id != trade_uuid(1700000000123, 3, 123456790, 2)